@@ -0,0 +1,199 @@
+"""
+Per-user anomaly scan for Team Dashboard
+Flags user-days whose completed tasks, hours or tasks-per-hour are far from
+that user's own baseline. Baselines are exponentially weighted means and
+variances, updated one day at a time for all users at once; the state of
+every finished day is kept in the shared cache, so each scan only processes
+the days written since the last one
+"""
+
+import logging
+import os
+import pickle
+import threading
+from datetime import date, timedelta
+from typing import Callable, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import shared_cache
+
+logger = logging.getLogger("team_dashboard.anomalies")
+
+# Flag threshold, baseline half-life (in submissions), history needed before flagging
+# and how far back a fresh baseline starts (environment overrides)
+Z_THRESHOLD = float(os.getenv("ANOMALY_Z", "3.0"))
+HALFLIFE = float(os.getenv("ANOMALY_HALFLIFE", "14"))
+MIN_HISTORY = int(os.getenv("ANOMALY_MIN_HISTORY", "5"))
+HISTORY_DAYS = int(os.getenv("ANOMALY_HISTORY_DAYS", "365"))
+
+METRICS = ["completed", "hours", "efficiency"]
+# Smallest spread assumed per metric, so a very regular user is not flagged for tiny changes
+STD_FLOOR = np.array([2.0, 0.5, 0.5])
+
+COMPLETED_COLUMNS = [
+    "spatial_completed", "textual_completed", "qa_completed",
+    "qc_completed", "automation_completed", "other_completed",
+]
+
+_STATE_KEY = "anomaly:state"
+_STATE_TTL = 7 * 24 * 3600
+
+class BaselineState:
+    """Baselines of every user after the last finished day, plus the rows flagged so far."""
+
+    def __init__(self, start: date):
+        self.start = start
+        self.through = start - timedelta(days=1)
+        self.users: List[str] = []
+        self.mean = np.zeros((0, len(METRICS)))
+        self.var = np.zeros((0, len(METRICS)))
+        self.count = np.zeros((0, len(METRICS)))
+        self.flags = _empty_flags()
+
+    def user_index(self, names: Iterable[str]) -> np.ndarray:
+        """Positions of ``names``, adding unseen users with empty baselines."""
+        known = {name: i for i, name in enumerate(self.users)}
+        new = [name for name in dict.fromkeys(names) if name not in known]
+        if new:
+            for name in new:
+                known[name] = len(self.users)
+                self.users.append(name)
+            pad = np.zeros((len(new), len(METRICS)))
+            self.mean = np.vstack([self.mean, pad])
+            self.var = np.vstack([self.var, pad])
+            self.count = np.vstack([self.count, pad])
+        return np.array([known[name] for name in names], dtype=int)
+
+def _empty_flags() -> pd.DataFrame:
+    columns = ["submission_date", "user_names"] + METRICS + [f"z_{m}" for m in METRICS] + ["reason"]
+    return pd.DataFrame(columns=columns)
+
+def user_days(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per user and day: completed, hours and tasks per hour."""
+    if df.empty:
+        return pd.DataFrame(columns=["submission_date", "user_names"] + METRICS)
+    frame = pd.DataFrame({
+        "submission_date": pd.to_datetime(df["submission_date"]).dt.date,
+        "user_names": df["user_names"],
+        "completed": df[COMPLETED_COLUMNS].sum(axis=1).astype(float),
+        "hours": df["total_hours"].astype(float),
+    })
+    days = frame.groupby(["submission_date", "user_names"], sort=True, as_index=False)[["completed", "hours"]].sum()
+    days["efficiency"] = days["completed"] / days["hours"].where(days["hours"] > 0)
+    return days
+
+def _score(state: BaselineState, days: pd.DataFrame, update: bool) -> pd.DataFrame:
+    """Z-scores of ``days`` against the baselines before each day; ``update`` folds them in."""
+    if days.empty:
+        return _empty_flags()
+    alpha = 1 - 0.5 ** (1 / HALFLIFE)
+    users = state.user_index(days["user_names"].tolist())
+    values = days[METRICS].to_numpy(dtype=float)
+    z = np.full(values.shape, np.nan)
+    # Rows are sorted by day: each slice is one day, all users scored at once
+    bounds = np.flatnonzero(np.r_[True, days["submission_date"].to_numpy()[1:] != days["submission_date"].to_numpy()[:-1], True])
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        rows = users[first:last]
+        x = values[first:last]
+        mean, var, count = state.mean[rows], state.var[rows], state.count[rows]
+        std = np.maximum(np.sqrt(var), STD_FLOOR)
+        ready = (count >= MIN_HISTORY) & ~np.isnan(x)
+        z[first:last] = np.where(ready, (x - mean) / std, np.nan)
+        if update:
+            seen = ~np.isnan(x)
+            x0 = np.where(seen, x, 0.0)
+            # First value starts the baseline; later ones update the EW mean and variance
+            first_value = seen & (count == 0)
+            diff = x0 - mean
+            new_mean = np.where(first_value, x0, mean + alpha * diff)
+            new_var = np.where(first_value, 0.0, (1 - alpha) * (var + alpha * diff * diff))
+            state.mean[rows] = np.where(seen, new_mean, mean)
+            state.var[rows] = np.where(seen, new_var, var)
+            state.count[rows] = count + seen
+
+    flagged = np.nan_to_num(np.abs(z)) >= Z_THRESHOLD
+    hit = flagged.any(axis=1)
+    if not hit.any():
+        return _empty_flags()
+    result = days.loc[hit, ["submission_date", "user_names"] + METRICS].reset_index(drop=True)
+    for i, metric in enumerate(METRICS):
+        result[f"z_{metric}"] = z[hit, i]
+    result["reason"] = [
+        ", ".join(
+            f"{metric} {'high' if zs[i] > 0 else 'low'} (z={zs[i]:+.1f})"
+            for i, metric in enumerate(METRICS) if flags[i]
+        )
+        for zs, flags in zip(z[hit], flagged[hit])
+    ]
+    return result
+
+class AnomalyScanner:
+    """Keeps the baseline state current and returns flagged user-days for a date range."""
+
+    def __init__(self, load_range: Callable[[date, date], pd.DataFrame]):
+        self.load_range = load_range
+        self._lock = threading.Lock()
+
+    def _load_state(self) -> Optional[BaselineState]:
+        try:
+            payload = shared_cache.get_backend().get(_STATE_KEY)
+            return pickle.loads(payload) if payload is not None else None
+        except Exception as e:
+            logger.warning("Anomaly baseline unavailable, rebuilding: %s", e)
+            return None
+
+    def _save_state(self, state: BaselineState):
+        try:
+            shared_cache.get_backend().set(_STATE_KEY, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), _STATE_TTL)
+        except Exception as e:
+            logger.warning("Failed to store anomaly baseline: %s", e)
+
+    def _current_state(self, today: date) -> BaselineState:
+        """State through yesterday, catching up from the stored state when possible."""
+        yesterday = today - timedelta(days=1)
+        state = self._load_state()
+        if state is None:
+            state = BaselineState(today - timedelta(days=HISTORY_DAYS))
+        if state.through < yesterday:
+            days = user_days(self.load_range(state.through + timedelta(days=1), yesterday))
+            flags = _score(state, days, update=True)
+            if not flags.empty:
+                state.flags = pd.concat([state.flags, flags], ignore_index=True) if not state.flags.empty else flags
+            state.through = yesterday
+            state.flags = state.flags[state.flags["submission_date"] > yesterday - timedelta(days=HISTORY_DAYS)]
+            self._save_state(state)
+        return state
+
+    def scan(self, start_date, end_date) -> pd.DataFrame:
+        """Flagged user-days dated within [start_date, end_date], today included."""
+        start, end = pd.Timestamp(start_date).date(), pd.Timestamp(end_date).date()
+        today = date.today()
+        with self._lock:
+            state = self._current_state(today)
+        flags = state.flags
+        if start <= today <= end:
+            # Today is still changing: score it against the baselines without keeping it
+            today_flags = _score(state, user_days(self.load_range(today, today)), update=False)
+            if not today_flags.empty:
+                flags = pd.concat([flags, today_flags], ignore_index=True) if not flags.empty else today_flags
+        if flags.empty:
+            return flags
+        in_range = (flags["submission_date"] >= start) & (flags["submission_date"] <= end)
+        return flags[in_range].sort_values(["submission_date", "user_names"], ascending=[False, True]).reset_index(drop=True)
+
+def invalidate(days: Optional[Iterable] = None):
+    """Drop the stored baselines when a finished day changed (any day when None)."""
+    backend = shared_cache.get_backend()
+    try:
+        if days is not None:
+            payload = backend.get(_STATE_KEY)
+            if payload is None:
+                return
+            through = pickle.loads(payload).through
+            if all(pd.Timestamp(day).date() > through for day in days if day is not None):
+                return
+        backend.clear(_STATE_KEY)
+    except Exception as e:
+        logger.warning("Failed to invalidate anomaly baseline: %s", e)
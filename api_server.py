@@ -0,0 +1,282 @@
+"""
+Read-only JSON API for Team Dashboard
+Serves submissions, task entries and aggregated KPIs by date range from the
+same day-bucketed caches as the dashboard. Responses carry an ETag derived
+from the data version, so unchanged polls get 304 without touching the
+database; large bodies are gzipped
+
+Endpoints (all GET, ``start``/``end`` as YYYY-MM-DD, default: last 30 days):
+    /api/submissions?start=&end=&page=1&page_size=500
+    /api/entries?start=&end=&page=1&page_size=500
+    /api/kpis?start=&end=&group_by=day|user|task_type
+    /api/health
+
+Usage:
+    python api_server.py [--host 127.0.0.1] [--port 8601]
+or set API_PORT to serve it from inside the Streamlit process.
+"""
+
+import argparse
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import history_data
+import shared_cache
+import task_validation
+
+logger = logging.getLogger("team_dashboard.api")
+
+# Bind address, optional bearer token and paging limits (environment overrides)
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_TOKEN = os.getenv("API_TOKEN", "")
+DEFAULT_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "500"))
+MAX_PAGE_SIZE = 5000
+DEFAULT_DAYS = 30
+
+# Bodies smaller than this are sent uncompressed
+GZIP_MIN_BYTES = 1024
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _date_param(query: Dict, name: str, default: date) -> date:
+    value = query.get(name, [None])[0]
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be a date (YYYY-MM-DD)")
+
+def _int_param(query: Dict, name: str, default: int, low: int, high: int) -> int:
+    value = query.get(name, [None])[0]
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    if not low <= number <= high:
+        raise ApiError(400, f"{name} must be between {low} and {high}")
+    return number
+
+def _date_range(query: Dict) -> Tuple[date, date]:
+    end = _date_param(query, "end", date.today())
+    start = _date_param(query, "start", end - timedelta(days=DEFAULT_DAYS))
+    if end < start:
+        raise ApiError(400, "end must not be before start")
+    return start, end
+
+def _records(df: pd.DataFrame):
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+def _page(df: pd.DataFrame, query: Dict) -> Dict:
+    page = _int_param(query, "page", 1, 1, 10 ** 9)
+    page_size = _int_param(query, "page_size", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    first = (page - 1) * page_size
+    rows = df.iloc[first:first + page_size]
+    return {
+        "page": page,
+        "page_size": page_size,
+        "total": len(df),
+        "next_page": page + 1 if first + page_size < len(df) else None,
+        "data": _records(rows),
+    }
+
+def submissions(query: Dict) -> Dict:
+    start, end = _date_range(query)
+    return {"start": start.isoformat(), "end": end.isoformat(),
+            **_page(history_data.submissions_in_range(start, end), query)}
+
+def entries(query: Dict) -> Dict:
+    start, end = _date_range(query)
+    return {"start": start.isoformat(), "end": end.isoformat(),
+            **_page(history_data.task_entries_in_range(start, end), query)}
+
+def kpis(query: Dict) -> Dict:
+    """Completed and hours per task type, with submission and user counts."""
+    start, end = _date_range(query)
+    group_by = query.get("group_by", [""])[0]
+    if group_by not in ("", "day", "user", "task_type"):
+        raise ApiError(400, "group_by must be day, user or task_type")
+
+    subs = history_data.submissions_in_range(start, end)
+    ents = history_data.task_entries_in_range(start, end)
+    result = {"start": start.isoformat(), "end": end.isoformat(), "group_by": group_by or None}
+
+    def summarize(sub_part: pd.DataFrame, ent_part: pd.DataFrame) -> Dict:
+        by_type = ent_part.groupby("task_type")[["completed", "hours"]].sum() if not ent_part.empty else None
+        task_types = {}
+        for label in task_validation.TASK_TYPES:
+            completed = float(by_type.loc[label, "completed"]) if by_type is not None and label in by_type.index else 0.0
+            hours = float(by_type.loc[label, "hours"]) if by_type is not None and label in by_type.index else 0.0
+            task_types[label] = {"completed": completed, "hours": hours}
+        return {
+            "submissions": int(len(sub_part)),
+            "users": int(sub_part["user_names"].nunique()) if not sub_part.empty else 0,
+            "total_hours": float(sub_part["total_hours"].sum()) if not sub_part.empty else 0.0,
+            "overtime_hours": float(sub_part["overtime_hours"].sum()) if not sub_part.empty else 0.0,
+            "task_types": task_types,
+        }
+
+    if not group_by:
+        result["totals"] = summarize(subs, ents)
+        return result
+
+    if group_by == "task_type":
+        result["groups"] = [
+            {"task_type": label, **values} for label, values in summarize(subs, ents)["task_types"].items()
+        ]
+        return result
+
+    if group_by == "day":
+        sub_keys = subs["submission_date"].astype(str).str[:10] if not subs.empty else None
+        ent_keys = ents["submission_date"].astype(str).str[:10] if not ents.empty else None
+    else:
+        sub_keys = subs["user_names"] if not subs.empty else None
+        ent_keys = ents["user_name"] if not ents.empty else None
+    sub_groups = {key: part for key, part in subs.groupby(sub_keys)} if sub_keys is not None else {}
+    ent_groups = {key: part for key, part in ents.groupby(ent_keys)} if ent_keys is not None else {}
+    result["groups"] = [
+        {group_by: key, **summarize(sub_groups.get(key, subs.iloc[0:0]), ent_groups.get(key, ents.iloc[0:0]))}
+        for key in sorted(set(sub_groups) | set(ent_groups))
+    ]
+    return result
+
+ROUTES = {
+    "/api/submissions": submissions,
+    "/api/entries": entries,
+    "/api/kpis": kpis,
+}
+
+# Serving from the dashboard process: the data version is always current there
+_embedded = False
+
+def _etags_enabled() -> bool:
+    # A standalone server only sees writes from other processes through a shared backend
+    return _embedded or shared_cache.get_backend().shared
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    def _send(self, status: int, payload: Optional[Dict], etag: Optional[str] = None):
+        body = b"" if payload is None else json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if payload is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            if len(body) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body, compresslevel=5)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        if not API_TOKEN:
+            return True
+        header = self.headers.get("Authorization", "")
+        return header.startswith("Bearer ") and hmac.compare_digest(header[7:], API_TOKEN)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+        try:
+            if path == "/api/health":
+                self._send(200, {"status": "ok"})
+                return
+            if not self._authorized():
+                self._send(401, {"error": "missing or invalid bearer token"})
+                return
+            handler = ROUTES.get(path)
+            if handler is None:
+                self._send(404, {"error": "not found"})
+                return
+            query = parse_qs(url.query)
+
+            etag = None
+            if _etags_enabled():
+                canonical = "&".join(f"{k}={v[0]}" for k, v in sorted(query.items()))
+                # The resolved window, since a request without start/end ends today and moves at midnight
+                start, end = _date_range(query)
+                tag = hashlib.sha1(
+                    f"{history_data.data_version()}|{path}|{start}|{end}|{canonical}".encode()
+                ).hexdigest()
+                etag = f'"{tag}"'
+                # Any write moves the data version on; an unchanged poll is answered without the database
+                if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+                    self._send(304, None, etag)
+                    return
+            self._send(200, handler(query), etag)
+        except ApiError as e:
+            self._send(e.status, {"error": str(e)})
+        except Exception as e:
+            logger.error("API request %s failed: %s", self.path, e)
+            self._send(500, {"error": "internal error"})
+
+    do_HEAD = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+def start_api_server(port: int, host: str = API_HOST) -> ThreadingHTTPServer:
+    """Serve the API from a background thread."""
+    server = ThreadingHTTPServer((host, port), _ApiHandler)
+    threading.Thread(target=server.serve_forever, name="api-server", daemon=True).start()
+    return server
+
+_api_lock = threading.Lock()
+_api_started = False
+
+def start_api_from_env():
+    """Start the API inside this process when API_PORT is set (once per process)."""
+    global _api_started, _embedded
+    port = os.getenv("API_PORT")
+    if not port:
+        return
+    if not API_TOKEN:
+        # Embedded, the API serves every team's data from the app's own credentials
+        logger.error("API_PORT is set but API_TOKEN is not; not starting the embedded API")
+        return
+    with _api_lock:
+        if _api_started:
+            return
+        _api_started = True
+    _embedded = True
+    try:
+        start_api_server(int(port))
+    except Exception as e:
+        logger.error("Failed to start API server on port %s: %s", port, e)
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only JSON API for Team Dashboard")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8601")))
+    args = parser.parse_args()
+
+    if not API_TOKEN:
+        logger.warning("API_TOKEN is not set; the API accepts unauthenticated requests")
+    server = ThreadingHTTPServer((args.host, args.port), _ApiHandler)
+    print(f"Serving Team Dashboard API on http://{args.host}:{args.port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
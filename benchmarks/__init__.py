@@ -0,0 +1,4 @@
+"""
+Performance tooling for Team Dashboard
+Synthetic data generation and headless benchmarks of the dashboard's hot paths
+"""
@@ -0,0 +1,332 @@
+"""
+Concurrent-user load generator for the Team Dashboard submission path
+Simulates N annotators logging in (verify_user_password) and submitting
+(save_task_submission) at the same time, as at shift end, and reports
+throughput, latency percentiles, lock-wait errors and connection counts.
+
+Usage (from the repository root):
+    python -m benchmarks.load_test --users 50 --submissions 5
+    python -m benchmarks.load_test --backend postgres --database-url postgresql://localhost/dashboard_load \\
+        --sslmode disable --users 50 --output load.json
+
+The postgres backend writes synthetic users, batches and submissions to the
+given database and removes them when the run ends. It refuses to run against
+the app's own DATABASE_URL unless --force is given.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from benchmarks.run_benchmarks import REPO_ROOT, _git_commit
+
+LOCK_ERROR_MARKERS = ("database is locked", "database table is locked", "lock timeout",
+                      "could not obtain lock", "deadlock detected")
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+def _is_lock_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in LOCK_ERROR_MARKERS)
+
+class LoadResults:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.login_latencies: List[float] = []
+        self.submit_latencies: List[float] = []
+        self.login_failures = 0
+        self.lock_errors = 0
+        self.other_errors = 0
+        self.error_samples: List[str] = []
+
+    def record_error(self, error: Exception):
+        with self.lock:
+            if _is_lock_error(error):
+                self.lock_errors += 1
+            else:
+                self.other_errors += 1
+            if len(self.error_samples) < 10:
+                self.error_samples.append(f"{type(error).__name__}: {error}")
+
+def _same_database(url: str, other: Optional[str]) -> bool:
+    """Whether two PostgreSQL URLs point at the same host, port and database."""
+    if not other:
+        return False
+    from psycopg2.extensions import parse_dsn
+
+    def target(value):
+        try:
+            dsn = parse_dsn(value)
+        except Exception:
+            return value.strip()
+        return (dsn.get("host", "localhost"), str(dsn.get("port", "5432")), dsn.get("dbname"))
+
+    return target(url) == target(other)
+
+def _seed_postgres_users(adapter, credentials: Dict[str, str], batches: List[str]) -> List[str]:
+    """Ensure the synthetic annotators and batches exist on PostgreSQL; return the batches added."""
+    adapter.create_tables()
+    for user, code in credentials.items():
+        adapter.execute_sql(
+            "INSERT INTO user_profiles (user_name, employee_code, team_function, active) "
+            "VALUES (%s, %s, %s, TRUE) ON CONFLICT (user_name) DO UPDATE "
+            "SET employee_code = EXCLUDED.employee_code, active = TRUE",
+            (user, code, "Load Test")
+        )
+        adapter.execute_sql("DELETE FROM user_passwords WHERE user_name = %s", (user,))
+    added = []
+    for batch in batches:
+        rows = adapter.execute_sql(
+            "INSERT INTO batch_options (name) VALUES (%s) ON CONFLICT (name) DO NOTHING RETURNING name",
+            (batch,), fetch=True
+        )
+        added.extend(row["name"] for row in rows)
+    return added
+
+def _cleanup_postgres(adapter, users: List[str], batches: List[str], timeout: float = 60.0):
+    """Remove everything the run wrote: submissions, entries, passwords, profiles and added batches."""
+    import write_behind
+
+    # Submissions still in the write-behind journal would be replayed after the cleanup
+    journal = write_behind.active_journal()
+    deadline = time.time() + timeout
+    while journal is not None and journal.stats()["backlog"] and time.time() < deadline:
+        if not journal.flush_once():
+            time.sleep(0.2)
+
+    adapter.execute_sql("DELETE FROM task_entries WHERE user_name = ANY(%s)", (users,))
+    adapter.execute_sql("DELETE FROM task_submissions WHERE user_names = ANY(%s)", (users,))
+    adapter.execute_sql("DELETE FROM user_passwords WHERE user_name = ANY(%s)", (users,))
+    adapter.execute_sql("DELETE FROM user_profiles WHERE user_name = ANY(%s) AND team_function = %s",
+                        (users, "Load Test"))
+    if batches:
+        adapter.execute_sql("DELETE FROM batch_options WHERE name = ANY(%s)", (batches,))
+
+def _sample_postgres_connections(adapter, stop: threading.Event, peak: Dict[str, int]):
+    """Track the peak number of server-side connections for this database."""
+    while not stop.is_set():
+        try:
+            rows = adapter.execute_sql(
+                "SELECT COUNT(*) AS n FROM pg_stat_activity WHERE datname = current_database()", fetch=True
+            )
+            peak["server"] = max(peak.get("server", 0), int(rows[0]["n"]))
+        except Exception:
+            pass
+        stop.wait(0.2)
+
+def run_load_test(backend: str, users: int, submissions: int, think_time: float,
+                  history_rows: int, database_url: Optional[str], sslmode: Optional[str],
+                  seed: int = 7, force: bool = False) -> Dict:
+    workdir = tempfile.mkdtemp(prefix="dashboard-load-")
+
+    # The app reads its configuration at import time, so set it before any
+    # module that creates the global database adapter is imported
+    if backend == "postgres":
+        if not database_url:
+            raise SystemExit("--database-url is required for the postgres backend")
+        if _same_database(database_url, os.getenv("DATABASE_URL")) and not force:
+            raise SystemExit("--database-url is the app's DATABASE_URL; use a scratch database or pass --force")
+        os.environ["DATABASE_URL"] = database_url
+        if sslmode:
+            os.environ["DATABASE_SSLMODE"] = sslmode
+    else:
+        os.environ.pop("DATABASE_URL", None)
+        db_path = os.path.join(workdir, "load.db")
+        os.environ["SQLITE_DB_PATH"] = db_path
+
+    from benchmarks.synthetic_data import batch_names, build_submission, generate_dataset, user_credentials
+
+    if backend == "postgres":
+        credentials = user_credentials(users, password_ratio=0.0)
+    else:
+        generate_dataset(db_path, rows=history_rows, users=users, batches=20, days=180, seed=seed)
+        credentials = user_credentials(users)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(workdir)
+
+    from streamlit import logger as st_logger
+    st_logger.set_log_level("error")
+    logging.getLogger("team_dashboard.slow_queries").setLevel(logging.ERROR)
+    import team_dashboard as td
+    from query_metrics import query_metrics
+
+    added_batches: List[str] = []
+    if backend == "postgres":
+        if not td.db_adapter.is_postgres:
+            raise SystemExit("Could not connect to PostgreSQL with the given --database-url")
+        # Streamlit secrets take precedence over the environment in the adapter
+        if td.db_adapter.db_url != database_url:
+            raise SystemExit("The app's Streamlit secrets override --database-url; run from a directory without them")
+        added_batches = _seed_postgres_users(td.db_adapter, credentials, batch_names(20))
+    query_metrics.reset()
+
+    batches = batch_names(20)
+    results = LoadResults()
+    barrier = threading.Barrier(users)
+
+    def annotator(index: int, user: str, secret: str):
+        rng = random.Random(seed * 1000 + index)
+        barrier.wait()
+
+        started = time.perf_counter()
+        try:
+            ok = td.verify_user_password(user, secret)
+        except Exception as e:
+            results.record_error(e)
+            return
+        with results.lock:
+            results.login_latencies.append(time.perf_counter() - started)
+            if not ok:
+                results.login_failures += 1
+
+        for n in range(submissions):
+            data, entries = build_submission(rng, user, batches, date.today() - timedelta(days=n))
+            started = time.perf_counter()
+            try:
+                td.save_task_submission(data, entries)
+            except Exception as e:
+                results.record_error(e)
+                continue
+            with results.lock:
+                results.submit_latencies.append(time.perf_counter() - started)
+            if think_time:
+                time.sleep(rng.uniform(0, think_time))
+
+    server_peak: Dict[str, int] = {}
+    stop_sampler = threading.Event()
+    sampler = None
+    if backend == "postgres":
+        sampler = threading.Thread(
+            target=_sample_postgres_connections, args=(td.db_adapter, stop_sampler, server_peak), daemon=True
+        )
+        sampler.start()
+
+    threads = [
+        threading.Thread(target=annotator, args=(i, user, secret), name=f"annotator-{i}")
+        for i, (user, secret) in enumerate(credentials.items())
+    ]
+    started = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        stop_sampler.set()
+        if sampler:
+            sampler.join()
+        metrics = query_metrics.snapshot()
+    finally:
+        stop_sampler.set()
+        if backend == "postgres":
+            _cleanup_postgres(td.db_adapter, list(credentials), added_batches)
+    attempted = users * submissions
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "backend": backend,
+            "users": users,
+            "submissions_per_user": submissions,
+            "think_time_s": think_time,
+            "history_rows": history_rows if backend == "sqlite" else None,
+        },
+        "summary": {
+            "elapsed_s": round(elapsed, 3),
+            "submissions_ok": len(results.submit_latencies),
+            "submissions_attempted": attempted,
+            "throughput_per_s": round(len(results.submit_latencies) / elapsed, 2) if elapsed else 0.0,
+            "login_failures": results.login_failures,
+            "lock_wait_errors": results.lock_errors,
+            "other_errors": results.other_errors,
+            "peak_open_connections": metrics["peak_connections"],
+            "connections_opened": {b: s["calls"] for b, s in metrics["connection_acquire"].items()},
+            "peak_server_connections": server_peak.get("server"),
+        },
+        "login_latency": _percentiles(results.login_latencies),
+        "submit_latency": _percentiles(results.submit_latencies),
+        "connection_acquire": metrics["connection_acquire"],
+        "error_samples": results.error_samples,
+    }
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    summary = report["summary"]
+    print(f"\nBackend {report['meta']['backend']} · {report['meta']['users']} users × "
+          f"{report['meta']['submissions_per_user']} submissions in {summary['elapsed_s']:.2f} s")
+    print(f"  throughput        {summary['throughput_per_s']:.2f} submissions/s "
+          f"({summary['submissions_ok']}/{summary['submissions_attempted']} ok)")
+    print(f"  lock-wait errors  {summary['lock_wait_errors']}   other errors {summary['other_errors']}   "
+          f"login failures {summary['login_failures']}")
+    print(f"  connections       opened {summary['connections_opened']}   peak open {summary['peak_open_connections']}"
+          + (f"   peak on server {summary['peak_server_connections']}" if summary['peak_server_connections'] else ""))
+    for name in ("login_latency", "submit_latency"):
+        stats = report[name]
+        if stats.get("count"):
+            line = f"  {name:17s} p50 {stats['p50_ms']:8.1f} ms   p95 {stats['p95_ms']:8.1f} ms   p99 {stats['p99_ms']:8.1f} ms"
+            if baseline and baseline.get(name, {}).get("count"):
+                previous = baseline[name]["p95_ms"]
+                line += f"   (p95 {(stats['p95_ms'] - previous) / max(previous, 1e-9) * 100:+.1f}% vs baseline)"
+            print(line)
+    if baseline:
+        previous = baseline["summary"]["throughput_per_s"]
+        print(f"  throughput vs baseline {previous:.2f}/s -> {summary['throughput_per_s']:.2f}/s")
+    for sample in report["error_samples"][:3]:
+        print(f"  error: {sample}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent annotators submitting daily tasks")
+    parser.add_argument("--backend", choices=["sqlite", "postgres"], default="sqlite")
+    parser.add_argument("--database-url", help="Scratch PostgreSQL URL (postgres backend); seeded data is removed afterwards")
+    parser.add_argument("--force", action="store_true", help="Allow --database-url to be the app's DATABASE_URL")
+    parser.add_argument("--sslmode", help="Override DATABASE_SSLMODE, e.g. disable for a local server")
+    parser.add_argument("--users", type=int, default=25, help="Concurrent simulated annotators")
+    parser.add_argument("--submissions", type=int, default=3, help="Submissions per annotator")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Max random pause between submissions (s)")
+    parser.add_argument("--history-rows", type=int, default=10000, help="Pre-existing submissions (sqlite only)")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--compare", help="Previous report JSON to compare against")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = run_load_test(args.backend, args.users, args.submissions, args.think_time,
+                           args.history_rows, args.database_url, args.sslmode, force=args.force)
+    print_report(report, baseline)
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {output}")
+
+if __name__ == "__main__":
+    main()
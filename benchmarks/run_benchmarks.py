@@ -0,0 +1,233 @@
+"""
+Headless benchmarks for Team Dashboard hot paths
+Runs data access, aggregation and export functions against a synthetic SQLite
+database and writes machine-readable results for comparison across commits.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks --rows 100000 --output bench.json
+    python -m benchmarks.run_benchmarks --rows 100000 --compare bench.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Streamlit render calls replaced with no-ops so only data work is measured
+STUBBED_STREAMLIT_CALLS = [
+    "plotly_chart", "dataframe", "metric", "write", "subheader", "info",
+    "success", "warning", "error", "markdown", "balloons",
+]
+
+class _NullColumn:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def _null_columns(spec, *args, **kwargs):
+    count = spec if isinstance(spec, int) else len(spec)
+    return [_NullColumn() for _ in range(count)]
+
+@contextmanager
+def stub_streamlit(st):
+    """Replace Streamlit output calls with no-ops for the duration of a benchmark."""
+    patches = [mock.patch.object(st, name, lambda *a, **k: None) for name in STUBBED_STREAMLIT_CALLS]
+    patches.append(mock.patch.object(st, "columns", _null_columns))
+    for patch in patches:
+        patch.start()
+    try:
+        yield
+    finally:
+        for patch in patches:
+            patch.stop()
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "runs": len(samples),
+        "min_ms": ordered[0] * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p95_ms": ordered[p95_index] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+def time_function(func: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None,
+                  warmup: int = 1) -> Dict[str, float]:
+    """Time ``func`` ``repeat`` times, running ``setup`` (untimed) before each call."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return _summarize(samples)
+
+def run_benchmarks(rows: int, users: int, batches: int, days: int, repeat: int,
+                   only: Optional[List[str]] = None) -> Dict:
+    workdir = tempfile.mkdtemp(prefix="dashboard-bench-")
+    db_path = os.path.join(workdir, "bench.db")
+
+    # The app reads its configuration at import time
+    os.environ.pop("DATABASE_URL", None)
+    os.environ["SQLITE_DB_PATH"] = db_path
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(workdir)
+
+    from benchmarks.synthetic_data import generate_dataset
+
+    started = time.perf_counter()
+    counts = generate_dataset(db_path, rows=rows, users=users, batches=batches, days=days)
+    generation_seconds = time.perf_counter() - started
+
+    import streamlit as st
+    from streamlit import logger as st_logger
+    st_logger.set_log_level("error")
+    logging.getLogger("team_dashboard.slow_queries").setLevel(logging.ERROR)
+    import team_dashboard as td
+
+    today = date.today()
+    window_start, window_end = today - timedelta(days=30), today
+
+    import history_data
+    import shared_cache
+
+    def cold():
+        # Loader results also live in the cross-process shared cache, and
+        # range queries in its per-day buckets
+        st.cache_data.clear()
+        shared_cache.clear()
+        history_data.submissions_range_cache.clear()
+        history_data.entries_range_cache.clear()
+
+    def submission_payload():
+        entries = [
+            {"task_type": "Spatial", "batch": "CRAWLEYBOROUGHCOUNCIL_100", "completed": 40.0, "hours": 3.5},
+            {"task_type": "Spatial", "batch": "GATESHEADBOROUGHCOUNCIL_101", "completed": 25.0, "hours": 2.0},
+            {"task_type": "QA", "batch": "EXETERCITYCOUNCIL_102", "completed": 60.0, "hours": 2.5},
+        ]
+        data = {
+            "submission_date": today, "user_names": "Annotator 0001",
+            "spatial_completed": 65.0, "spatial_hours": 5.5,
+            "spatial_batches": json.dumps(["CRAWLEYBOROUGHCOUNCIL_100", "GATESHEADBOROUGHCOUNCIL_101"]),
+            "textual_completed": 0, "textual_hours": 0, "textual_batches": "[]",
+            "qa_completed": 60.0, "qa_hours": 2.5, "qa_batches": json.dumps(["EXETERCITYCOUNCIL_102"]),
+            "qc_completed": 0, "qc_hours": 0, "qc_batches": "[]",
+            "automation_completed": 0, "automation_hours": 0, "automation_batches": "[]",
+            "other_completed": 0, "other_hours": 0, "other_batches": "[]",
+            "overtime_hours": 0.0, "total_hours": 8.0, "note": "benchmark", "submitted_by": "Annotator 0001",
+        }
+        return data, entries
+
+    # Inputs for the pure aggregation/export benchmarks are loaded once, untimed
+    cold()
+    window_df = td.get_submissions_in_range(window_start, window_end)
+    window_entries = td.get_task_entries_in_range(window_start, window_end)
+    all_df = td.get_all_submissions()
+
+    benchmarks = {
+        "get_submissions_in_range[30d]": (lambda: td.get_submissions_in_range(window_start, window_end), cold),
+        "get_task_entries_in_range[30d]": (lambda: td.get_task_entries_in_range(window_start, window_end), cold),
+        "get_all_submissions": (td.get_all_submissions, cold),
+        "show_trend_charts[30d]": (lambda: td.show_trend_charts(window_df.copy()), None),
+        "show_team_performance[30d]": (lambda: td.show_team_performance(window_df.copy()), None),
+        "show_batch_analysis[30d]": (lambda: td.show_batch_analysis(window_df, window_entries), None),
+        "show_kpi_dashboard[all]": (lambda: td.show_kpi_dashboard(all_df.copy()), None),
+        "_prepare_export_df[30d]": (lambda: td._prepare_export_df(window_df), None),
+        "create_excel_export[30d]": (lambda: td.create_excel_export(window_df), None),
+        "authenticate_by_password[miss]": (lambda: td.authenticate_by_password("not-a-password"), cold),
+        "authenticate_by_password[hit]": (lambda: td.authenticate_by_password("pw-Annotator 0001"), cold),
+        "save_task_submission": (lambda: td.save_task_submission(*submission_payload()), None),
+    }
+
+    results = {}
+    with stub_streamlit(st):
+        for name, (func, setup) in benchmarks.items():
+            if only and not any(key in name for key in only):
+                continue
+            results[name] = time_function(func, repeat, setup=setup)
+            print(f"{name:40s} median {results[name]['median_ms']:10.2f} ms   p95 {results[name]['p95_ms']:10.2f} ms")
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": "sqlite",
+            "rows": counts,
+            "days": days,
+            "repeat": repeat,
+            "generation_seconds": round(generation_seconds, 3),
+            "window_rows": len(window_df),
+        },
+        "results": results,
+    }
+
+def compare(current: Dict, baseline: Dict):
+    """Print median timings of ``current`` relative to a previous results file."""
+    print(f"\nComparison against {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    print(f"{'benchmark':40s} {'baseline':>12s} {'current':>12s} {'change':>9s}")
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            print(f"{name:40s} {'-':>12s} {result['median_ms']:10.2f}ms {'new':>9s}")
+            continue
+        change = (result["median_ms"] - previous["median_ms"]) / max(previous["median_ms"], 1e-9) * 100
+        print(f"{name:40s} {previous['median_ms']:10.2f}ms {result['median_ms']:10.2f}ms {change:+8.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Team Dashboard hot paths on synthetic data")
+    parser.add_argument("--rows", type=int, default=10000, help="Number of task_submissions to generate")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365, help="History length in days")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--only", nargs="*", help="Run only benchmarks whose name contains one of these strings")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    results = run_benchmarks(args.rows, args.users, args.batches, args.days, args.repeat, args.only)
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {output}")
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Synthetic data generator for Team Dashboard benchmarks
+Fills a SQLite database with realistic submissions, task entries and users
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sqlite3
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from database_adapter import DatabaseAdapter
+
+TASK_TYPES = ["Spatial", "Textual", "QA", "QC", "Automation", "Other"]
+TEAM_FUNCTIONS = ["Spatial", "Textual", "Quality", "Automation"]
+
+# Rows are written in chunks so 1M-row datasets stay within modest memory
+CHUNK_SIZE = 5000
+
+def user_names(users: int) -> List[str]:
+    return [f"Annotator {i:04d}" for i in range(1, users + 1)]
+
+def batch_names(batches: int) -> List[str]:
+    councils = ["CRAWLEYBOROUGHCOUNCIL", "GATESHEADBOROUGHCOUNCIL", "EXETERCITYCOUNCIL", "LEEDSCITYCOUNCIL"]
+    return [f"{councils[i % len(councils)]}_{100 + i}" for i in range(batches)]
+
+def user_credentials(users: int, password_ratio: float = 0.2) -> Dict[str, str]:
+    """Login secret per synthetic user: custom password or Employee Code."""
+    credentials = {}
+    for i, user in enumerate(user_names(users)):
+        credentials[user] = f"pw-{user}" if i < int(users * password_ratio) else f"E{10000 + i}"
+    return credentials
+
+def build_submission(rng: random.Random, user: str, batches: List[str], day: date):
+    """Build a (data, task_entries) pair in the shape save_task_submission expects."""
+    data = {"submission_date": day, "user_names": user, "submitted_by": user, "note": ""}
+    task_entries = []
+    hours_left = 8.0
+    for task_type in TASK_TYPES:
+        key = task_type.lower()
+        data[f"{key}_completed"] = 0
+        data[f"{key}_hours"] = 0
+        data[f"{key}_batches"] = "[]"
+    for task_type in rng.sample(TASK_TYPES[:5], rng.choice([1, 2, 3])):
+        key = task_type.lower()
+        batch_list = rng.sample(batches, min(len(batches), rng.choice([1, 2, 3])))
+        for batch in batch_list:
+            hours = round(min(hours_left, rng.uniform(0.5, 2.5)), 2)
+            if hours <= 0:
+                break
+            hours_left -= hours
+            completed = float(rng.randint(5, 100)) if task_type == "Automation" else float(max(1, int(hours * 12)))
+            task_entries.append({"task_type": task_type, "batch": batch, "completed": completed, "hours": hours})
+            data[f"{key}_completed"] += completed
+            data[f"{key}_hours"] = round(data[f"{key}_hours"] + hours, 2)
+        data[f"{key}_batches"] = json.dumps([e["batch"] for e in task_entries if e["task_type"] == task_type])
+    data["overtime_hours"] = 0.0
+    data["total_hours"] = round(8.0 - hours_left, 2)
+    return data, task_entries
+
+def _generate_submissions(rng: random.Random, rows: int, users: List[str], batches: List[str],
+                          days: int, end_date: date) -> Iterator[tuple]:
+    """Yield (submission_row, entry_rows) pairs, one per user/day submission."""
+    for submission_id in range(1, rows + 1):
+        user = users[submission_id % len(users)]
+        day = end_date - timedelta(days=(submission_id * 7919) % days)
+        task_types = rng.sample(TASK_TYPES, rng.choice([1, 1, 2, 2, 3]))
+
+        hours_left = 8.0
+        totals: Dict[str, List] = {t: [0.0, 0.0, []] for t in TASK_TYPES}
+        entries = []
+        for task_type in task_types:
+            for _ in range(rng.choice([1, 1, 2, 3])):
+                hours = round(min(hours_left, rng.uniform(0.5, 4.0)), 2)
+                if hours <= 0:
+                    break
+                hours_left -= hours
+                if task_type == "Automation":
+                    completed = float(rng.randint(5, 100))
+                else:
+                    completed = float(max(1, int(hours * rng.gauss(12, 4))))
+                batch = rng.choice(batches) if task_type != "Other" or rng.random() < 0.5 else "N/A"
+                totals[task_type][0] += completed
+                totals[task_type][1] += hours
+                totals[task_type][2].append(batch)
+                entries.append((submission_id, day.isoformat(), user, task_type, batch, completed, hours))
+
+        columns = []
+        for task_type in TASK_TYPES:
+            completed, hours, batch_list = totals[task_type]
+            columns += [completed, round(hours, 2), json.dumps(batch_list)]
+        total_hours = round(sum(totals[t][1] for t in TASK_TYPES), 2)
+        overtime = round(rng.choice([0.0, 0.0, 0.0, 0.5, 1.0]), 2)
+        note = rng.choice(["", "", "", "Reviewed edge cases", "Tool downtime in the morning"])
+        submission = (submission_id, day.isoformat(), user, *columns, overtime, total_hours, note, user)
+        yield submission, entries
+
+def generate_dataset(path: str, rows: int = 10000, users: int = 50, batches: int = 20,
+                     days: int = 365, seed: int = 42, end_date: Optional[date] = None,
+                     password_ratio: float = 0.2) -> Dict[str, int]:
+    """Create (or replace) a SQLite database at ``path`` filled with synthetic data.
+
+    ``rows`` is the number of task_submissions; each one carries 1-9 task_entries.
+    A ``password_ratio`` share of users get a custom password in user_passwords.
+    Returns row counts per table.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+
+    adapter = DatabaseAdapter(sqlite_path=path)
+    # Synthetic data always targets the local SQLite file, loaded with its own
+    # journal settings below, so leave the file out of WAL mode here
+    adapter.is_postgres = False
+    adapter.sqlite_mode = "legacy"
+    adapter.create_tables()
+
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    user_list = user_names(users)
+    batch_list = batch_names(batches)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    cursor = conn.cursor()
+
+    cursor.executemany("INSERT INTO batch_options (name) VALUES (?)", [(b,) for b in batch_list])
+    cursor.executemany(
+        "INSERT INTO user_profiles (user_name, employee_code, team_function, active) VALUES (?, ?, ?, 1)",
+        [(u, f"E{10000 + i}", TEAM_FUNCTIONS[i % len(TEAM_FUNCTIONS)]) for i, u in enumerate(user_list)]
+    )
+    password_rows = []
+    for user in user_list[:int(users * password_ratio)]:
+        salt = "%032x" % rng.getrandbits(128)
+        # Same scheme as team_dashboard._hash_password
+        password_hash = hashlib.sha256(f"{salt}pw-{user}".encode("utf-8")).hexdigest()
+        password_rows.append((user, salt, password_hash))
+    cursor.executemany(
+        "INSERT INTO user_passwords (user_name, salt, password_hash) VALUES (?, ?, ?)",
+        password_rows
+    )
+
+    submission_sql = f"""
+    INSERT INTO task_submissions
+    (id, submission_date, user_names,
+     spatial_completed, spatial_hours, spatial_batches,
+     textual_completed, textual_hours, textual_batches,
+     qa_completed, qa_hours, qa_batches,
+     qc_completed, qc_hours, qc_batches,
+     automation_completed, automation_hours, automation_batches,
+     other_completed, other_hours, other_batches,
+     overtime_hours, total_hours, note, submitted_by)
+    VALUES ({", ".join(["?"] * 25)})
+    """
+    entry_sql = """
+    INSERT INTO task_entries
+    (submission_id, submission_date, user_name, task_type, batch, completed, hours)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+
+    entry_count = 0
+    submission_chunk, entry_chunk = [], []
+    for submission, entries in _generate_submissions(rng, rows, user_list, batch_list, days, end_date):
+        submission_chunk.append(submission)
+        entry_chunk.extend(entries)
+        if len(submission_chunk) >= CHUNK_SIZE:
+            cursor.executemany(submission_sql, submission_chunk)
+            cursor.executemany(entry_sql, entry_chunk)
+            entry_count += len(entry_chunk)
+            submission_chunk, entry_chunk = [], []
+    if submission_chunk:
+        cursor.executemany(submission_sql, submission_chunk)
+        cursor.executemany(entry_sql, entry_chunk)
+        entry_count += len(entry_chunk)
+
+    conn.commit()
+    conn.close()
+
+    return {
+        "task_submissions": rows,
+        "task_entries": entry_count,
+        "user_profiles": users,
+        "user_passwords": len(password_rows),
+        "batch_options": batches,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Team Dashboard SQLite database")
+    parser.add_argument("path", help="Output SQLite file (replaced if it exists)")
+    parser.add_argument("--rows", type=int, default=10000, help="Number of task_submissions")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365, help="History length in days")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    counts = generate_dataset(args.path, args.rows, args.users, args.batches, args.days, args.seed)
+    print(json.dumps(counts, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Bulk import of historical task entries for Team Dashboard
+Streams a CSV/XLSX of per-batch task entries, validates it in chunks, groups
+the rows into one submission per user and date and loads them in a single
+transaction (COPY on PostgreSQL, executemany on SQLite)
+
+Usage:
+    python bulk_import.py history.csv [--dry-run] [--replace-existing] [--rejects rejects.csv]
+
+--replace-existing deletes a user's existing submissions for an imported day
+(with their entries) and loads the file's rows instead, in one transaction
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import task_validation
+
+# Rows validated per chunk while streaming the file
+CHUNK_ROWS = 20000
+
+# Accepted header names per field (case-insensitive)
+COLUMN_ALIASES = {
+    "submission_date": ["submission_date", "date", "submission date", "work date"],
+    "user_name": ["user_name", "user", "user name", "name", "pm", "pm name"],
+    "task_type": ["task_type", "task type", "type", "task"],
+    "batch": ["batch", "batch name"],
+    "completed": ["completed", "count", "completed count"],
+    "hours": ["hours", "hour", "time"],
+    "note": ["note", "notes", "comment"],
+}
+REQUIRED_FIELDS = ["submission_date", "user_name", "task_type", "batch", "completed", "hours"]
+
+SUBMISSION_COLUMNS = ["submission_date", "user_names"]
+for _spec in task_validation.TASK_TYPES.values():
+    SUBMISSION_COLUMNS += [f"{_spec.key}_completed", f"{_spec.key}_hours", f"{_spec.key}_batches"]
+SUBMISSION_COLUMNS += ["overtime_hours", "total_hours", "note", "submitted_by"]
+
+# Completed counts stored as INTEGER (automation is a percentage, stored as REAL);
+# COPY does not cast "49.0" the way an INSERT parameter is cast
+INTEGER_COLUMNS = [f"{spec.key}_completed" for spec in task_validation.TASK_TYPES.values() if spec.key != "automation"]
+
+ENTRY_COLUMNS = ["submission_id", "submission_date", "user_name", "task_type", "batch", "completed", "hours"]
+
+class ImportResult:
+    """Outcome of a bulk import."""
+
+    def __init__(self):
+        self.rows_read = 0
+        self.entries = 0
+        self.submissions = 0
+        self.skipped_existing = 0
+        self.replaced_existing = 0
+        # Dates that received new submissions
+        self.dates: List[str] = []
+        self.rejected: List[pd.DataFrame] = []
+        self.seconds = 0.0
+
+    @property
+    def rejected_rows(self) -> pd.DataFrame:
+        if not self.rejected:
+            return pd.DataFrame(columns=["line", "error"])
+        return pd.concat(self.rejected, ignore_index=True)
+
+    def summary(self) -> Dict:
+        return {
+            "rows_read": self.rows_read,
+            "entries_loaded": self.entries,
+            "submissions_created": self.submissions,
+            "submissions_skipped_existing": self.skipped_existing,
+            "submissions_replaced_existing": self.replaced_existing,
+            "rows_rejected": int(sum(len(r) for r in self.rejected)),
+            "seconds": round(self.seconds, 3),
+        }
+
+def _map_columns(columns: List[str]) -> Dict[str, str]:
+    """Map file headers to field names; raises ValueError if a required field is missing."""
+    lookup = {str(c).strip().lower(): c for c in columns}
+    mapping = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lookup:
+                mapping[lookup[alias]] = field
+                break
+    missing = [f for f in REQUIRED_FIELDS if f not in mapping.values()]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    return mapping
+
+def _iter_excel(source, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h) if h is not None else "" for h in next(rows, [])]
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield pd.DataFrame(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
+
+def iter_chunks(source, filename: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield the file as DataFrames of at most ``chunk_rows`` rows with normalized column names."""
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        reader = _iter_excel(source, chunk_rows)
+    else:
+        reader = pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False)
+
+    line = 2  # first data line after the header
+    mapping = None
+    for chunk in reader:
+        if mapping is None:
+            mapping = _map_columns(list(chunk.columns))
+        chunk = chunk[list(mapping)].rename(columns=mapping)
+        chunk.insert(0, "line", np.arange(line, line + len(chunk)))
+        line += len(chunk)
+        yield chunk
+
+def validate_chunk(chunk: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Validate one chunk; returns (valid entries, rejected rows with an error column)."""
+    checked = task_validation.validate_entries(chunk)
+    # ISO dates only: guessing the format per value would read 05/02 as May 2nd in one row
+    # and February 5th in another
+    dates = pd.to_datetime(checked["submission_date"], errors="coerce", format="ISO8601")
+    users = checked["user_name"].astype("string").str.strip().fillna("")
+    checked["submission_date"] = dates.dt.strftime("%Y-%m-%d")
+    checked["user_name"] = users
+    checked.loc[(checked["error"] == "") & dates.isna(), "error"] = "invalid date (expected YYYY-MM-DD)"
+    checked.loc[(checked["error"] == "") & (users == ""), "error"] = "user is required"
+    if "note" not in checked.columns:
+        checked["note"] = ""
+    checked["note"] = checked["note"].astype("string").fillna("")
+
+    rejected = checked[(checked["error"] != "") & ~checked["blank"]]
+    valid = checked[(checked["error"] == "") & ~checked["blank"]]
+    return (
+        valid[["line", "submission_date", "user_name", "task_type", "batch", "completed", "hours", "note"]],
+        rejected[["line", "error"]].join(chunk.drop(columns=["line"]))
+    )
+
+def build_submissions(entries: pd.DataFrame, submitted_by: str) -> pd.DataFrame:
+    """One submission row per user and date with per-type totals and batch lists."""
+    keys = ["user_name", "submission_date"]
+    totals = entries.pivot_table(
+        index=keys, columns="task_type", values=["completed", "hours"], aggfunc="sum", fill_value=0.0
+    )
+    # Batch lists and notes in one pass over the rows; a per-group pandas agg is far slower
+    batch_lists: Dict[Tuple, List[str]] = {}
+    notes: Dict[Tuple, Dict[str, None]] = {}
+    for user, day, task_type, batch, note in zip(
+        entries["user_name"], entries["submission_date"], entries["task_type"], entries["batch"], entries["note"]
+    ):
+        batch_lists.setdefault((user, day, task_type), []).append(batch)
+        if note:
+            notes.setdefault((user, day), {})[note] = None
+
+    submissions = pd.DataFrame(index=totals.index)
+    for label, spec in task_validation.TASK_TYPES.items():
+        completed = totals[("completed", label)] if ("completed", label) in totals.columns else 0.0
+        hours = totals[("hours", label)] if ("hours", label) in totals.columns else 0.0
+        submissions[f"{spec.key}_completed"] = completed
+        submissions[f"{spec.key}_hours"] = hours
+        submissions[f"{spec.key}_batches"] = [
+            json.dumps(batch_lists.get((user, day, label), [])) for user, day in totals.index
+        ]
+    submissions["total_hours"] = sum(submissions[f"{s.key}_hours"] for s in task_validation.TASK_TYPES.values())
+    submissions["overtime_hours"] = 0.0
+    submissions["note"] = ["; ".join(notes.get(key, {})) for key in totals.index]
+    submissions["submitted_by"] = submitted_by
+    submissions = submissions.reset_index().rename(columns={"user_name": "user_names"})
+    return submissions
+
+def _existing_pairs(adapter, first: str, last: str) -> set:
+    placeholder = "%s" if adapter.is_postgres else "?"
+    existing = adapter.read_sql(
+        f"SELECT DISTINCT user_names, submission_date FROM task_submissions "
+        f"WHERE submission_date BETWEEN {placeholder} AND {placeholder}",
+        (first, last)
+    )
+    return {(u, str(d)[:10]) for u, d in zip(existing["user_names"], existing["submission_date"])}
+
+def _copy_rows(cursor, table: str, columns: List[str], rows: pd.DataFrame):
+    buffer = io.StringIO()
+    rows[columns].to_csv(buffer, index=False, header=False, quoting=csv.QUOTE_MINIMAL)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def _delete_existing(cursor, adapter, pairs: List[Tuple[str, str]]):
+    """Delete the submissions (and their entries) of the given (user, date) pairs."""
+    placeholder = "%s" if adapter.is_postgres else "?"
+    cursor.executemany(
+        f"DELETE FROM task_entries WHERE submission_id IN (SELECT id FROM task_submissions "
+        f"WHERE user_names = {placeholder} AND submission_date = {placeholder})",
+        pairs
+    )
+    cursor.executemany(
+        f"DELETE FROM task_submissions WHERE user_names = {placeholder} AND submission_date = {placeholder}",
+        pairs
+    )
+
+def load_submissions(adapter, submissions: pd.DataFrame, entries: pd.DataFrame,
+                     replace: Optional[List[Tuple[str, str]]] = None):
+    """Insert submissions and their entries in one transaction.
+
+    ``replace`` lists (user, date) pairs whose existing submissions are
+    deleted first, in the same transaction.
+    """
+    def _load(cursor):
+        count = len(submissions)
+        if adapter.is_postgres:
+            # Reserve ids up front so entries can reference them in the same COPY stream
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence('task_submissions', 'id')) FROM generate_series(1, %s)",
+                (count,)
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        else:
+            if not cursor.connection.in_transaction:
+                # Hold the write lock from reading the next id until the inserts commit
+                cursor.execute("BEGIN IMMEDIATE")
+            # AUTOINCREMENT never reuses an id, so continue after the highest one ever
+            # issued (sqlite_sequence), not the highest one still present
+            cursor.execute(
+                "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'task_submissions'), 0), "
+                "COALESCE((SELECT MAX(id) FROM task_submissions), 0))"
+            )
+            first_id = cursor.fetchone()[0] + 1
+            ids = list(range(first_id, first_id + count))
+        if replace:
+            _delete_existing(cursor, adapter, replace)
+
+        rows = submissions.assign(id=ids)
+        id_by_key = pd.Series(ids, index=pd.MultiIndex.from_frame(submissions[["user_names", "submission_date"]]))
+        entry_rows = entries.assign(
+            submission_id=id_by_key.reindex(pd.MultiIndex.from_frame(entries[["user_name", "submission_date"]])).to_numpy()
+        )
+
+        if adapter.is_postgres:
+            rows = rows.assign(**{column: rows[column].astype(float).round().astype("int64") for column in INTEGER_COLUMNS})
+            _copy_rows(cursor, "task_submissions", ["id"] + SUBMISSION_COLUMNS, rows)
+            _copy_rows(cursor, "task_entries", ENTRY_COLUMNS, entry_rows)
+        else:
+            columns = ["id"] + SUBMISSION_COLUMNS
+            cursor.executemany(
+                f"INSERT INTO task_submissions ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})",
+                rows[columns].itertuples(index=False, name=None)
+            )
+            cursor.executemany(
+                f"INSERT INTO task_entries ({', '.join(ENTRY_COLUMNS)}) VALUES ({', '.join(['?'] * len(ENTRY_COLUMNS))})",
+                entry_rows[ENTRY_COLUMNS].itertuples(index=False, name=None)
+            )
+    adapter.run_write(_load)
+
+def import_file(adapter, source, filename: str, submitted_by: str = "Bulk Import",
+                skip_existing: bool = True, max_total_hours: Optional[float] = task_validation.MAX_TOTAL_HOURS,
+                dry_run: bool = False, chunk_rows: int = CHUNK_ROWS, replace_existing: bool = False) -> ImportResult:
+    """Validate and load a CSV/XLSX of task entries.
+
+    ``source`` is a path or file-like object. Submissions that already exist
+    for a user and date are replaced when ``replace_existing`` is set, else
+    skipped when ``skip_existing`` is set; a day whose total hours exceed
+    ``max_total_hours`` is rejected as a whole.
+    """
+    started = time.perf_counter()
+    result = ImportResult()
+    valid_parts = []
+    for chunk in iter_chunks(source, filename, chunk_rows):
+        result.rows_read += len(chunk)
+        valid, rejected = validate_chunk(chunk)
+        valid_parts.append(valid)
+        if not rejected.empty:
+            result.rejected.append(rejected)
+
+    entries = pd.concat(valid_parts, ignore_index=True) if valid_parts else pd.DataFrame()
+    if not entries.empty:
+        submissions = build_submissions(entries, submitted_by)
+
+        # Day-level checks reject every entry of the user's day
+        day_error = pd.Series("", index=submissions.index, dtype=object)
+        duplicate = np.zeros(len(submissions), dtype=bool)
+        if skip_existing or replace_existing:
+            existing = _existing_pairs(adapter, entries["submission_date"].min(), entries["submission_date"].max())
+            duplicate = np.array(
+                [(u, d) in existing for u, d in zip(submissions["user_names"], submissions["submission_date"])],
+                dtype=bool
+            )
+        if skip_existing and not replace_existing:
+            result.skipped_existing = int(duplicate.sum())
+            day_error[duplicate] = "submission already exists"
+        if max_total_hours is not None:
+            over = (submissions["total_hours"] > max_total_hours) & (day_error == "")
+            day_error[over] = f"day total above {max_total_hours:g} hours"
+
+        rejected_days = day_error != ""
+        if rejected_days.any():
+            dropped = submissions.loc[rejected_days, ["user_names", "submission_date"]].assign(
+                error=day_error[rejected_days]
+            ).rename(columns={"user_names": "user_name"})
+            merged = entries.merge(dropped, on=["user_name", "submission_date"])
+            result.rejected.append(merged.drop(columns=["note"]))
+            submissions = submissions[~rejected_days]
+            duplicate = duplicate[~rejected_days.to_numpy()]
+            entries = entries.merge(
+                submissions[["user_names", "submission_date"]].rename(columns={"user_names": "user_name"}),
+                on=["user_name", "submission_date"]
+            )
+
+        replace = []
+        if replace_existing:
+            replace = list(zip(submissions["user_names"][duplicate], submissions["submission_date"][duplicate]))
+            result.replaced_existing = len(replace)
+        if not dry_run and not submissions.empty:
+            load_submissions(adapter, submissions.reset_index(drop=True), entries, replace=replace)
+            result.dates = sorted(submissions["submission_date"].unique())
+        result.submissions = len(submissions)
+        result.entries = len(entries)
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import historical task entries (CSV or XLSX)")
+    parser.add_argument("file", help="CSV/XLSX with date (YYYY-MM-DD), user, task type, batch, completed and hours columns")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, do not write")
+    parser.add_argument("--replace-existing", action="store_true",
+                        help="Replace the user's existing submissions for imported days instead of skipping those days")
+    parser.add_argument("--max-hours", type=float, default=task_validation.MAX_TOTAL_HOURS,
+                        help="Reject days above this many hours (0 disables the check)")
+    parser.add_argument("--submitted-by", default="Bulk Import")
+    parser.add_argument("--rejects", help="Write rejected rows to this CSV")
+    args = parser.parse_args()
+
+    from database_adapter import db_adapter
+
+    db_adapter.create_tables()
+    with open(args.file, "rb") as source:
+        result = import_file(
+            db_adapter, source, os.path.basename(args.file),
+            submitted_by=args.submitted_by,
+            replace_existing=args.replace_existing,
+            max_total_hours=args.max_hours or None,
+            dry_run=args.dry_run,
+        )
+
+    if result.dates:
+        # The dashboard caches past days across processes; show the imported days there now
+        import anomaly_detection
+        import history_data
+        import materialized_views
+
+        history_data.invalidate_days(result.dates)
+        anomaly_detection.invalidate(result.dates)
+        if db_adapter.is_postgres and db_adapter.pg_matviews:
+            materialized_views.refresh_views(db_adapter)
+
+    for key, value in result.summary().items():
+        print(f"{key:30s} {value}")
+    if args.rejects and result.rejected:
+        result.rejected_rows.to_csv(args.rejects, index=False)
+        print(f"Rejected rows written to {args.rejects}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Startup cache warm-up for Team Dashboard
+Preloads the caches behind the most used screens in a background thread,
+once per process, so the first visitor after a restart does not pay for the
+cold queries; the first render never waits for it
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+# Workers reuse the starting run's script context so Streamlit caches and session lookups work quietly
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    SCRIPT_CTX_AVAILABLE = True
+except Exception:
+    SCRIPT_CTX_AVAILABLE = False
+
+logger = logging.getLogger("team_dashboard.warmup")
+
+# Warm-up switch and parallelism (environment overrides)
+WARMUP_ENABLED = os.getenv("CACHE_WARMUP", "on").lower() not in ("off", "0", "false", "no")
+WARMUP_WORKERS = int(os.getenv("CACHE_WARMUP_WORKERS", "4"))
+
+class CacheWarmup:
+    """Runs named loaders in the background and keeps their timings."""
+
+    def __init__(self, tasks: Dict[str, Callable[[], object]], workers: int = WARMUP_WORKERS):
+        self.tasks = tasks
+        self.workers = workers
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._thread = None
+        self._ctx = None
+
+    def start(self):
+        self.started_at = time.time()
+        self._ctx = get_script_run_ctx() if SCRIPT_CTX_AVAILABLE else None
+        self._thread = threading.Thread(target=self._run, name="cache-warmup", daemon=True)
+        self._thread.start()
+
+    def _attach_ctx(self):
+        if self._ctx is not None:
+            add_script_run_ctx(ctx=self._ctx)
+
+    def _run_task(self, name: str, func: Callable[[], object]):
+        started = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            self.errors[name] = str(e)
+            logger.warning("Cache warm-up of %s failed: %s", name, e)
+        self.timings[name] = time.perf_counter() - started
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="warmup",
+                                initializer=self._attach_ctx) as executor:
+            for name, func in self.tasks.items():
+                executor.submit(self._run_task, name, func)
+        self.finished_at = time.time()
+        logger.info("Cache warm-up finished in %.2f s (%d loaders, %d failed)",
+                    self.finished_at - self.started_at, len(self.tasks), len(self.errors))
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def status(self) -> Dict:
+        end = self.finished_at or time.time()
+        return {
+            "done": self.done,
+            "elapsed_s": end - self.started_at if self.started_at else 0.0,
+            "timings": dict(self.timings),
+            "errors": dict(self.errors),
+            "pending": [name for name in self.tasks if name not in self.timings],
+        }
+
+_warmup: Optional[CacheWarmup] = None
+_warmup_lock = threading.Lock()
+
+def start_once(tasks: Callable[[], Dict[str, Callable[[], object]]]) -> Optional[CacheWarmup]:
+    """Start the process-wide warm-up on first call; ``tasks()`` builds the loader map lazily."""
+    global _warmup
+    if not WARMUP_ENABLED:
+        return None
+    if _warmup is None:
+        with _warmup_lock:
+            if _warmup is None:
+                _warmup = CacheWarmup(tasks())
+                _warmup.start()
+    return _warmup
+
+def active_warmup() -> Optional[CacheWarmup]:
+    return _warmup
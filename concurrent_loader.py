@@ -0,0 +1,67 @@
+"""
+Concurrent data loading for Team Dashboard
+Fetches the independent datasets a page needs in parallel, one connection each
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import tracing
+
+# Try to import Streamlit so worker threads can render messages and use caches
+try:
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    SCRIPT_CTX_AVAILABLE = True
+except Exception:
+    SCRIPT_CTX_AVAILABLE = False
+
+# Upper bound on parallel queries for a single page
+MAX_WORKERS = 8
+
+def _attach_script_ctx(ctx, trace, depth):
+    """Attach the calling page's script context and trace to a worker thread"""
+    if SCRIPT_CTX_AVAILABLE and ctx is not None:
+        add_script_run_ctx(ctx=ctx)
+    tracing.activate(trace, depth)
+
+def _timed_call(func: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def load_concurrently(loaders: Dict[str, Callable[[], Any]], page: Optional[str] = None) -> Dict[str, Any]:
+    """Run independent loaders in parallel and return their results by name.
+
+    Each loader is a zero-argument callable (use a lambda or functools.partial
+    for parameters). Per-loader timings in seconds are kept in
+    ``st.session_state.preload_timings[page]`` when a page name is given.
+    The first loader error is re-raised, as a sequential call would.
+    """
+    if not loaders:
+        return {}
+
+    ctx = get_script_run_ctx() if SCRIPT_CTX_AVAILABLE else None
+    started = time.perf_counter()
+    results = {}
+    timings = {}
+
+    if len(loaders) == 1:
+        name, func = next(iter(loaders.items()))
+        results[name], timings[name] = _timed_call(func)
+    else:
+        with tracing.span("preload", "preload"), ThreadPoolExecutor(
+            max_workers=min(len(loaders), MAX_WORKERS),
+            thread_name_prefix="preload",
+            initializer=_attach_script_ctx,
+            initargs=(ctx, tracing.current_trace(), tracing.current_depth()),
+        ) as executor:
+            futures = {name: executor.submit(_timed_call, func) for name, func in loaders.items()}
+            for name, future in futures.items():
+                results[name], timings[name] = future.result()
+
+    timings["total"] = time.perf_counter() - started
+    if page and ctx is not None:
+        st.session_state.setdefault("preload_timings", {})[page] = timings
+    return results
@@ -3,10 +3,18 @@ Database adapter for Team Dashboard
 Supports both SQLite (local) and PostgreSQL (cloud)
 """
 
+import itertools
+import logging
 import os
-import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import date
 import pandas as pd
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
+
+import materialized_views
+import query_registry
 
 # Try to import Streamlit for secrets access
 try:
@@ -23,10 +31,170 @@ try:
 except ImportError:
     POSTGRES_AVAILABLE = False
 
+from query_metrics import connect_sqlite, query_metrics, start_exporters_from_env
+from sqlite_writer import SQLiteWriter
+import partitioning
+
+if POSTGRES_AVAILABLE:
+    from query_metrics import InstrumentedPgConnection, connect_postgres
+
+logger = logging.getLogger("team_dashboard.database")
+
+# Replicas lagging more than this are skipped (REPLICA_MAX_LAG_S overrides)
+REPLICA_MAX_LAG_S = float(os.getenv("REPLICA_MAX_LAG_S", "30"))
+# How often a replica's lag is re-checked, and how long a failed replica is skipped
+REPLICA_CHECK_INTERVAL_S = 10.0
+REPLICA_RETRY_S = 30.0
+
+REPLICA_LAG_SQL = """
+SELECT CASE WHEN pg_is_in_recovery()
+            THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+            ELSE 0 END AS lag
+"""
+
+# Idle PostgreSQL connections kept per server, and how long one may sit idle (environment overrides)
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", "5"))
+PG_POOL_IDLE_S = float(os.getenv("PG_POOL_IDLE_S", "300"))
+# Idle connections older than this are checked with SELECT 1 before reuse (0 checks every reuse)
+PG_POOL_CHECK_S = float(os.getenv("PG_POOL_CHECK_S", "30"))
+
+if POSTGRES_AVAILABLE:
+    class PooledPgConnection(InstrumentedPgConnection):
+        """Connection whose close() hands it back to its pool while the pool has room"""
+
+        _pool = None
+        _dsn = None
+
+        def close(self):
+            if self._pool is not None and self._pool.release(self):
+                return
+            super().close()
+
+class PgConnectionPool:
+    """Reuses PostgreSQL connections per DSN, so sessions (and their prepared statements) survive close()"""
+
+    def __init__(self, size: int = PG_POOL_SIZE, idle_s: float = PG_POOL_IDLE_S, check_s: float = PG_POOL_CHECK_S):
+        self.size = size
+        self.idle_s = idle_s
+        self.check_s = check_s
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+        self._idle: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _alive(conn) -> bool:
+        """Round trip on a plain cursor (not in the query metrics); False once the server dropped it"""
+        try:
+            cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        conn._pool = None
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self, dsn: str, **kwargs):
+        started = time.perf_counter()
+        conn = None
+        while conn is None:
+            now = time.time()
+            candidate, idle_since, stale = None, 0.0, []
+            with self._lock:
+                idle = self._idle.get(dsn)
+                # Oldest connections sit on the left; drop the expired ones, then reuse the newest
+                while idle and now - idle[0][1] > self.idle_s:
+                    stale.append(idle.popleft()[0])
+                while idle and candidate is None:
+                    candidate, idle_since = idle.pop()
+                    if candidate.closed:
+                        stale.append(candidate)
+                        candidate = None
+            for old in stale:
+                self._discard(old)
+            if candidate is None:
+                break
+            # The server or a pooler may have dropped a connection that sat idle for a while
+            if now - idle_since >= self.check_s and not self._alive(candidate):
+                # Likely a restart or failover: the other idle connections are gone too
+                with self._lock:
+                    dead = [candidate] + [entry[0] for entry in self._idle.pop(dsn, ())]
+                    self.dropped += len(dead)
+                logger.info("Dropped %d pooled PostgreSQL connections closed by the server", len(dead))
+                for old in dead:
+                    self._discard(old)
+                continue
+            conn = candidate
+        with self._lock:
+            if conn is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if conn is not None:
+            query_metrics.record_acquire("postgres", time.perf_counter() - started)
+            return conn
+        conn = connect_postgres(dsn, connection_factory=PooledPgConnection, **kwargs)
+        conn._pool = self
+        conn._dsn = dsn
+        return conn
+
+    def release(self, conn) -> bool:
+        """Keep ``conn`` for reuse; False when it must really be closed"""
+        if conn.closed:
+            return False
+        try:
+            # Closing discards whatever the caller left uncommitted
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            conn.autocommit = True
+        except Exception:
+            return False
+        with self._lock:
+            idle = self._idle.setdefault(conn._dsn, deque())
+            if len(idle) >= self.size:
+                return False
+            idle.append((conn, time.time()))
+        return True
+
+    def close_idle(self):
+        """Close every idle connection (e.g. before dropping a database)"""
+        with self._lock:
+            idle = [entry[0] for conns in self._idle.values() for entry in conns]
+            self._idle.clear()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            idle = sum(len(conns) for conns in self._idle.values())
+        return {"size": self.size, "idle": idle, "hits": self.hits, "misses": self.misses, "dropped": self.dropped}
+
 class DatabaseAdapter:
-    def __init__(self):
+    def __init__(self, sqlite_path: Optional[str] = None):
         self.db_url = None
         
+        # Local SQLite file (SQLITE_DB_PATH overrides the default location)
+        self.sqlite_path = sqlite_path or os.getenv("SQLITE_DB_PATH", "team_dashboard.db")
+        
+        # SQLite concurrency: "legacy" (rollback journal, as before) or opt-in "wal"
+        # (WAL journal, busy timeout, serialized writer)
+        self.sqlite_mode = os.getenv("SQLITE_CONCURRENCY", "legacy").lower()
+        self.sqlite_busy_timeout_ms = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        self.sqlite_synchronous = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+        self._sqlite_writer = None
+        self._sqlite_wal_ready = False
+        self._sqlite_lock = threading.Lock()
+        
         # Try to get DATABASE_URL from Streamlit secrets (if available)
         if STREAMLIT_AVAILABLE:
             try:
@@ -40,6 +208,26 @@ class DatabaseAdapter:
         if not self.db_url:
             self.db_url = os.getenv("DATABASE_URL")
         
+        # Optional read replicas for read-only queries (DATABASE_READ_URL, comma-separated)
+        self.read_urls = self._load_read_urls()
+        self._replica_state: Dict[str, Dict] = {}
+        self._replica_turn = itertools.count()
+        
+        # PostgreSQL SSL mode (DATABASE_SSLMODE=disable for a local server)
+        self.sslmode = os.getenv("DATABASE_SSLMODE", "require")
+        
+        # Monthly partitioning of task_submissions / task_entries (PostgreSQL only)
+        self.pg_partitioning = os.getenv("PG_PARTITIONING", "off").lower() in ("1", "on", "true")
+        self._partitions_ensured_for = None
+        
+        # Materialized aggregate views for KPI and team totals (PostgreSQL only)
+        self.pg_matviews = os.getenv("PG_MATVIEWS", "on").lower() in ("1", "on", "true")
+        
+        # Registered hot statements; server-side prepared on PostgreSQL unless behind a
+        # transaction-mode pooler (Supabase port 6543), which cannot keep them per session
+        self.statements = query_registry.StatementRegistry()
+        self.pg_pool = PgConnectionPool() if PG_POOL_SIZE > 0 else None
+        
         # Test actual connection to determine database type
         self.is_postgres = False
         if self.db_url and POSTGRES_AVAILABLE:
@@ -48,7 +236,7 @@ class DatabaseAdapter:
                 test_conn = psycopg2.connect(
                     self.db_url,
                     connect_timeout=5,
-                    sslmode='require'
+                    sslmode=self.sslmode
                 )
                 test_conn.close()
                 self.is_postgres = True
@@ -56,6 +244,12 @@ class DatabaseAdapter:
                 # Connection failed, will use SQLite fallback
                 self.is_postgres = False
         
+        prepared_default = "off" if ":6543" in (self.db_url or "") else "on"
+        self.pg_prepared = (
+            self.pg_pool is not None
+            and os.getenv("PG_PREPARED_STATEMENTS", prepared_default).lower() in ("1", "on", "true")
+        )
+        
     def get_connection(self):
         """Get database connection based on environment"""
         if self.is_postgres:
@@ -70,11 +264,7 @@ class DatabaseAdapter:
                     raise ValueError("DATABASE_URL contains placeholder [YOUR-PASSWORD]. Please replace with actual password.")
                 
                 # Try to connect with additional error info
-                conn = psycopg2.connect(
-                    self.db_url,
-                    connect_timeout=10,
-                    sslmode='require'
-                )
+                conn = self._connect_postgres(self.db_url, connect_timeout=10)
                 conn.autocommit = True
                 return conn
             except psycopg2.OperationalError as e:
@@ -92,10 +282,138 @@ class DatabaseAdapter:
                 raise ValueError(f"Unexpected database connection error: {str(e)}")
         else:
             # Local SQLite
-            return sqlite3.connect('team_dashboard.db', check_same_thread=False)
+            return self._connect_sqlite()
+    
+    def _connect_postgres(self, dsn: str, connect_timeout: int):
+        if self.pg_pool is not None:
+            return self.pg_pool.acquire(dsn, connect_timeout=connect_timeout, sslmode=self.sslmode)
+        return connect_postgres(dsn, connect_timeout=connect_timeout, sslmode=self.sslmode)
+    
+    def _load_read_urls(self) -> List[str]:
+        value = None
+        if STREAMLIT_AVAILABLE:
+            try:
+                if "DATABASE_READ_URL" in st.secrets:
+                    value = st.secrets["DATABASE_READ_URL"]
+            except Exception:
+                pass
+        if not value:
+            value = os.getenv("DATABASE_READ_URL", "")
+        urls = value if isinstance(value, (list, tuple)) else value.split(",")
+        return [u.strip() for u in urls if u and u.strip()]
+    
+    def get_read_connection(self, prefer_primary: bool = False):
+        """Connection for read-only queries.
+        
+        Uses the next healthy read replica (round robin) whose replay lag is
+        within REPLICA_MAX_LAG_S, falling back to the primary when none is
+        usable, on SQLite, or when ``prefer_primary`` is set (read-your-writes).
+        """
+        if prefer_primary or not (self.is_postgres and self.read_urls):
+            return self.get_connection()
+        
+        first = next(self._replica_turn)
+        for offset in range(len(self.read_urls)):
+            url = self.read_urls[(first + offset) % len(self.read_urls)]
+            state = self._replica_state.get(url, {"checked_at": 0.0, "healthy": True, "lag_s": None})
+            now = time.time()
+            if not state["healthy"] and now - state["checked_at"] < REPLICA_RETRY_S:
+                continue
+            try:
+                conn = self._connect_postgres(url, connect_timeout=3)
+                conn.autocommit = True
+                if not state["healthy"] or now - state["checked_at"] >= REPLICA_CHECK_INTERVAL_S:
+                    cursor = conn.cursor()
+                    cursor.execute(REPLICA_LAG_SQL)
+                    lag = float(cursor.fetchone()[0])
+                    state = {"checked_at": now, "healthy": lag <= REPLICA_MAX_LAG_S, "lag_s": lag, "error": None}
+                    self._replica_state[url] = state
+                    if not state["healthy"]:
+                        logger.warning("Read replica lagging %.1f s, using another source", lag)
+                        conn.close()
+                        continue
+                return conn
+            except Exception as e:
+                self._replica_state[url] = {"checked_at": now, "healthy": False, "lag_s": None, "error": str(e)}
+                logger.warning("Read replica unavailable, using another source: %s", e)
+        
+        return self.get_connection()
+    
+    def replica_status(self) -> List[Dict]:
+        """Last known health of each read replica (host only, no credentials)"""
+        status = []
+        for url in self.read_urls:
+            state = self._replica_state.get(url, {})
+            host = url.split("@")[-1].split("?")[0]
+            status.append({
+                "replica": host,
+                "healthy": state.get("healthy"),
+                "lag_s": state.get("lag_s"),
+                "error": state.get("error"),
+            })
+        return status
+    
+    @property
+    def uses_sqlite_writer(self) -> bool:
+        return not self.is_postgres and self.sqlite_mode == "wal"
+    
+    def _connect_sqlite(self, **kwargs):
+        """Open a SQLite connection, applying the concurrency pragmas in WAL mode"""
+        conn = connect_sqlite(
+            self.sqlite_path,
+            check_same_thread=False,
+            timeout=self.sqlite_busy_timeout_ms / 1000,
+            **kwargs
+        )
+        if self.sqlite_mode == "wal":
+            if not self._sqlite_wal_ready:
+                # journal_mode is persistent in the file, so set it once per process
+                with self._sqlite_lock:
+                    if not self._sqlite_wal_ready:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        self._sqlite_wal_ready = True
+            conn.execute(f"PRAGMA busy_timeout = {self.sqlite_busy_timeout_ms}")
+            conn.execute(f"PRAGMA synchronous = {self.sqlite_synchronous}")
+        # Enforce ON DELETE CASCADE from task_submissions to task_entries
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+    
+    def run_write(self, job: Callable[[Any], Any]) -> Any:
+        """Run ``job(cursor)`` as a write and return its result.
+        
+        On SQLite in WAL mode the job is queued to the single writer thread,
+        which commits concurrent jobs together; otherwise it runs in one
+        transaction on a fresh connection.
+        """
+        if self.uses_sqlite_writer:
+            if self._sqlite_writer is None:
+                with self._sqlite_lock:
+                    if self._sqlite_writer is None:
+                        self._sqlite_writer = SQLiteWriter(lambda: self._connect_sqlite(isolation_level=None))
+            return self._sqlite_writer.submit(job)
+        
+        conn = self.get_connection()
+        try:
+            if self.is_postgres:
+                # Run the whole job in one transaction
+                conn.autocommit = False
+            result = job(conn.cursor())
+            conn.commit()
+            return result
+        finally:
+            conn.close()
+    
+    def sqlite_writer_stats(self) -> Optional[dict]:
+        return self._sqlite_writer.stats() if self._sqlite_writer else None
     
     def execute_sql(self, sql: str, params: tuple = (), fetch: bool = False):
         """Execute SQL with proper connection handling"""
+        if not fetch and self.uses_sqlite_writer:
+            def _execute(cursor):
+                cursor.execute(sql, params)
+                return cursor.rowcount
+            return self.run_write(_execute)
+        
         conn = self.get_connection()
         
         try:
@@ -115,9 +433,72 @@ class DatabaseAdapter:
         finally:
             conn.close()
     
-    def read_sql(self, query: str, params: tuple = ()) -> pd.DataFrame:
-        """Read SQL query into DataFrame"""
-        conn = self.get_connection()
+    def statement(self, name: str, sql: str, postgres_sql: Optional[str] = None) -> query_registry.Statement:
+        """Register a hot statement, written once with ``?`` placeholders"""
+        return self.statements.register(name, sql, postgres_sql)
+    
+    def _prepare(self, cursor, statement: query_registry.Statement):
+        """PREPARE ``statement`` once per PostgreSQL session"""
+        conn = cursor.connection
+        prepared = getattr(conn, "_prepared_statements", None)
+        if prepared is None:
+            prepared = conn._prepared_statements = set()
+        if statement.name not in prepared:
+            cursor.execute(statement.prepare_text)
+            prepared.add(statement.name)
+            statement.prepares += 1
+    
+    def run(self, cursor, statement: query_registry.Statement, params: tuple = ()):
+        """Execute a registered statement on ``cursor`` and return the cursor"""
+        with query_registry.timed(statement):
+            if not self.is_postgres:
+                cursor.execute(statement.sqlite_text, params)
+            elif not self.pg_prepared:
+                cursor.execute(statement.postgres_text, params)
+            else:
+                self._prepare(cursor, statement)
+                try:
+                    cursor.execute(statement.execute_text, params)
+                except psycopg2.Error as e:
+                    # "cached plan must not change result type": the table changed under a
+                    # SELECT *; outside a transaction, prepare again and retry once
+                    if e.pgcode != "0A000" or not cursor.connection.autocommit:
+                        raise
+                    cursor.execute(f"DEALLOCATE {statement.prepared_name}")
+                    cursor.connection._prepared_statements.discard(statement.name)
+                    self._prepare(cursor, statement)
+                    cursor.execute(statement.execute_text, params)
+        return cursor
+    
+    def run_many(self, cursor, statement: query_registry.Statement, rows: List[tuple]):
+        """Execute a registered statement once per row of ``rows``"""
+        with query_registry.timed(statement, calls=len(rows)):
+            if not self.is_postgres:
+                cursor.executemany(statement.sqlite_text, rows)
+            elif not self.pg_prepared:
+                cursor.executemany(statement.postgres_text, rows)
+            else:
+                self._prepare(cursor, statement)
+                cursor.executemany(statement.execute_text, rows)
+        return cursor
+    
+    def query_df(self, statement: query_registry.Statement, params: tuple = (),
+                 conn=None, replica: bool = False) -> pd.DataFrame:
+        """Run a registered SELECT into a DataFrame, on ``conn`` or a connection of its own"""
+        own = conn is None
+        if own:
+            conn = self.get_read_connection() if replica else self.get_connection()
+        try:
+            cursor = self.run(conn.cursor(), statement, params)
+            columns = [column[0] for column in cursor.description]
+            return pd.DataFrame.from_records(cursor.fetchall(), columns=columns, coerce_float=True)
+        finally:
+            if own:
+                conn.close()
+    
+    def read_sql(self, query: str, params: tuple = (), replica: bool = False) -> pd.DataFrame:
+        """Read SQL query into DataFrame (from a read replica when ``replica`` is set)"""
+        conn = self.get_read_connection() if replica else self.get_connection()
         try:
             return pd.read_sql_query(query, conn, params=params)
         finally:
@@ -128,37 +509,59 @@ class DatabaseAdapter:
         
         if self.is_postgres:
             # PostgreSQL syntax
-            tables = [
-                """
-                CREATE TABLE IF NOT EXISTS task_submissions (
-                    id SERIAL PRIMARY KEY,
-                    submission_date DATE NOT NULL,
-                    user_names TEXT NOT NULL,
-                    spatial_completed INTEGER DEFAULT 0,
-                    spatial_hours REAL DEFAULT 0.0,
-                    spatial_batches TEXT,
-                    textual_completed INTEGER DEFAULT 0,
-                    textual_hours REAL DEFAULT 0.0,
-                    textual_batches TEXT,
-                    qa_completed INTEGER DEFAULT 0,
-                    qa_hours REAL DEFAULT 0.0,
-                    qa_batches TEXT,
-                    qc_completed INTEGER DEFAULT 0,
-                    qc_hours REAL DEFAULT 0.0,
-                    qc_batches TEXT,
-                    automation_completed REAL DEFAULT 0.0,
-                    automation_hours REAL DEFAULT 0.0,
-                    automation_batches TEXT,
-                    other_completed INTEGER DEFAULT 0,
-                    other_hours REAL DEFAULT 0.0,
-                    other_batches TEXT,
-                    overtime_hours REAL DEFAULT 0.0,
-                    total_hours REAL DEFAULT 0.0,
-                    note TEXT,
-                    submitted_by TEXT,
-                    submit_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """,
+            if self.pg_partitioning:
+                # Monthly range partitions on submission_date
+                history_tables = list(partitioning.PARTITIONED_DDL)
+            else:
+                history_tables = [
+                    """
+                    CREATE TABLE IF NOT EXISTS task_submissions (
+                        id SERIAL PRIMARY KEY,
+                        submission_date DATE NOT NULL,
+                        user_names TEXT NOT NULL,
+                        spatial_completed INTEGER DEFAULT 0,
+                        spatial_hours REAL DEFAULT 0.0,
+                        spatial_batches TEXT,
+                        textual_completed INTEGER DEFAULT 0,
+                        textual_hours REAL DEFAULT 0.0,
+                        textual_batches TEXT,
+                        qa_completed INTEGER DEFAULT 0,
+                        qa_hours REAL DEFAULT 0.0,
+                        qa_batches TEXT,
+                        qc_completed INTEGER DEFAULT 0,
+                        qc_hours REAL DEFAULT 0.0,
+                        qc_batches TEXT,
+                        automation_completed REAL DEFAULT 0.0,
+                        automation_hours REAL DEFAULT 0.0,
+                        automation_batches TEXT,
+                        other_completed INTEGER DEFAULT 0,
+                        other_hours REAL DEFAULT 0.0,
+                        other_batches TEXT,
+                        overtime_hours REAL DEFAULT 0.0,
+                        total_hours REAL DEFAULT 0.0,
+                        note TEXT,
+                        submitted_by TEXT,
+                        submit_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                    """,
+                    """
+                    CREATE TABLE IF NOT EXISTS task_entries (
+                        id SERIAL PRIMARY KEY,
+                        submission_id INTEGER NOT NULL,
+                        submission_date DATE NOT NULL,
+                        user_name TEXT NOT NULL,
+                        task_type TEXT NOT NULL,
+                        batch TEXT NOT NULL,
+                        completed REAL DEFAULT 0,
+                        hours REAL DEFAULT 0.0,
+                        CONSTRAINT fk_submission
+                            FOREIGN KEY(submission_id)
+                            REFERENCES task_submissions(id)
+                            ON DELETE CASCADE
+                    )
+                    """
+                ]
+            tables = history_tables + [
                 """
                 CREATE TABLE IF NOT EXISTS app_settings (
                     id INTEGER PRIMARY KEY DEFAULT 1,
@@ -179,22 +582,6 @@ class DatabaseAdapter:
                 )
                 """,
                 """
-                CREATE TABLE IF NOT EXISTS task_entries (
-                    id SERIAL PRIMARY KEY,
-                    submission_id INTEGER NOT NULL,
-                    submission_date DATE NOT NULL,
-                    user_name TEXT NOT NULL,
-                    task_type TEXT NOT NULL,
-                    batch TEXT NOT NULL,
-                    completed REAL DEFAULT 0,
-                    hours REAL DEFAULT 0.0,
-                    CONSTRAINT fk_submission
-                        FOREIGN KEY(submission_id)
-                        REFERENCES task_submissions(id)
-                        ON DELETE CASCADE
-                )
-                """,
-                """
                 CREATE TABLE IF NOT EXISTS user_passwords (
                     id SERIAL PRIMARY KEY,
                     user_name TEXT NOT NULL UNIQUE,
@@ -208,6 +595,9 @@ class DatabaseAdapter:
                 CREATE INDEX IF NOT EXISTS idx_user_passwords_name ON user_passwords(user_name)
                 """,
                 """
+                CREATE INDEX IF NOT EXISTS idx_task_entries_submission ON task_entries(submission_id)
+                """,
+                """
                 CREATE TABLE IF NOT EXISTS user_profiles (
                     id SERIAL PRIMARY KEY,
                     user_name TEXT NOT NULL UNIQUE,
@@ -223,6 +613,24 @@ class DatabaseAdapter:
                 """,
                 """
                 CREATE INDEX IF NOT EXISTS idx_user_profiles_active ON user_profiles(active)
+                """,
+                # Team-scoped reads: team -> members -> their submissions and entries by date
+                """
+                CREATE INDEX IF NOT EXISTS idx_user_profiles_team ON user_profiles(team_function, user_name)
+                """,
+                """
+                CREATE INDEX IF NOT EXISTS idx_task_submissions_user_date ON task_submissions(user_names, submission_date)
+                """,
+                """
+                CREATE INDEX IF NOT EXISTS idx_task_entries_user_date ON task_entries(user_name, submission_date)
+                """,
+                # Idempotency key of submissions replayed from the write-behind journal
+                """
+                ALTER TABLE task_submissions ADD COLUMN IF NOT EXISTS idempotency_key TEXT
+                """,
+                """
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_task_submissions_idempotency
+                    ON task_submissions(idempotency_key, submission_date)
                 """
             ]
         else:
@@ -303,6 +711,9 @@ class DatabaseAdapter:
                 CREATE INDEX IF NOT EXISTS idx_user_passwords_name ON user_passwords(user_name)
                 """,
                 """
+                CREATE INDEX IF NOT EXISTS idx_task_entries_submission ON task_entries(submission_id)
+                """,
+                """
                 CREATE TABLE IF NOT EXISTS user_profiles (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     user_name TEXT NOT NULL UNIQUE,
@@ -318,6 +729,16 @@ class DatabaseAdapter:
                 """,
                 """
                 CREATE INDEX IF NOT EXISTS idx_user_profiles_active ON user_profiles(active)
+                """,
+                # Team-scoped reads: team -> members -> their submissions and entries by date
+                """
+                CREATE INDEX IF NOT EXISTS idx_user_profiles_team ON user_profiles(team_function, user_name)
+                """,
+                """
+                CREATE INDEX IF NOT EXISTS idx_task_submissions_user_date ON task_submissions(user_names, submission_date)
+                """,
+                """
+                CREATE INDEX IF NOT EXISTS idx_task_entries_user_date ON task_entries(user_name, submission_date)
                 """
             ]
         
@@ -334,6 +755,28 @@ class DatabaseAdapter:
             self.execute_sql(
                 "INSERT OR IGNORE INTO app_settings (id, spatial_target, textual_target) VALUES (1, 0, 0)"
             )
+        
+        if self.is_postgres and self.pg_partitioning:
+            self.ensure_partitions()
+        
+        if self.is_postgres and self.pg_matviews:
+            materialized_views.create_views(self)
+    
+    def ensure_partitions(self):
+        """Create the monthly partitions needed now and for the coming months (once per month)"""
+        month = date.today().replace(day=1)
+        if self._partitions_ensured_for == month:
+            return
+        if not partitioning.is_partitioned(self):
+            logger.warning("PG_PARTITIONING is on but task_submissions is not a partitioned table; "
+                           "migrate the existing table to enable partitioning")
+            self._partitions_ensured_for = month
+            return
+        partitioning.ensure_partitions(self)
+        self._partitions_ensured_for = month
 
 # Global instance
-db_adapter = DatabaseAdapter()
\ No newline at end of file
+db_adapter = DatabaseAdapter()
+
+# Expose query metrics over HTTP / textfile when METRICS_PORT / METRICS_FILE are set
+start_exporters_from_env()
\ No newline at end of file
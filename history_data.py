@@ -0,0 +1,142 @@
+"""
+Submission history readers shared by the dashboard and the JSON API
+Date-range queries over the day-bucketed range cache, plus a data version
+that changes whenever submissions are written, in any process on the host
+"""
+
+import logging
+import os
+import time
+import uuid
+from typing import Iterable, Optional
+
+import pandas as pd
+
+import range_cache
+import shared_cache
+from database_adapter import REPLICA_MAX_LAG_S, db_adapter
+
+logger = logging.getLogger("team_dashboard.history")
+
+_VERSION_KEY = "meta:data_version"
+_VERSION_TTL = 30 * 24 * 3600
+_LAST_WRITE_KEY = "meta:last_write_at"
+
+# After any write, reads stay on the primary this long (READ_YOUR_WRITES_SECONDS overrides);
+# never shorter than the replica lag accepted, so a cache refill cannot store older rows
+READ_YOUR_WRITES_SECONDS = max(float(os.getenv("READ_YOUR_WRITES_SECONDS", "30")), REPLICA_MAX_LAG_S)
+
+def mark_write():
+    """Record that the store was written, for every process sharing the cache"""
+    try:
+        shared_cache.get_backend().set(_LAST_WRITE_KEY, repr(time.time()).encode("ascii"), _VERSION_TTL)
+    except Exception as e:
+        logger.warning("Failed to record last write: %s", e)
+
+def written_recently() -> bool:
+    """Whether any process wrote within READ_YOUR_WRITES_SECONDS (True when unknown)"""
+    try:
+        value = shared_cache.get_backend().get(_LAST_WRITE_KEY)
+    except Exception:
+        return True
+    return value is not None and time.time() - float(value) < READ_YOUR_WRITES_SECONDS
+
+def read_connection(prefer_primary: bool = False):
+    """Connection for cached reads: a replica, unless anything was written recently.
+
+    Cached results are shared by every session, so the session that wrote
+    is not the only one that must avoid a lagging replica: any refill after
+    an invalidation has to see the write.
+    """
+    if not prefer_primary and db_adapter.is_postgres and db_adapter.read_urls:
+        prefer_primary = written_recently()
+    return db_adapter.get_read_connection(prefer_primary=prefer_primary)
+
+SUBMISSIONS_IN_RANGE = db_adapter.statement("submissions_in_range", """
+    SELECT * FROM task_submissions
+    WHERE submission_date BETWEEN ? AND ?
+    ORDER BY submission_date DESC
+""")
+
+TASK_ENTRIES_IN_RANGE = db_adapter.statement("task_entries_in_range", """
+    SELECT submission_date, user_name, task_type, batch, completed, hours
+    FROM task_entries
+    WHERE submission_date BETWEEN ? AND ?
+""")
+
+# Team-scoped variants: the team filter runs in the database, through user_profiles
+# (team_function, user_name) and the (user, submission_date) indexes
+TEAM_MEMBERS = "SELECT user_name FROM user_profiles WHERE team_function = ?"
+
+TEAM_SUBMISSIONS_IN_RANGE = db_adapter.statement("team_submissions_in_range", f"""
+    SELECT * FROM task_submissions
+    WHERE submission_date BETWEEN ? AND ?
+    AND user_names IN ({TEAM_MEMBERS})
+    ORDER BY submission_date DESC
+""")
+
+TEAM_TASK_ENTRIES_IN_RANGE = db_adapter.statement("team_task_entries_in_range", f"""
+    SELECT submission_date, user_name, task_type, batch, completed, hours
+    FROM task_entries
+    WHERE submission_date BETWEEN ? AND ?
+    AND user_name IN ({TEAM_MEMBERS})
+""")
+
+def _read_range(statement, params: tuple) -> pd.DataFrame:
+    conn = read_connection()
+    try:
+        return db_adapter.query_df(statement, params, conn=conn)
+    finally:
+        conn.close()
+
+def _fetch_submissions(start_date, end_date, team: Optional[str] = None) -> pd.DataFrame:
+    """Submissions dated within [start_date, end_date] (of one team's members), newest day first"""
+    if team is None:
+        return _read_range(SUBMISSIONS_IN_RANGE, (start_date, end_date))
+    return _read_range(TEAM_SUBMISSIONS_IN_RANGE, (start_date, end_date, team))
+
+def _fetch_task_entries(start_date, end_date, team: Optional[str] = None) -> pd.DataFrame:
+    """Task entries dated within [start_date, end_date] (of one team's members)"""
+    if team is None:
+        return _read_range(TASK_ENTRIES_IN_RANGE, (start_date, end_date))
+    return _read_range(TEAM_TASK_ENTRIES_IN_RANGE, (start_date, end_date, team))
+
+# Cached per day: any window is assembled from cached days plus the missing ones
+submissions_range_cache = range_cache.RangeCache("get_submissions_in_range", _fetch_submissions, descending=True)
+entries_range_cache = range_cache.RangeCache("get_task_entries_in_range", _fetch_task_entries)
+
+def submissions_in_range(start_date, end_date, team: Optional[str] = None) -> pd.DataFrame:
+    return submissions_range_cache.get(start_date, end_date, scope=team)
+
+def task_entries_in_range(start_date, end_date, team: Optional[str] = None) -> pd.DataFrame:
+    return entries_range_cache.get(start_date, end_date, scope=team)
+
+def data_version() -> str:
+    """Opaque token that changes after every write to the submission history"""
+    backend = shared_cache.get_backend()
+    value = backend.get(_VERSION_KEY)
+    if value is None:
+        # Unknown (first use or evicted): start a new version so nothing stale is confirmed
+        return bump_data_version()
+    return value.decode("ascii")
+
+def bump_data_version() -> str:
+    version = uuid.uuid4().hex
+    shared_cache.get_backend().set(_VERSION_KEY, version.encode("ascii"), _VERSION_TTL)
+    return version
+
+def invalidate_days(days: Optional[Iterable] = None):
+    """Drop cached history for ``days`` (every day when None) and move the data version on."""
+    # Before dropping anything, so refills read the primary
+    mark_write()
+    try:
+        if days is None:
+            submissions_range_cache.clear()
+            entries_range_cache.clear()
+        else:
+            days = list(days)
+            submissions_range_cache.invalidate(days)
+            entries_range_cache.invalidate(days)
+        bump_data_version()
+    except Exception as e:
+        logger.error("Failed to invalidate cached history: %s", e)
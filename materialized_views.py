@@ -0,0 +1,191 @@
+"""
+Materialized aggregate views for Team Dashboard on PostgreSQL
+Daily team totals, per-user daily totals and per-batch daily totals are kept
+in materialized views refreshed concurrently in the background, so KPI and
+team tables read a few aggregate rows instead of every submission
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+import task_validation
+
+logger = logging.getLogger("team_dashboard.matviews")
+
+# Debounce after a write and the periodic refresh interval, seconds (environment overrides)
+REFRESH_DELAY = float(os.getenv("MATVIEW_REFRESH_DELAY", "5"))
+REFRESH_INTERVAL = float(os.getenv("MATVIEW_REFRESH_INTERVAL", "300"))
+
+_TYPE_KEYS = [spec.key for spec in task_validation.TASK_TYPES.values()]
+_TYPE_SUMS = ",\n        ".join(
+    f"SUM({key}_completed) AS {key}_completed, SUM({key}_hours) AS {key}_hours" for key in _TYPE_KEYS
+)
+
+# name -> (definition, unique index columns); REFRESH ... CONCURRENTLY needs the unique index
+VIEWS: Dict[str, tuple] = {
+    "mv_daily_totals": (f"""
+        SELECT submission_date,
+        COUNT(*) AS submissions,
+        COUNT(DISTINCT user_names) AS users,
+        {_TYPE_SUMS},
+        SUM(overtime_hours) AS overtime_hours,
+        SUM(total_hours) AS total_hours
+        FROM task_submissions
+        GROUP BY submission_date
+    """, "submission_date"),
+    "mv_user_daily_totals": (f"""
+        SELECT submission_date, user_names,
+        COUNT(*) AS submissions,
+        {_TYPE_SUMS},
+        SUM(overtime_hours) AS overtime_hours,
+        SUM(total_hours) AS total_hours
+        FROM task_submissions
+        GROUP BY submission_date, user_names
+    """, "submission_date, user_names"),
+    "mv_batch_daily_totals": ("""
+        SELECT submission_date, task_type, COALESCE(batch, '') AS batch,
+        COUNT(*) AS entries,
+        COUNT(DISTINCT user_name) AS users,
+        SUM(completed) AS completed,
+        SUM(hours) AS hours
+        FROM task_entries
+        GROUP BY submission_date, task_type, COALESCE(batch, '')
+    """, "submission_date, task_type, batch"),
+}
+
+def create_views(adapter):
+    """Create the views and their unique indexes if missing (PostgreSQL only)."""
+    for name, (definition, unique_columns) in VIEWS.items():
+        adapter.execute_sql(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {name} AS {definition}")
+        adapter.execute_sql(f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_key ON {name} ({unique_columns})")
+
+def refresh_views(adapter, concurrently: bool = True):
+    """Refresh every view; CONCURRENTLY keeps them readable while refreshing."""
+    mode = "CONCURRENTLY " if concurrently else ""
+    for name in VIEWS:
+        adapter.execute_sql(f"REFRESH MATERIALIZED VIEW {mode}{name}")
+
+class ViewRefresher:
+    """Background thread refreshing the views shortly after writes and periodically."""
+
+    def __init__(self, adapter, delay: float = REFRESH_DELAY, interval: float = REFRESH_INTERVAL):
+        self.adapter = adapter
+        self.delay = delay
+        self.interval = interval
+        self._dirty_since: Optional[float] = None
+        self._wake = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self.last_refresh_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.refreshes = 0
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="matview-refresher", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        if self._dirty_since is None:
+            self._dirty_since = time.time()
+        self._wake.set()
+
+    def _due(self) -> bool:
+        now = time.time()
+        if self._dirty_since is not None and now - self._dirty_since >= self.delay:
+            return True
+        # The views are populated when created, so the first periodic refresh waits a full interval
+        return now - (self.last_refresh_at or self._started_at) >= self.interval
+
+    def _run(self):
+        while True:
+            self._wake.wait(min(self.delay, self.interval))
+            self._wake.clear()
+            if self._due():
+                self.refresh_now()
+
+    def refresh_now(self):
+        """Refresh the views immediately (one refresh at a time per process)."""
+        with self._refresh_lock:
+            dirty_since = self._dirty_since
+            self._dirty_since = None
+            started = time.perf_counter()
+            try:
+                refresh_views(self.adapter)
+                self.last_error = None
+                self.refreshes += 1
+            except Exception as e:
+                self.last_error = str(e)
+                # Retry on the next pass
+                self._dirty_since = dirty_since or time.time()
+                logger.warning("Materialized view refresh failed: %s", e)
+            self.last_duration = time.perf_counter() - started
+            self.last_refresh_at = time.time()
+
+    def stats(self) -> Dict:
+        return {
+            "refreshes": self.refreshes,
+            "last_refresh_age_s": time.time() - self.last_refresh_at if self.last_refresh_at else None,
+            "last_duration_s": self.last_duration,
+            "pending": self._dirty_since is not None,
+            "last_error": self.last_error,
+        }
+
+_refresher: Optional[ViewRefresher] = None
+_refresher_lock = threading.Lock()
+
+def get_refresher(adapter) -> ViewRefresher:
+    """Return the process-wide refresher, starting it on first use."""
+    global _refresher
+    if _refresher is None:
+        with _refresher_lock:
+            if _refresher is None:
+                _refresher = ViewRefresher(adapter)
+    return _refresher
+
+def active_refresher() -> Optional[ViewRefresher]:
+    return _refresher
+
+def _read_range(adapter, view: str, columns: str, start_date, end_date, group_by: str = "") -> pd.DataFrame:
+    """Rows of ``view`` dated within [start_date, end_date]; a None bound is open"""
+    conditions, params = [], []
+    if start_date is not None:
+        conditions.append("submission_date >= %s")
+        params.append(start_date)
+    if end_date is not None:
+        conditions.append("submission_date <= %s")
+        params.append(end_date)
+    query = f"SELECT {columns} FROM {view}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if group_by:
+        query += f" GROUP BY {group_by}"
+    return adapter.read_sql(query, tuple(params), replica=True)
+
+def daily_totals(adapter, start_date=None, end_date=None) -> pd.DataFrame:
+    """One row per day: submissions, users, per-type completed/hours, total hours."""
+    return _read_range(adapter, "mv_daily_totals", "*", start_date, end_date).sort_values("submission_date")
+
+def user_totals(adapter, start_date=None, end_date=None) -> pd.DataFrame:
+    """One row per user over the range, with the same columns as a per-user groupby of submissions."""
+    sums = ", ".join(f"SUM({key}_completed) AS {key}_completed, SUM({key}_hours) AS {key}_hours" for key in _TYPE_KEYS)
+    return _read_range(
+        adapter, "mv_user_daily_totals",
+        f"user_names, SUM(submissions) AS submissions, {sums}, "
+        "SUM(overtime_hours) AS overtime_hours, SUM(total_hours) AS total_hours",
+        start_date, end_date, group_by="user_names"
+    )
+
+def batch_totals(adapter, start_date=None, end_date=None) -> pd.DataFrame:
+    """One row per task type and batch over the range."""
+    return _read_range(
+        adapter, "mv_batch_daily_totals",
+        "task_type, batch, SUM(entries) AS entries, SUM(completed) AS completed, SUM(hours) AS hours",
+        start_date, end_date, group_by="task_type, batch"
+    )
+
+def view_names() -> List[str]:
+    return list(VIEWS)
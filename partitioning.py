@@ -0,0 +1,178 @@
+"""
+Monthly range partitioning for Team Dashboard on PostgreSQL
+task_submissions and task_entries are partitioned by submission_date, one
+partition per month plus a default partition for anything not yet covered
+"""
+
+import logging
+import os
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger("team_dashboard.partitioning")
+
+# Tables partitioned by submission_date
+PARTITIONED_TABLES = ("task_submissions", "task_entries")
+
+# Future months created ahead of time (PG_PARTITION_MONTHS_AHEAD overrides)
+MONTHS_AHEAD = int(os.getenv("PG_PARTITION_MONTHS_AHEAD", "3"))
+
+_PARTITION_NAME = re.compile(r"^(?P<table>task_submissions|task_entries)_p(?P<year>\d{4})(?P<month>\d{2})$")
+
+# Partitioned variants of the two history tables. The primary key must include
+# the partition key, so task_entries cannot keep its foreign key to
+# task_submissions(id); both tables are purged month by month together instead.
+PARTITIONED_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS task_submissions (
+        id SERIAL,
+        submission_date DATE NOT NULL,
+        user_names TEXT NOT NULL,
+        spatial_completed INTEGER DEFAULT 0,
+        spatial_hours REAL DEFAULT 0.0,
+        spatial_batches TEXT,
+        textual_completed INTEGER DEFAULT 0,
+        textual_hours REAL DEFAULT 0.0,
+        textual_batches TEXT,
+        qa_completed INTEGER DEFAULT 0,
+        qa_hours REAL DEFAULT 0.0,
+        qa_batches TEXT,
+        qc_completed INTEGER DEFAULT 0,
+        qc_hours REAL DEFAULT 0.0,
+        qc_batches TEXT,
+        automation_completed REAL DEFAULT 0.0,
+        automation_hours REAL DEFAULT 0.0,
+        automation_batches TEXT,
+        other_completed INTEGER DEFAULT 0,
+        other_hours REAL DEFAULT 0.0,
+        other_batches TEXT,
+        overtime_hours REAL DEFAULT 0.0,
+        total_hours REAL DEFAULT 0.0,
+        note TEXT,
+        submitted_by TEXT,
+        submit_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, submission_date)
+    ) PARTITION BY RANGE (submission_date)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task_submissions_default PARTITION OF task_submissions DEFAULT
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task_entries (
+        id SERIAL,
+        submission_id INTEGER NOT NULL,
+        submission_date DATE NOT NULL,
+        user_name TEXT NOT NULL,
+        task_type TEXT NOT NULL,
+        batch TEXT NOT NULL,
+        completed REAL DEFAULT 0,
+        hours REAL DEFAULT 0.0,
+        PRIMARY KEY (id, submission_date)
+    ) PARTITION BY RANGE (submission_date)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task_entries_default PARTITION OF task_entries DEFAULT
+    """,
+]
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+def is_partitioned(adapter, table: str = "task_submissions") -> bool:
+    rows = adapter.execute_sql(
+        "SELECT relkind FROM pg_class WHERE relname = %s AND relkind IN ('r', 'p')",
+        (table,),
+        fetch=True
+    )
+    return bool(rows) and rows[0]["relkind"] == "p"
+
+def list_partitions(adapter, table: str) -> List[Tuple[str, date]]:
+    """Monthly partitions of ``table`` as (name, first day of month), oldest first."""
+    rows = adapter.execute_sql(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s",
+        (table,),
+        fetch=True
+    )
+    partitions = []
+    for row in rows:
+        match = _PARTITION_NAME.match(row["relname"])
+        if match and match.group("table") == table:
+            partitions.append((row["relname"], date(int(match.group("year")), int(match.group("month")), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+def _create_month(adapter, table: str, month: date):
+    """Create one monthly partition, moving matching rows out of the default partition.
+
+    A partition cannot be attached while the default partition holds rows in
+    its range, so the rows are moved into the new table first, in one
+    transaction.
+    """
+    name = partition_name(table, month)
+    lower, upper = month.isoformat(), _add_months(month, 1).isoformat()
+
+    def _create(cursor):
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {table}_default "
+            f"WHERE submission_date >= %s AND submission_date < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            (lower, upper)
+        )
+        cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", (lower, upper))
+    adapter.run_write(_create)
+
+def ensure_partitions(adapter, months_ahead: int = MONTHS_AHEAD, today: Optional[date] = None) -> List[str]:
+    """Create monthly partitions from the oldest row in the default partition
+    up to ``months_ahead`` months after the current one. Returns new partition names."""
+    current = _month_start(today or date.today())
+    first, last = current, _add_months(current, months_ahead)
+    # Cover the same months in both tables so a month is always dropped as a pair
+    for table in PARTITIONED_TABLES:
+        bounds = adapter.execute_sql(
+            f"SELECT MIN(submission_date) AS lo, MAX(submission_date) AS hi FROM {table}_default",
+            fetch=True
+        )[0]
+        if bounds["lo"]:
+            first = min(first, _month_start(bounds["lo"]))
+            last = max(last, _month_start(bounds["hi"]))
+
+    created = []
+    for table in PARTITIONED_TABLES:
+        existing = {month for _, month in list_partitions(adapter, table)}
+        month = first
+        while month <= last:
+            if month not in existing:
+                _create_month(adapter, table, month)
+                created.append(partition_name(table, month))
+            month = _add_months(month, 1)
+    if created:
+        logger.info("Created partitions: %s", ", ".join(created))
+    return created
+
+def partitions_before(adapter, cutoff: date) -> List[Tuple[date, List[str]]]:
+    """Months lying entirely before ``cutoff``, with their partition names (entries first)."""
+    months = {}
+    for table in reversed(PARTITIONED_TABLES):
+        for name, month in list_partitions(adapter, table):
+            if _add_months(month, 1) <= cutoff:
+                months.setdefault(month, []).append(name)
+    return sorted(months.items())
+
+def drop_partition(adapter, name: str):
+    """Detach a monthly partition from its table and drop it."""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        raise ValueError(f"Not a monthly partition: {name}")
+    adapter.execute_sql(f"ALTER TABLE {match.group('table')} DETACH PARTITION {name}")
+    adapter.execute_sql(f"DROP TABLE {name}")
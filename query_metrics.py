@@ -0,0 +1,454 @@
+"""
+Query instrumentation for Team Dashboard
+Times every database call, keeps rolling per-statement histograms and a
+slow-query log, and exports a snapshot in Prometheus text format.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Try to import PostgreSQL driver
+try:
+    import psycopg2
+    import psycopg2.extensions
+    import psycopg2.extras
+    POSTGRES_AVAILABLE = True
+except ImportError:
+    POSTGRES_AVAILABLE = False
+
+# Queries slower than this are written to the slow-query log (SLOW_QUERY_MS overrides)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+
+# Histogram bucket upper bounds in seconds
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Durations kept per statement for rolling percentiles
+RECENT_SAMPLES = 500
+
+slow_query_logger = logging.getLogger("team_dashboard.slow_queries")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\$\d+|(?<![:\w]):[A-Za-z_]\w*")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and replace literals/placeholders with ``?``."""
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _IN_LIST.sub("(...)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+class TimingStats:
+    """Counters, cumulative histogram and rolling samples for one series."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.bucket_counts = [0] * len(HISTOGRAM_BUCKETS)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds: float):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.recent.append(seconds)
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def as_dict(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": self.total_seconds * 1000,
+            "mean_ms": self.total_seconds / self.calls * 1000 if self.calls else 0.0,
+            "p50_ms": self.quantile(0.50) * 1000,
+            "p95_ms": self.quantile(0.95) * 1000,
+            "p99_ms": self.quantile(0.99) * 1000,
+            "max_ms": self.max_seconds * 1000,
+        }
+
+class QueryMetrics:
+    """Process-wide registry of query, connection and slow-query metrics."""
+
+    def __init__(self, slow_threshold_ms: float = SLOW_QUERY_MS):
+        self.slow_threshold_ms = slow_threshold_ms
+        # Reentrant: a leaked connection's __del__ can run (via GC) while this thread holds the lock
+        self._lock = threading.RLock()
+        self._listeners: List[Callable] = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.statements: Dict[Tuple[str, str], TimingStats] = {}
+            self.acquire: Dict[str, TimingStats] = {}
+            self.open_connections: Dict[str, int] = {}
+            self.peak_connections: Dict[str, int] = {}
+            self.slow_queries = deque(maxlen=200)
+            self.slow_query_count = 0
+
+    def add_listener(self, callback: Callable):
+        """Call ``callback(backend, sql, seconds, rows, error)`` after every recorded query."""
+        self._listeners.append(callback)
+
+    def record_acquire(self, backend: str, seconds: float):
+        """Record the time taken to open a connection."""
+        with self._lock:
+            self.acquire.setdefault(backend, TimingStats()).observe(seconds)
+
+    def connection_opened(self, backend: str):
+        with self._lock:
+            count = self.open_connections.get(backend, 0) + 1
+            self.open_connections[backend] = count
+            self.peak_connections[backend] = max(self.peak_connections.get(backend, 0), count)
+
+    def connection_closed(self, backend: str):
+        with self._lock:
+            self.open_connections[backend] = max(0, self.open_connections.get(backend, 0) - 1)
+
+    def record_query(self, backend: str, sql: str, seconds: float, rows: int = 0,
+                     acquire_seconds: float = 0.0, error: bool = False) -> Tuple[str, str]:
+        """Record one executed statement and return its series key."""
+        return self.record_execution(backend, sql, seconds, rows, acquire_seconds, error)[0]
+
+    def record_execution(self, backend: str, sql: str, seconds: float, rows: int = 0,
+                         acquire_seconds: float = 0.0, error: bool = False) -> Tuple[Tuple[str, str], Optional[Dict]]:
+        """Like record_query, also returning the slow-query entry (None when not slow).
+
+        ``rows`` < 0 means unknown at execution time (a result set counted as it is fetched).
+        """
+        key = (backend, normalize_sql(sql))
+        entry = None
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = TimingStats()
+            stats.observe(seconds)
+            stats.rows += max(rows, 0)
+            if error:
+                stats.errors += 1
+            is_slow = seconds * 1000 >= self.slow_threshold_ms
+            if is_slow:
+                self.slow_query_count += 1
+                entry = {
+                    "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "backend": backend,
+                    "sql": key[1],
+                    "duration_ms": round(seconds * 1000, 2),
+                    "rows": rows if rows >= 0 else None,
+                    "acquire_ms": round(acquire_seconds * 1000, 2),
+                    "error": error,
+                }
+                self.slow_queries.append(entry)
+        if is_slow:
+            slow_query_logger.warning(
+                "slow query %.1f ms (%s, rows=%s, acquire %.1f ms): %s",
+                seconds * 1000, backend, rows if rows >= 0 else "?", acquire_seconds * 1000, key[1]
+            )
+        for callback in self._listeners:
+            callback(backend, key[1], seconds, rows, error)
+        return key, entry
+
+    def add_rows(self, key: Tuple[str, str], rows: int, slow_entry: Optional[Dict] = None):
+        """Add rows fetched after execution to a statement's row count (and its slow-query entry)."""
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is not None:
+                stats.rows += rows
+            if slow_entry is not None:
+                slow_entry["rows"] = (slow_entry["rows"] or 0) + rows
+
+    def snapshot(self) -> Dict:
+        """Return a JSON-serializable copy of all metrics."""
+        with self._lock:
+            return {
+                "slow_threshold_ms": self.slow_threshold_ms,
+                "statements": [
+                    {"backend": backend, "sql": sql, **stats.as_dict()}
+                    for (backend, sql), stats in self.statements.items()
+                ],
+                "connection_acquire": {backend: stats.as_dict() for backend, stats in self.acquire.items()},
+                "open_connections": dict(self.open_connections),
+                "peak_connections": dict(self.peak_connections),
+                "slow_query_count": self.slow_query_count,
+                "slow_queries": list(self.slow_queries),
+            }
+
+    def render_prometheus(self) -> str:
+        """Render the current metrics in Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def histogram(name: str, help_text: str, series: List[Tuple[str, TimingStats]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, stats in series:
+                cumulative = 0
+                for bound, count in zip(HISTOGRAM_BUCKETS, stats.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {stats.calls}')
+                lines.append(f"{name}_sum{{{labels}}} {stats.total_seconds:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {stats.calls}")
+
+        with self._lock:
+            statement_series = [
+                (f'backend="{backend}",query="{_escape_label(sql[:160])}"', stats)
+                for (backend, sql), stats in sorted(self.statements.items())
+            ]
+            acquire_series = [(f'backend="{backend}"', stats) for backend, stats in sorted(self.acquire.items())]
+
+            histogram("dashboard_db_query_duration_seconds", "Database statement execution time.", statement_series)
+            lines.append("# HELP dashboard_db_query_rows_total Rows returned or affected per statement.")
+            lines.append("# TYPE dashboard_db_query_rows_total counter")
+            for labels, stats in statement_series:
+                lines.append(f"dashboard_db_query_rows_total{{{labels}}} {stats.rows}")
+            lines.append("# HELP dashboard_db_query_errors_total Failed executions per statement.")
+            lines.append("# TYPE dashboard_db_query_errors_total counter")
+            for labels, stats in statement_series:
+                lines.append(f"dashboard_db_query_errors_total{{{labels}}} {stats.errors}")
+
+            histogram("dashboard_db_connection_acquire_seconds", "Time to open a database connection.", acquire_series)
+            lines.append("# HELP dashboard_db_connections_open Currently open database connections.")
+            lines.append("# TYPE dashboard_db_connections_open gauge")
+            for backend, count in sorted(self.open_connections.items()):
+                lines.append(f'dashboard_db_connections_open{{backend="{backend}"}} {count}')
+            lines.append("# HELP dashboard_db_connections_open_peak Peak concurrently open connections.")
+            lines.append("# TYPE dashboard_db_connections_open_peak gauge")
+            for backend, count in sorted(self.peak_connections.items()):
+                lines.append(f'dashboard_db_connections_open_peak{{backend="{backend}"}} {count}')
+            lines.append("# HELP dashboard_db_slow_queries_total Statements slower than the slow-query threshold.")
+            lines.append("# TYPE dashboard_db_slow_queries_total counter")
+            lines.append(f"dashboard_db_slow_queries_total {self.slow_query_count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Atomically write the Prometheus snapshot to ``path``."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+# Global instance
+query_metrics = QueryMetrics()
+
+# ========================================
+# Instrumented connections and cursors
+# ========================================
+
+class _InstrumentedCursorMixin:
+    """Times execute/executemany and counts fetched rows."""
+
+    _backend = "sqlite"
+    _metrics_key = None
+    _slow_entry = None
+
+    def _acquire_seconds(self) -> float:
+        return getattr(self.connection, "acquire_seconds", 0.0)
+
+    def _timed(self, method, sql, *args):
+        started = time.perf_counter()
+        try:
+            result = method(sql, *args)
+        except Exception:
+            query_metrics.record_query(
+                self._backend, str(sql), time.perf_counter() - started,
+                acquire_seconds=self._acquire_seconds(), error=True
+            )
+            raise
+        # Statements returning rows are counted as they are fetched; rowcount (which
+        # psycopg2 also sets for a SELECT) only counts the rows a write affected
+        if self.description is None:
+            rows = self.rowcount if self.rowcount is not None else -1
+        else:
+            rows = -1
+        self._metrics_key, self._slow_entry = query_metrics.record_execution(
+            self._backend, str(sql), time.perf_counter() - started,
+            rows=rows, acquire_seconds=self._acquire_seconds()
+        )
+        return result
+
+    def execute(self, sql, *args):
+        return self._timed(super().execute, sql, *args)
+
+    def executemany(self, sql, *args):
+        return self._timed(super().executemany, sql, *args)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None and self._metrics_key:
+            query_metrics.add_rows(self._metrics_key, 1, self._slow_entry)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        if self._metrics_key:
+            query_metrics.add_rows(self._metrics_key, len(rows), self._slow_entry)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if self._metrics_key:
+            query_metrics.add_rows(self._metrics_key, len(rows), self._slow_entry)
+        return rows
+
+class _TrackedConnectionMixin:
+    """Keeps the open-connection gauge in step with close()."""
+
+    _backend = "sqlite"
+    acquire_seconds = 0.0
+    _tracked = False
+
+    def _track_open(self, acquire_seconds: float):
+        self.acquire_seconds = acquire_seconds
+        self._tracked = True
+        query_metrics.connection_opened(self._backend)
+
+    def _track_close(self):
+        if self._tracked:
+            self._tracked = False
+            query_metrics.connection_closed(self._backend)
+
+    def close(self):
+        self._track_close()
+        super().close()
+
+    def __del__(self):
+        self._track_close()
+
+class InstrumentedSQLiteCursor(_InstrumentedCursorMixin, sqlite3.Cursor):
+    _backend = "sqlite"
+
+class InstrumentedSQLiteConnection(_TrackedConnectionMixin, sqlite3.Connection):
+    _backend = "sqlite"
+
+    def cursor(self, factory=InstrumentedSQLiteCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection shortcuts bypass cursor(), so route them explicitly
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+def connect_sqlite(path: str, **kwargs) -> sqlite3.Connection:
+    """Open an instrumented SQLite connection."""
+    started = time.perf_counter()
+    conn = sqlite3.connect(path, factory=InstrumentedSQLiteConnection, **kwargs)
+    acquire_seconds = time.perf_counter() - started
+    query_metrics.record_acquire("sqlite", acquire_seconds)
+    conn._track_open(acquire_seconds)
+    return conn
+
+if POSTGRES_AVAILABLE:
+    class InstrumentedPgCursor(_InstrumentedCursorMixin, psycopg2.extensions.cursor):
+        _backend = "postgres"
+
+    class InstrumentedRealDictCursor(_InstrumentedCursorMixin, psycopg2.extras.RealDictCursor):
+        _backend = "postgres"
+
+    class InstrumentedPgConnection(_TrackedConnectionMixin, psycopg2.extensions.connection):
+        _backend = "postgres"
+
+        def cursor(self, *args, **kwargs):
+            # Keep explicitly requested RealDictCursor instrumented as well
+            if kwargs.get("cursor_factory") is psycopg2.extras.RealDictCursor:
+                kwargs["cursor_factory"] = InstrumentedRealDictCursor
+            return super().cursor(*args, **kwargs)
+
+    def connect_postgres(dsn: str, **kwargs):
+        """Open an instrumented PostgreSQL connection."""
+        started = time.perf_counter()
+        kwargs.setdefault("connection_factory", InstrumentedPgConnection)
+        conn = psycopg2.connect(dsn, cursor_factory=InstrumentedPgCursor, **kwargs)
+        acquire_seconds = time.perf_counter() - started
+        query_metrics.record_acquire("postgres", acquire_seconds)
+        conn._track_open(acquire_seconds)
+        return conn
+
+# ========================================
+# Exporters
+# ========================================
+
+_exporters_lock = threading.Lock()
+_exporters_started = False
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = query_metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics in Prometheus text format from a background thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+def start_metrics_file_writer(path: str, interval_seconds: float = 15.0) -> threading.Thread:
+    """Rewrite a Prometheus textfile snapshot every ``interval_seconds``."""
+    def _loop():
+        while True:
+            try:
+                query_metrics.write_prometheus(path)
+            except Exception as e:
+                slow_query_logger.error("Failed to write metrics file %s: %s", path, e)
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=_loop, name="metrics-file-writer", daemon=True)
+    thread.start()
+    return thread
+
+def start_exporters_from_env():
+    """Start exporters configured by METRICS_PORT / METRICS_FILE (once per process)."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    port = os.getenv("METRICS_PORT")
+    if port:
+        try:
+            start_metrics_server(int(port))
+        except Exception as e:
+            slow_query_logger.error("Failed to start metrics server on port %s: %s", port, e)
+
+    path = os.getenv("METRICS_FILE")
+    if path:
+        start_metrics_file_writer(path, float(os.getenv("METRICS_FILE_INTERVAL", "15")))
@@ -0,0 +1,93 @@
+"""
+Statement registry for Team Dashboard
+Hot statements are defined once with ``?`` placeholders and translated once
+per dialect. On PostgreSQL they run as server-side prepared statements (one
+PREPARE per pooled connection, then EXECUTE); on SQLite the unchanged text
+hits the connection's statement cache. Per-statement call counts and timings
+are kept for System Settings
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+_QMARK = re.compile(r"\?")
+_NAME = re.compile(r"^[a-z][a-z0-9_]*$")
+
+class Statement:
+    """One registered statement; ``postgres_sql`` overrides the text on PostgreSQL."""
+
+    def __init__(self, name: str, sql: str, postgres_sql: Optional[str] = None):
+        if not _NAME.match(name):
+            raise ValueError(f"Invalid statement name: {name!r}")
+        self.name = name
+        self.sql = sql
+        self.postgres_sql = postgres_sql or sql
+        self.prepared_name = f"td_{name}"
+        self.params = self.postgres_sql.count("?")
+        # Dialect texts, translated once
+        self.sqlite_text = sql
+        self.postgres_text = _QMARK.sub("%s", self.postgres_sql)
+        counter = iter(range(1, self.params + 1))
+        self.prepare_text = f"PREPARE {self.prepared_name} AS " + _QMARK.sub(lambda _: f"${next(counter)}", self.postgres_sql)
+        self.execute_text = (
+            f"EXECUTE {self.prepared_name} ({', '.join(['%s'] * self.params)})" if self.params
+            else f"EXECUTE {self.prepared_name}"
+        )
+        self.calls = 0
+        self.errors = 0
+        self.prepares = 0
+        self.total_seconds = 0.0
+
+    def observe(self, seconds: float, calls: int = 1, failed: bool = False):
+        self.calls += calls
+        self.total_seconds += seconds
+        if failed:
+            self.errors += 1
+
+class StatementRegistry:
+    """Statements by name; registering the same name twice must give the same SQL."""
+
+    def __init__(self):
+        self._statements: Dict[str, Statement] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, sql: str, postgres_sql: Optional[str] = None) -> Statement:
+        with self._lock:
+            existing = self._statements.get(name)
+            if existing is not None:
+                if existing.sql != sql or existing.postgres_sql != (postgres_sql or sql):
+                    raise ValueError(f"Statement {name!r} is already registered with different SQL")
+                return existing
+            statement = Statement(name, sql, postgres_sql)
+            self._statements[name] = statement
+            return statement
+
+    def get(self, name: str) -> Statement:
+        return self._statements[name]
+
+    def stats(self) -> List[Dict]:
+        rows = []
+        for statement in list(self._statements.values()):
+            rows.append({
+                "statement": statement.name,
+                "calls": statement.calls,
+                "errors": statement.errors,
+                "prepares": statement.prepares,
+                "mean_ms": statement.total_seconds / statement.calls * 1000 if statement.calls else 0.0,
+                "total_s": statement.total_seconds,
+            })
+        return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+@contextmanager
+def timed(statement: Statement, calls: int = 1):
+    """Add one execution's duration to a statement's stats."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        statement.observe(time.perf_counter() - started, calls, failed=True)
+        raise
+    statement.observe(time.perf_counter() - started, calls)
@@ -0,0 +1,133 @@
+"""
+Day-bucketed range cache for Team Dashboard
+Date-range queries are cached one day per entry in the shared cache backend;
+a requested range is assembled from cached days and only the missing days
+are read from the database, in as few contiguous queries as possible
+"""
+
+import logging
+import os
+import pickle
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+import shared_cache
+import tracing
+
+logger = logging.getLogger("team_dashboard.range_cache")
+
+# Lifetime of past days vs. today and later (environment overrides); writes made
+# without invalidate() (e.g. manual SQL) show up after at most HISTORY_TTL
+HISTORY_TTL = float(os.getenv("RANGE_CACHE_HISTORY_TTL", str(24 * 3600)))
+TODAY_TTL = float(os.getenv("RANGE_CACHE_TODAY_TTL", "300"))
+
+# Days fetched per query when a gap is long
+MAX_FETCH_DAYS = 366
+
+def _as_date(value) -> date:
+    return pd.Timestamp(value).date()
+
+def _runs(days: List[date]) -> List[Tuple[date, date]]:
+    """Group sorted days into contiguous (first, last) runs of at most MAX_FETCH_DAYS."""
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] == timedelta(days=1) and (day - runs[-1][0]).days < MAX_FETCH_DAYS:
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+class RangeCache:
+    """Caches ``fetch(start, end)`` results per day of ``date_column``.
+
+    ``fetch`` must return every row dated within [start, end] (inclusive)
+    and raise on failure, so errors are never cached. Past days live for
+    HISTORY_TTL and are only refreshed through invalidate(); today and
+    later days expire after TODAY_TTL. A ``scope`` (e.g. a team) is passed
+    on to ``fetch(start, end, scope)`` and cached in buckets of its own,
+    which invalidate() drops together with the unscoped bucket of the day.
+    """
+
+    def __init__(self, name: str, fetch: Callable[[date, date], pd.DataFrame],
+                 date_column: str = "submission_date", descending: bool = False):
+        self.name = name
+        self.fetch = fetch
+        self.date_column = date_column
+        self.descending = descending
+        self.prefix = f"range:{name}:"
+
+    def _key(self, day: date, scope: Optional[str] = None) -> str:
+        # Day first, so clearing the day's prefix reaches every scope
+        key = f"{self.prefix}{day.isoformat()}"
+        return f"{key}|{scope}" if scope is not None else key
+
+    def _fetch(self, start: date, end: date, scope: Optional[str]) -> pd.DataFrame:
+        return self.fetch(start, end) if scope is None else self.fetch(start, end, scope)
+
+    def get(self, start_date, end_date, scope: Optional[str] = None) -> pd.DataFrame:
+        start, end = _as_date(start_date), _as_date(end_date)
+        if end < start:
+            return self._fetch(start, end, scope)
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+        with tracing.span(self.name, "cache", days=len(days)) as current:
+            backend = shared_cache.get_backend()
+            try:
+                payloads = backend.get_many([self._key(day, scope) for day in days])
+            except Exception as e:
+                logger.warning("Range cache read failed for %s: %s", self.name, e)
+                payloads = {}
+            buckets: Dict[date, pd.DataFrame] = {}
+            for day in days:
+                payload = payloads.get(self._key(day, scope))
+                if payload is not None:
+                    buckets[day] = pickle.loads(payload)
+
+            missing = [day for day in days if day not in buckets]
+            for first, last in _runs(missing):
+                buckets.update(self._load(backend, first, last, scope))
+            if current is not None:
+                current.cache_hit = not missing
+                current.attrs["fetched_days"] = len(missing)
+
+        ordered = reversed(days) if self.descending else days
+        frames = [buckets[day] for day in ordered if not buckets[day].empty]
+        if not frames:
+            # Keep the columns of the query even when nothing matched
+            return buckets[days[0]].iloc[0:0].copy()
+        return pd.concat(frames, ignore_index=True)
+
+    def _load(self, backend, first: date, last: date, scope: Optional[str]) -> Dict[date, pd.DataFrame]:
+        """Fetch one run of days from the database and store each day as its own bucket."""
+        df = self._fetch(first, last, scope)
+        day_keys = pd.to_datetime(df[self.date_column]).dt.date if not df.empty else pd.Series(dtype=object)
+        groups = {day: part.reset_index(drop=True) for day, part in df.groupby(day_keys, sort=False)}
+        empty = df.iloc[0:0]
+        today = date.today()
+
+        buckets = {}
+        day = first
+        while day <= last:
+            buckets[day] = groups.get(day, empty)
+            day += timedelta(days=1)
+
+        try:
+            backend.set_many([
+                (self._key(day, scope), pickle.dumps(bucket, protocol=pickle.HIGHEST_PROTOCOL),
+                 TODAY_TTL if day >= today else HISTORY_TTL)
+                for day, bucket in buckets.items()
+            ])
+        except Exception as e:
+            logger.warning("Range cache write failed for %s: %s", self.name, e)
+        return buckets
+
+    def invalidate(self, days: Iterable):
+        """Drop the buckets of the given days (any date-like values)."""
+        backend = shared_cache.get_backend()
+        for day in {_as_date(d) for d in days if d is not None}:
+            backend.clear(self._key(day))
+
+    def clear(self):
+        shared_cache.get_backend().clear(self.prefix)
@@ -0,0 +1,196 @@
+"""
+Retention engine for Team Dashboard
+Archives old submissions and their task entries to compressed Parquet files,
+then purges them in bounded batches so neither table is locked for long
+"""
+
+import os
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+import partitioning
+
+# Parquet needs pyarrow (installed with Streamlit); fall back to gzipped CSV
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Archive location and batch tuning (environment overrides)
+ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR", "archive")
+BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+BATCH_PAUSE = float(os.getenv("RETENTION_BATCH_PAUSE", "0.05"))
+
+# progress(done, total) with counts of task_submissions rows
+ProgressCallback = Callable[[int, int], None]
+
+class ArchiveWriter:
+    """Writes each purged batch as numbered part files under one run directory."""
+
+    def __init__(self, base_dir: str = ARCHIVE_DIR, label: str = "purge"):
+        self.directory = os.path.join(base_dir, f"{label}-{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.parts = 0
+        self.files: List[str] = []
+
+    def write(self, table: str, df: pd.DataFrame):
+        if df.empty:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(self.directory, f"{table}-part-{self.parts:05d}")
+        if PARQUET_AVAILABLE:
+            path = f"{stem}.parquet"
+            df.to_parquet(path, index=False, compression="zstd")
+        else:
+            path = f"{stem}.csv.gz"
+            df.to_csv(path, index=False, compression="gzip")
+        self.files.append(path)
+
+    def next_part(self):
+        self.parts += 1
+
+def _placeholder(adapter) -> str:
+    return "%s" if adapter.is_postgres else "?"
+
+def _in_clause(adapter, values: List) -> str:
+    return ", ".join([_placeholder(adapter)] * len(values))
+
+def _delete_ids(adapter, submission_ids: List[int], entry_ids: List[int]):
+    """Delete one batch of entries and submissions in a single transaction."""
+    def _delete(cursor):
+        if entry_ids:
+            cursor.execute(f"DELETE FROM task_entries WHERE id IN ({_in_clause(adapter, entry_ids)})", tuple(entry_ids))
+        if submission_ids:
+            cursor.execute(
+                f"DELETE FROM task_submissions WHERE id IN ({_in_clause(adapter, submission_ids)})",
+                tuple(submission_ids)
+            )
+    adapter.run_write(_delete)
+
+def count_before(adapter, cutoff: date) -> int:
+    rows = adapter.execute_sql(
+        f"SELECT COUNT(*) AS n FROM task_submissions WHERE submission_date < {_placeholder(adapter)}",
+        (cutoff.isoformat(),),
+        fetch=True
+    )
+    row = rows[0]
+    return int(row["n"] if isinstance(row, dict) else row[0])
+
+def purge_before(adapter, cutoff: date, archive: bool = True, batch_size: int = BATCH_SIZE,
+                 pause: float = BATCH_PAUSE, progress: Optional[ProgressCallback] = None) -> Dict:
+    """Archive and delete submissions dated before ``cutoff`` with their task entries.
+
+    Works in batches of ``batch_size`` submissions, each archived before it
+    is deleted in its own short transaction, sleeping ``pause`` seconds
+    between batches so concurrent writers get the lock. On a partitioned
+    PostgreSQL schema, months entirely before the cutoff are archived and
+    dropped as partitions instead. Entries left behind by earlier deletes
+    (orphans) are cleaned up afterwards.
+    """
+    ph = _placeholder(adapter)
+    total = count_before(adapter, cutoff)
+    writer = ArchiveWriter(label=f"before-{cutoff.isoformat()}") if archive else None
+    result = {"submissions": 0, "entries": 0, "orphans": 0, "batches": 0,
+              "partitions_dropped": 0, "archive_files": []}
+    if progress:
+        progress(0, total)
+
+    if adapter.is_postgres and partitioning.is_partitioned(adapter):
+        # Whole months go by archive + detach/drop; only the partial month is deleted row by row
+        for _, names in partitioning.partitions_before(adapter, cutoff):
+            for name in names:
+                rows = _archive_table(adapter, name, writer, batch_size)
+                partitioning.drop_partition(adapter, name)
+                result["partitions_dropped"] += 1
+                if name.startswith("task_entries"):
+                    result["entries"] += rows
+                else:
+                    result["submissions"] += rows
+            if progress:
+                progress(min(result["submissions"], total), total)
+
+    while True:
+        submissions = adapter.read_sql(
+            f"SELECT * FROM task_submissions WHERE submission_date < {ph} ORDER BY id LIMIT {int(batch_size)}",
+            (cutoff.isoformat(),)
+        )
+        if submissions.empty:
+            break
+        submission_ids = [int(i) for i in submissions["id"]]
+        entries = adapter.read_sql(
+            f"SELECT * FROM task_entries WHERE submission_id IN ({_in_clause(adapter, submission_ids)})",
+            tuple(submission_ids)
+        )
+
+        if writer:
+            writer.write("task_submissions", submissions)
+            writer.write("task_entries", entries)
+            writer.next_part()
+        _delete_ids(adapter, submission_ids, [int(i) for i in entries["id"]])
+
+        result["submissions"] += len(submission_ids)
+        result["entries"] += len(entries)
+        result["batches"] += 1
+        if progress:
+            progress(min(result["submissions"], total), total)
+        if pause:
+            time.sleep(pause)
+
+    result["orphans"] = purge_orphan_entries(adapter, writer, batch_size, pause)
+    if writer:
+        result["archive_files"] = writer.files
+    return result
+
+def _archive_table(adapter, table: str, writer: Optional[ArchiveWriter], batch_size: int) -> int:
+    """Archive a whole table (e.g. a monthly partition) in id order; return its row count."""
+    if writer is None:
+        rows = adapter.execute_sql(f"SELECT COUNT(*) AS n FROM {table}", fetch=True)
+        return int(rows[0]["n"])
+    ph = _placeholder(adapter)
+    last_id, count = 0, 0
+    while True:
+        chunk = adapter.read_sql(
+            f"SELECT * FROM {table} WHERE id > {ph} ORDER BY id LIMIT {int(batch_size)}", (last_id,)
+        )
+        if chunk.empty:
+            return count
+        writer.write(table, chunk)
+        writer.next_part()
+        last_id = int(chunk["id"].iloc[-1])
+        count += len(chunk)
+
+def purge_orphan_entries(adapter, writer: Optional[ArchiveWriter] = None,
+                         batch_size: int = BATCH_SIZE, pause: float = BATCH_PAUSE) -> int:
+    """Delete task entries whose submission no longer exists, in batches."""
+    removed = 0
+    while True:
+        orphans = adapter.read_sql(
+            "SELECT e.* FROM task_entries e "
+            "LEFT JOIN task_submissions s ON s.id = e.submission_id "
+            f"WHERE s.id IS NULL ORDER BY e.id LIMIT {int(batch_size)}"
+        )
+        if orphans.empty:
+            return removed
+        if writer:
+            writer.write("task_entries_orphaned", orphans)
+            writer.next_part()
+        _delete_ids(adapter, [], [int(i) for i in orphans["id"]])
+        removed += len(orphans)
+        if pause:
+            time.sleep(pause)
+
+def truncate_all(adapter):
+    """Remove every submission and task entry in one fast operation."""
+    if adapter.is_postgres:
+        adapter.execute_sql("TRUNCATE task_entries, task_submissions RESTART IDENTITY")
+        return
+
+    # SQLite has no TRUNCATE: clear the child table first so foreign key checks stay cheap
+    def _truncate(cursor):
+        cursor.execute("DELETE FROM task_entries")
+        cursor.execute("DELETE FROM task_submissions")
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('task_entries', 'task_submissions')")
+    adapter.run_write(_truncate)
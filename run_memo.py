@@ -0,0 +1,105 @@
+"""
+Per-rerun memoization for Team Dashboard
+Loaders decorated with memoized() run at most once per script run for the
+same arguments; later calls in the run (other tabs, worker threads of the
+same run) share the first result. Scoped to the rerun's trace, so it is
+independent of the TTL caches underneath and never outlives the run
+"""
+
+import functools
+import threading
+import weakref
+from typing import Callable, Dict
+
+import pandas as pd
+
+import tracing
+
+_memos: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_memos_lock = threading.Lock()
+
+# Deduplicated calls per loader since the process started
+_deduplicated: Dict[str, int] = {}
+
+class _Entry:
+    """Result of one call, filled in by the first caller while the others wait."""
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.value = None
+        self.error = None
+
+def _fresh(value):
+    # Callers add columns to the frames they get; each one gets its own object
+    if isinstance(value, (pd.DataFrame, pd.Series, list, dict, set)):
+        return value.copy()
+    return value
+
+def _current_memo():
+    trace = tracing.current_trace()
+    if trace is None:
+        return None, None
+    with _memos_lock:
+        memo = _memos.get(trace)
+        if memo is None:
+            # Release the results of runs that have finished (finish_trace() sets their total)
+            for finished in [t for t in _memos.keys() if t.total]:
+                del _memos[finished]
+            memo = _memos[trace] = {}
+    return trace, memo
+
+def memoized(func: Callable):
+    """Share ``func``'s result between identical calls within one rerun."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        trace, memo = _current_memo()
+        try:
+            key = (name, args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            memo = None
+        if memo is None:
+            return func(*args, **kwargs)
+
+        with _memos_lock:
+            entry = memo.get(key)
+            owner = entry is None
+            if owner:
+                entry = memo[key] = _Entry()
+            else:
+                _deduplicated[name] = _deduplicated.get(name, 0) + 1
+                trace.attrs["deduped"] = trace.attrs.get("deduped", 0) + 1
+
+        if owner:
+            try:
+                entry.value = func(*args, **kwargs)
+            except Exception as e:
+                entry.error = e
+                # Let a later call in the run try again
+                with _memos_lock:
+                    memo.pop(key, None)
+                raise
+            finally:
+                entry.ready.set()
+            return _fresh(entry.value)
+
+        entry.ready.wait()
+        if entry.error is not None:
+            raise entry.error
+        return _fresh(entry.value)
+
+    wrapper.clear = getattr(func, "clear", None)
+    return wrapper
+
+def clear():
+    """Forget this run's results (after a write within the run)."""
+    trace = tracing.current_trace()
+    if trace is not None:
+        with _memos_lock:
+            _memos.pop(trace, None)
+
+def stats() -> Dict[str, int]:
+    with _memos_lock:
+        return dict(_deduplicated)
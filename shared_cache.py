@@ -0,0 +1,324 @@
+"""
+Shared query cache for Team Dashboard
+Caches loader results on local disk so every Streamlit process on a host
+reuses the same entries. The default backend is a SQLite file with TTLs and
+size-bounded LRU eviction; other backends can be plugged in with set_backend()
+"""
+
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("team_dashboard.shared_cache")
+
+# Backend ("sqlite" shared file, or "memory" per process) and size (environment overrides)
+SHARED_CACHE = os.getenv("SHARED_CACHE", "sqlite").lower()
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "query_cache.db")
+SHARED_CACHE_MAX_MB = float(os.getenv("SHARED_CACHE_MAX_MB", "256"))
+
+# Key prefix of cached() loader results; other users of the backend (e.g. range_cache) use their own
+LOADER_PREFIX = "fn:"
+
+# Hits refresh last_access at most this often, so reads rarely write
+_TOUCH_INTERVAL = 5.0
+
+class CacheBackend(ABC):
+    """Byte store used by cached(); subclasses implement get/set/clear."""
+
+    # True when other processes see the same entries
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Live value of ``key``, or None."""
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """Values of the live keys among ``keys``."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float):
+        """Store ``value`` under ``key`` for ``ttl`` seconds."""
+
+    def set_many(self, items: List[Tuple[str, bytes, float]]):
+        """Store several (key, value, ttl) entries."""
+        for key, value, ttl in items:
+            self.set(key, value, ttl)
+
+    @abstractmethod
+    def clear(self, prefix: str = ""):
+        """Remove entries whose key starts with ``prefix`` (all when empty)."""
+
+    def stats(self) -> Dict:
+        return {}
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU cache, used when the shared file is disabled or unavailable."""
+
+    def __init__(self, max_bytes: int = int(SHARED_CACHE_MAX_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0])
+            self._entries[key] = (value, time.time() + ttl)
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self, prefix: str = ""):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._size -= len(self._entries.pop(key)[0])
+
+    def stats(self) -> Dict:
+        return {"backend": "memory", "entries": len(self._entries), "size_mb": self._size / (1024 * 1024),
+                "max_mb": self.max_bytes / (1024 * 1024)}
+
+class SQLiteCacheBackend(CacheBackend):
+    """Cache entries in one SQLite file shared by all processes on the host.
+
+    Each write is a single transaction, so readers in other processes see
+    either the old entry or the complete new one. When the stored bytes
+    exceed ``max_bytes``, expired entries go first, then the least recently
+    used ones.
+    """
+
+    shared = True
+
+    def __init__(self, path: str = SHARED_CACHE_PATH, max_bytes: int = int(SHARED_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries(last_access)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        # Losing the cache on power loss is harmless
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT value, last_access FROM cache_entries WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[1] > _TOUCH_INTERVAL:
+                conn.execute("UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key))
+        finally:
+            conn.close()
+        self.hits += 1
+        return row[0]
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        now = time.time()
+        found = {}
+        conn = self._connect()
+        try:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, value, last_access FROM cache_entries "
+                    f"WHERE key IN ({', '.join(['?'] * len(chunk))}) AND expires_at > ?",
+                    (*chunk, now)
+                ).fetchall()
+                stale = [(now, key) for key, _, last_access in rows if now - last_access > _TOUCH_INTERVAL]
+                if stale:
+                    conn.executemany("UPDATE cache_entries SET last_access = ? WHERE key = ?", stale)
+                found.update((key, value) for key, value, _ in rows)
+        finally:
+            conn.close()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.set_many([(key, value, ttl)])
+
+    def set_many(self, items: List[Tuple[str, bytes, float]]):
+        items = [(key, value, ttl) for key, value, ttl in items if len(value) <= self.max_bytes]
+        if not items:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache_entries (key, value, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(key, sqlite3.Binary(value), len(value), now + ttl, now) for key, value, ttl in items]
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+            if total > self.max_bytes:
+                self.evictions += conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,)).rowcount
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+                for old_key, size in conn.execute(
+                    "SELECT key, size FROM cache_entries WHERE last_access < ? ORDER BY last_access", (now,)
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM cache_entries WHERE key = ?", (old_key,))
+                    total -= size
+                    self.evictions += 1
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def clear(self, prefix: str = ""):
+        conn = self._connect()
+        try:
+            if prefix:
+                conn.execute("DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+            else:
+                conn.execute("DELETE FROM cache_entries")
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict:
+        conn = self._connect()
+        try:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+        finally:
+            conn.close()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": entries,
+            "size_mb": size / (1024 * 1024),
+            "max_mb": self.max_bytes / (1024 * 1024),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+
+def get_backend() -> CacheBackend:
+    """Return the process-wide backend, created from SHARED_CACHE on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if SHARED_CACHE in ("memory", "off", "none", "0", "false"):
+                    _backend = MemoryBackend()
+                else:
+                    try:
+                        _backend = SQLiteCacheBackend()
+                    except Exception as e:
+                        logger.warning("Shared cache unavailable, caching per process only: %s", e)
+                        _backend = MemoryBackend()
+    return _backend
+
+def set_backend(backend: CacheBackend):
+    """Plug in a different backend (e.g. a network cache)."""
+    global _backend
+    _backend = backend
+
+def _function_prefix(func: Callable) -> str:
+    # The bytecode hash keeps entries written by an older version of the loader from being reused
+    code = hashlib.sha1(inspect.unwrap(func).__code__.co_code).hexdigest()[:8]
+    return f"{LOADER_PREFIX}{func.__module__}.{func.__qualname__}:{code}:"
+
+def cached(ttl: float, depends_on: Optional[Callable[[], object]] = None):
+    """Decorator caching a function's pickled result in the shared backend.
+
+    Arguments must be picklable; ``depends_on()`` (e.g. a file's mtime) is
+    added to the key so the entry is refreshed when it changes. Backend
+    errors fall back to calling the function.
+    """
+    def decorator(func: Callable):
+        prefix = _function_prefix(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            extra = depends_on() if depends_on else None
+            key = prefix + hashlib.sha256(
+                pickle.dumps((args, sorted(kwargs.items()), extra), protocol=pickle.HIGHEST_PROTOCOL)
+            ).hexdigest()
+            backend = get_backend()
+            try:
+                payload = backend.get(key)
+                if payload is not None:
+                    return pickle.loads(payload)
+            except Exception as e:
+                logger.warning("Shared cache read failed for %s: %s", func.__qualname__, e)
+
+            result = func(*args, **kwargs)
+            try:
+                backend.set(key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+            except Exception as e:
+                logger.warning("Shared cache write failed for %s: %s", func.__qualname__, e)
+            return result
+
+        wrapper.clear = lambda: get_backend().clear(prefix)
+        return wrapper
+    return decorator
+
+def clear():
+    """Drop every cached loader result, in all processes."""
+    try:
+        get_backend().clear(LOADER_PREFIX)
+    except Exception as e:
+        logger.warning("Shared cache clear failed: %s", e)
+
+def stats() -> Dict:
+    try:
+        return get_backend().stats()
+    except Exception as e:
+        return {"error": str(e)}
@@ -0,0 +1,114 @@
+"""
+Serialized SQLite writer for Team Dashboard
+A single thread owns the write connection and commits concurrent writes in
+group transactions, so Streamlit sessions never contend for the write lock.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+logger = logging.getLogger("team_dashboard.sqlite_writer")
+
+class SQLiteWriter:
+    """Runs write jobs on one connection, batching jobs that arrive together.
+
+    A job is a callable taking a cursor. Each job runs inside its own
+    SAVEPOINT, so a failing job is rolled back without affecting the others
+    committed in the same transaction.
+    """
+
+    def __init__(self, connect: Callable, max_batch: int = 64, batch_window: float = 0.002):
+        self._connect = connect
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.transactions = 0
+        self.jobs = 0
+        self.largest_batch = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, job: Callable[[Any], Any]) -> Any:
+        """Queue a write job and block until its transaction commits."""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((job, future))
+        return future.result()
+
+    def stats(self) -> dict:
+        return {
+            "transactions": self.transactions,
+            "jobs": self.jobs,
+            "largest_batch": self.largest_batch,
+            "queued": self._queue.qsize(),
+        }
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = None
+        while True:
+            batch = self._next_batch()
+            try:
+                if conn is None:
+                    conn = self._connect()
+                self._commit_batch(conn, batch)
+            except Exception as e:
+                logger.error("SQLite group commit failed: %s", e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+
+    def _commit_batch(self, conn, batch):
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        outcomes = []
+        try:
+            for job, _ in batch:
+                cursor.execute("SAVEPOINT write_job")
+                try:
+                    outcomes.append((True, job(cursor)))
+                    cursor.execute("RELEASE write_job")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO write_job")
+                    cursor.execute("RELEASE write_job")
+                    outcomes.append((False, e))
+            cursor.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+
+        self.transactions += 1
+        self.jobs += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, future), (ok, value) in zip(batch, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
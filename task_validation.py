@@ -0,0 +1,244 @@
+"""
+Task entry validation for Team Dashboard
+Coerces and validates per-batch task rows for all task types in one
+vectorized pass; shared by the Daily Task Entry form and bulk import
+"""
+
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Maximum hours per submission (overtime excluded)
+MAX_TOTAL_HOURS = 8.0
+
+class TaskTypeSpec:
+    """Rules for one task type of the daily report."""
+
+    def __init__(self, label: str, key: str, allow_empty_batch: bool = False,
+                 completed_max: Optional[float] = None, requires_rows: bool = True):
+        self.label = label
+        # Column prefix in task_submissions, e.g. "spatial" -> spatial_completed
+        self.key = key
+        # Rows may omit the batch (stored as "N/A")
+        self.allow_empty_batch = allow_empty_batch
+        self.completed_max = completed_max
+        # A selected task type needs at least one valid row
+        self.requires_rows = requires_rows
+
+TASK_TYPES: Dict[str, TaskTypeSpec] = {
+    spec.label: spec for spec in [
+        TaskTypeSpec("Spatial", "spatial"),
+        TaskTypeSpec("Textual", "textual"),
+        TaskTypeSpec("QA", "qa"),
+        TaskTypeSpec("QC", "qc"),
+        TaskTypeSpec("Automation", "automation", completed_max=100.0),
+        TaskTypeSpec("Other", "other", allow_empty_batch=True, requires_rows=False),
+    ]
+}
+
+_TYPE_LOOKUP = {label.lower(): label for label in TASK_TYPES}
+_TYPE_LOOKUP.update({spec.key: label for label, spec in TASK_TYPES.items()})
+
+EntryRows = Union[pd.DataFrame, List[Dict]]
+
+_TYPE_ORDER = list(TASK_TYPES)
+_TYPE_INDEX = {label: i for i, label in enumerate(_TYPE_ORDER)}
+_ALLOW_EMPTY = np.array([TASK_TYPES[label].allow_empty_batch for label in _TYPE_ORDER] + [False])
+_COMPLETED_MAX = np.array([
+    TASK_TYPES[label].completed_max if TASK_TYPES[label].completed_max is not None else np.inf
+    for label in _TYPE_ORDER
+] + [np.inf])
+
+_ERROR_MESSAGES = [
+    "unknown task type",
+    "completed is not a number",
+    "hours is not a number",
+    "batch is required",
+    "completed must be greater than 0",
+    "hours must be greater than 0",
+    "completed is above the maximum for this task type",
+]
+
+def _is_empty(value) -> bool:
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value) or str(value).strip() == ""
+
+def _as_number(values: np.ndarray):
+    """Coerce to float; also return a mask of non-empty values that are not numbers."""
+    numbers = np.asarray(pd.to_numeric(values, errors="coerce"), dtype=float)
+    missing = np.isnan(numbers)
+    invalid = np.zeros(len(values), dtype=bool)
+    if missing.any():
+        invalid[missing] = [not _is_empty(v) for v in values[missing]]
+    return np.where(missing, 0.0, numbers), invalid
+
+def _validate_arrays(task_type: np.ndarray, batch: np.ndarray, completed: np.ndarray, hours: np.ndarray) -> Dict:
+    """Core single pass over column arrays; see validate_entries."""
+    type_code = np.array(
+        [_TYPE_INDEX.get(_TYPE_LOOKUP.get(str(t).strip().lower()), -1) if t is not None else -1 for t in task_type],
+        dtype=int
+    )
+    batch = np.array(["" if _is_empty(b) else str(b).strip() for b in batch], dtype=object)
+    completed, bad_completed = _as_number(completed)
+    hours, bad_hours = _as_number(hours)
+
+    no_batch = batch == ""
+    positive = (completed > 0) & (hours > 0)
+    batch[no_batch & _ALLOW_EMPTY[type_code] & positive] = "N/A"
+    no_batch = batch == ""
+
+    blank = no_batch & (completed == 0) & (hours == 0) & ~bad_completed & ~bad_hours
+    error_code = np.select(
+        [
+            type_code < 0,
+            bad_completed,
+            bad_hours,
+            no_batch,
+            completed <= 0,
+            hours <= 0,
+            completed > _COMPLETED_MAX[type_code],
+        ],
+        list(range(len(_ERROR_MESSAGES))),
+        default=-1,
+    )
+    error_code[blank] = -1
+    return {
+        "type_code": type_code,
+        "batch": batch,
+        "completed": completed,
+        "hours": hours,
+        "blank": blank,
+        "error_code": error_code,
+    }
+
+def _error_text(error_code: np.ndarray) -> np.ndarray:
+    return np.array([""] + _ERROR_MESSAGES, dtype=object)[error_code + 1]
+
+def _type_labels(type_code: np.ndarray) -> np.ndarray:
+    return np.array(_TYPE_ORDER + [None], dtype=object)[type_code]
+
+def validate_entries(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize and check entry rows in one pass.
+
+    ``df`` needs task_type, batch, completed and hours columns (other
+    columns are kept). Returns a copy with canonical task types, stripped
+    batches, numeric completed/hours, a ``blank`` flag for untouched rows
+    and an ``error`` message ("" for valid rows).
+    """
+    def column(name):
+        if name in df.columns:
+            return df[name].to_numpy(dtype=object)
+        return np.full(len(df), None, dtype=object)
+
+    checked = _validate_arrays(column("task_type"), column("batch"), column("completed"), column("hours"))
+    out = df.copy()
+    out["task_type"] = _type_labels(checked["type_code"])
+    out["batch"] = checked["batch"]
+    out["completed"] = checked["completed"]
+    out["hours"] = checked["hours"]
+    out["blank"] = checked["blank"]
+    out["error"] = _error_text(checked["error_code"])
+    return out
+
+class TaskValidation:
+    """Result of validating the task rows of one daily report."""
+
+    def __init__(self, checked: Dict, rows: np.ndarray, errors: List[Dict]):
+        self.errors = errors
+        self._checked = checked
+        valid = (checked["error_code"] < 0) & ~checked["blank"]
+        self._valid = valid
+        # Totals over every row with a numeric value, as shown while editing
+        known = checked["type_code"] >= 0
+        codes = checked["type_code"][known]
+        completed = np.bincount(codes, weights=checked["completed"][known], minlength=len(_TYPE_ORDER))
+        hours = np.bincount(codes, weights=checked["hours"][known], minlength=len(_TYPE_ORDER))
+        self.totals = {label: (float(completed[i]), float(hours[i])) for i, label in enumerate(_TYPE_ORDER)}
+        self.rows = rows
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def total_hours(self) -> float:
+        return sum(hours for _, hours in self.totals.values())
+
+    def completed(self, task_type: str) -> float:
+        return self.totals[task_type][0]
+
+    def hours(self, task_type: str) -> float:
+        return self.totals[task_type][1]
+
+    def batches(self, task_type: str) -> List[str]:
+        mask = self._valid & (self._checked["type_code"] == _TYPE_INDEX[task_type])
+        return self._checked["batch"][mask].tolist()
+
+    def entry_records(self) -> List[Dict]:
+        """Valid entries as dicts for save_task_submission."""
+        checked = self._checked
+        return [
+            {"task_type": _TYPE_ORDER[code], "batch": batch, "completed": float(completed), "hours": float(hours)}
+            for code, batch, completed, hours in zip(
+                checked["type_code"][self._valid], checked["batch"][self._valid],
+                checked["completed"][self._valid], checked["hours"][self._valid]
+            )
+        ]
+
+    @property
+    def entries(self) -> pd.DataFrame:
+        return pd.DataFrame(self.entry_records(), columns=["task_type", "batch", "completed", "hours"])
+
+    def error_messages(self) -> List[str]:
+        return [
+            f"{e['task_type']} row {e['row']}: {e['message']}" if e.get("row") else e["message"]
+            for e in self.errors
+        ]
+
+def validate_task_frames(frames: Dict[str, EntryRows], selected: Optional[Iterable[str]] = None,
+                         max_total_hours: Optional[float] = MAX_TOTAL_HOURS,
+                         report_row_errors: bool = False) -> TaskValidation:
+    """Validate the editor rows of all task types of a daily report at once.
+
+    ``frames`` maps task type labels to editor output (DataFrame or list of
+    row dicts). ``selected`` lists the chosen task types (defaults to the
+    keys of ``frames``); a selected type that needs rows but has no valid
+    row is an error, as is a total above ``max_total_hours``. Invalid rows
+    (e.g. a batch without hours) are left out of the entries, as the entry
+    form always did; ``report_row_errors`` also lists them as errors.
+    """
+    task_type, batch, completed, hours, rows = [], [], [], [], []
+    for label, frame in frames.items():
+        records = frame.to_dict(orient="records") if isinstance(frame, pd.DataFrame) else frame
+        for number, record in enumerate(records, start=1):
+            task_type.append(label)
+            batch.append(record.get("batch"))
+            completed.append(record.get("completed"))
+            hours.append(record.get("hours"))
+            rows.append(number)
+
+    def as_array(values):
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+
+    checked = _validate_arrays(as_array(task_type), as_array(batch), as_array(completed), as_array(hours))
+    row_numbers = np.array(rows, dtype=int)
+
+    errors = [
+        {"task_type": _TYPE_ORDER[checked["type_code"][i]], "row": int(row_numbers[i]),
+         "message": _ERROR_MESSAGES[checked["error_code"][i]]}
+        for i in np.flatnonzero(checked["error_code"] >= 0)
+    ] if report_row_errors else []
+    result = TaskValidation(checked, row_numbers, errors)
+
+    valid_types = {_TYPE_ORDER[code] for code in checked["type_code"][result._valid]}
+    for label in (selected if selected is not None else frames.keys()):
+        if TASK_TYPES[label].requires_rows and label not in valid_types:
+            errors.append({"task_type": label, "row": None,
+                           "message": f"{label} task requires at least one valid row"})
+
+    if max_total_hours is not None and result.total_hours > max_total_hours:
+        errors.append({"task_type": None, "row": None,
+                       "message": f"Total hours must be {max_total_hours:g} or less"})
+    return result
@@ -10,6 +10,10 @@ from typing import List, Dict, Optional
 import io
 import hashlib
 import secrets
+import time
+
+import tracing
+from concurrent_loader import load_concurrently
 
 # Import database adapter for cloud compatibility
 try:
@@ -18,6 +22,31 @@ try:
 except ImportError:
     USE_CLOUD_DB = False
 
+from query_metrics import query_metrics
+import anomaly_detection
+import api_server
+import bulk_import
+import cache_warmup
+import history_data
+import materialized_views
+import retention
+import run_memo
+import shared_cache
+import task_validation
+import write_behind
+
+# Reruns listed in the admin trace panel
+TRACE_PANEL_RUNS = 20
+
+# Reads go to the primary for this long after a write (read-your-writes)
+READ_YOUR_WRITES_SECONDS = history_data.READ_YOUR_WRITES_SECONDS
+
+# Submissions to PostgreSQL go through the local write-behind journal (WRITE_BEHIND=off to disable)
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND", "on").lower() != "off"
+
+# Most records listed by one Edit Records search
+EDIT_SEARCH_LIMIT = 200
+
 # Page configuration
 st.set_page_config(
     page_title="RMSI Daily Task Performance",
@@ -53,7 +82,22 @@ def _find_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
             return lower_map[key]
     return None
 
-@st.cache_data(ttl=600)
+PM_FILES = ('PM.xlsx', 'PM_team.xlsx', 'PM_team.csv', 'PM_users.txt')
+
+def _pm_files_stamp():
+    """Modification times of the PM files; part of the shared cache key of their loaders."""
+    return tuple(os.path.getmtime(f) if os.path.exists(f) else None for f in PM_FILES)
+
+def clear_caches():
+    """Drop cached data in this process and in the shared cache used by all processes."""
+    # Refills of the cleared entries read the primary until replicas have caught up
+    history_data.mark_write()
+    st.cache_data.clear()
+    shared_cache.clear()
+    run_memo.clear()
+
+@run_memo.memoized
+@tracing.traced_loader(shared_cache.cached(ttl=600, depends_on=_pm_files_stamp))
 def load_employee_code_mapping() -> Dict[str, str]:
     """Load employee codes from PM file (PM.xlsx or PM_team.*)."""
     if os.path.exists('PM.xlsx'):
@@ -83,6 +127,7 @@ def load_employee_code_mapping() -> Dict[str, str]:
 # User Profile Management (Supabase)
 # ========================================
 
+@run_memo.memoized
 def get_all_users_from_db() -> Dict[str, Dict]:
     """Get all active users from Supabase user_profiles table."""
     if not USE_CLOUD_DB:
@@ -150,7 +195,9 @@ def add_user_to_db(user_name: str, employee_code: str = "", team_function: str =
         
         conn.commit()
         conn.close()
-        st.cache_data.clear()
+        clear_caches()
+        invalidate_team_scopes()
+        invalidate_login_roster()
         return True
     except Exception as e:
         st.error(f"Failed to add user: {e}")
@@ -171,7 +218,8 @@ def remove_user_from_db(user_name: str) -> bool:
         """, (user_name,))
         conn.commit()
         conn.close()
-        st.cache_data.clear()
+        clear_caches()
+        invalidate_login_roster()
         return True
     except Exception as e:
         st.error(f"Failed to remove user: {e}")
@@ -192,7 +240,9 @@ def update_user_team_function(user_name: str, team_function: str) -> bool:
         """, (team_function, user_name))
         conn.commit()
         conn.close()
-        st.cache_data.clear()
+        clear_caches()
+        invalidate_team_scopes()
+        invalidate_login_roster()
         return True
     except Exception as e:
         st.error(f"Failed to update team function: {e}")
@@ -233,6 +283,7 @@ def sync_pm_to_supabase() -> int:
             if add_user_to_db(name, code, team, activate=False):
                 count += 1
     
+    invalidate_login_roster()
     return count
 
 def load_employee_codes_from_db() -> Dict[str, str]:
@@ -240,6 +291,51 @@ def load_employee_codes_from_db() -> Dict[str, str]:
     users = get_all_users_from_db()
     return {name: info["employee_code"] for name, info in users.items() if info["employee_code"]}
 
+# ========================================
+# Login Roster
+# ========================================
+
+# Kept in the shared cache so a user change in one process reaches every process
+_ROSTER_VERSION_KEY = "meta:roster_version"
+_ROSTER_VERSION_TTL = 30 * 24 * 3600
+
+def login_roster_version() -> str:
+    """Opaque token that changes whenever the user list changes"""
+    value = shared_cache.get_backend().get(_ROSTER_VERSION_KEY)
+    if value is None:
+        # Unknown (first use or evicted): start a new version so no stale roster is served
+        return invalidate_login_roster()
+    return value.decode("ascii")
+
+def invalidate_login_roster() -> str:
+    """Make the next login screen, in any process, reload the roster."""
+    version = secrets.token_hex(16)
+    shared_cache.get_backend().set(_ROSTER_VERSION_KEY, version.encode("ascii"), _ROSTER_VERSION_TTL)
+    return version
+
+@tracing.traced_loader(st.cache_data(ttl=3600))
+def _load_login_roster(version: str) -> List[str]:
+    """Sorted display names of active users (``version`` keys the cache)."""
+    if USE_CLOUD_DB:
+        conn = get_database_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT user_name FROM user_profiles WHERE active = TRUE")
+            names = [row[0] for row in cursor.fetchall()]
+        finally:
+            conn.close()
+    else:
+        names = list(load_employee_code_mapping().keys())
+    return sorted(names)
+
+def get_login_roster() -> List[str]:
+    """Names for the sign-in selectbox, served from cache between user changes."""
+    try:
+        return _load_login_roster(login_roster_version())
+    except Exception as e:
+        st.error(f"Failed to load users from database: {e}")
+        return []
+
 # ========================================
 # Password Management
 # ========================================
@@ -295,7 +391,7 @@ def set_user_password(user_name: str, new_password: str) -> bool:
         
         conn.commit()
         conn.close()
-        st.cache_data.clear()
+        clear_caches()
         return True
     except Exception as e:
         st.error(f"Failed to set password: {e}")
@@ -312,12 +408,19 @@ def clear_user_password(user_name: str) -> bool:
         cursor.execute("DELETE FROM user_passwords WHERE user_name = %s", (user_name,))
         conn.commit()
         conn.close()
-        st.cache_data.clear()
+        clear_caches()
         return True
     except Exception as e:
         st.error(f"Failed to clear password: {e}")
         return False
 
+PASSWORD_OF_USER = db_adapter.statement(
+    "password_of_user", "SELECT salt, password_hash FROM user_passwords WHERE user_name = ?"
+)
+EMPLOYEE_CODE_OF_USER = db_adapter.statement(
+    "employee_code_of_user", "SELECT employee_code FROM user_profiles WHERE user_name = ? AND active = TRUE"
+)
+
 def verify_user_password(user_name: str, password: str) -> bool:
     """Verify user password against Supabase database or Employee Code."""
     if USE_CLOUD_DB:
@@ -326,11 +429,7 @@ def verify_user_password(user_name: str, password: str) -> bool:
             cursor = conn.cursor()
             
             # First check custom password
-            cursor.execute(
-                "SELECT salt, password_hash FROM user_passwords WHERE user_name = %s",
-                (user_name,)
-            )
-            result = cursor.fetchone()
+            result = db_adapter.run(cursor, PASSWORD_OF_USER, (user_name,)).fetchone()
             
             if result:
                 salt, password_hash = result
@@ -338,11 +437,7 @@ def verify_user_password(user_name: str, password: str) -> bool:
                 return _hash_password(password, salt) == password_hash
             
             # Fallback to Employee Code from user_profiles
-            cursor.execute(
-                "SELECT employee_code FROM user_profiles WHERE user_name = %s AND active = TRUE",
-                (user_name,)
-            )
-            profile_result = cursor.fetchone()
+            profile_result = db_adapter.run(cursor, EMPLOYEE_CODE_OF_USER, (user_name,)).fetchone()
             conn.close()
             
             if profile_result:
@@ -393,50 +488,53 @@ def authenticate_by_password(password: str) -> Optional[str]:
             return user_name
     return None
 
-@st.cache_data(ttl=600)
-def load_users_from_file():
+@tracing.traced_loader(shared_cache.cached(ttl=600, depends_on=_pm_files_stamp))
+def _load_users_from_files():
+    """Users from PM.xlsx and PM_users.txt; raises on unreadable files, so errors are never cached"""
+    users = []
+    # Prefer PM.xlsx if it exists
+    if os.path.exists('PM.xlsx'):
+        df = pd.read_excel('PM.xlsx')
+        # Try common column names for user list
+        user_col = None
+        for col in df.columns:
+            col_norm = str(col).strip().lower()
+            if col_norm in {'name', 'user name', 'username', 'user'}:
+                user_col = col
+                break
+        if user_col:
+            excel_users = (
+                df[user_col]
+                .dropna()
+                .astype(str)
+                .str.strip()
+                .tolist()
+            )
+            excel_users = [u for u in excel_users if u]
+            users.extend(excel_users)
+
+    # Fallback to PM_users.txt
     try:
-        users = []
-        # Prefer PM.xlsx if it exists
-        if os.path.exists('PM.xlsx'):
-            df = pd.read_excel('PM.xlsx')
-            # Try common column names for user list
-            user_col = None
-            for col in df.columns:
-                col_norm = str(col).strip().lower()
-                if col_norm in {'name', 'user name', 'username', 'user'}:
-                    user_col = col
-                    break
-            if user_col:
-                excel_users = (
-                    df[user_col]
-                    .dropna()
-                    .astype(str)
-                    .str.strip()
-                    .tolist()
-                )
-                excel_users = [u for u in excel_users if u]
-                users.extend(excel_users)
+        with open('PM_users.txt', 'r', encoding='utf-8') as f:
+            file_users = [line.strip() for line in f.readlines() if line.strip()]
+            users.extend(file_users)
+    except FileNotFoundError:
+        pass
 
-        # Fallback to PM_users.txt
-        try:
-            with open('PM_users.txt', 'r', encoding='utf-8') as f:
-                file_users = [line.strip() for line in f.readlines() if line.strip()]
-                users.extend(file_users)
-        except FileNotFoundError:
-            pass
+    # De-duplicate while preserving order
+    seen = set()
+    merged = []
+    for u in users:
+        if u and u not in seen:
+            merged.append(u)
+            seen.add(u)
 
-        # De-duplicate while preserving order
-        seen = set()
-        merged = []
-        for u in users:
-            if u and u not in seen:
-                merged.append(u)
-                seen.add(u)
+    return merged if merged else USER_LIST
 
-        return merged if merged else USER_LIST
-    except FileNotFoundError:
-        return USER_LIST
+@run_memo.memoized
+def load_users_from_file():
+    try:
+        return _load_users_from_files()
     except Exception:
         return USER_LIST
 
@@ -446,57 +544,13 @@ def save_users_to_file(users):
         with open('PM_users.txt', 'w', encoding='utf-8') as f:
             for user in users:
                 f.write(f"{user}\n")
-        st.cache_data.clear()
+        clear_caches()
         return True
     except Exception:
         return False
 
-def _normalize_task_rows(rows, allow_empty_batch: bool = False):
-    """Normalize task entry rows from data editor."""
-    normalized = []
-    for row in rows:
-        batch = str(row.get("batch", "")).strip()
-        completed = row.get("completed", 0)
-        hours = row.get("hours", 0.0)
-        try:
-            completed = float(completed)
-        except Exception:
-            completed = 0
-        try:
-            hours = float(hours)
-        except Exception:
-            hours = 0.0
-
-        if not batch and allow_empty_batch and completed > 0 and hours > 0:
-            batch = "N/A"
-
-        if batch and completed > 0 and hours > 0:
-            normalized.append({
-                "batch": batch,
-                "completed": completed,
-                "hours": hours
-            })
-    return normalized
-
-def _calculate_row_totals(rows):
-    """Calculate totals from raw editor rows (no validation filters)."""
-    total_completed = 0.0
-    total_hours = 0.0
-    for row in rows:
-        try:
-            completed = float(row.get("completed", 0) or 0)
-        except Exception:
-            completed = 0.0
-        try:
-            hours = float(row.get("hours", 0) or 0)
-        except Exception:
-            hours = 0.0
-        total_completed += completed
-        total_hours += hours
-    return total_completed, total_hours
-
 def _render_task_entries(task_label, batch_options, key_prefix, allow_empty_batch: bool = False, completed_max=None):
-    """Render task entry rows and return normalized rows, totals, batches."""
+    """Render the task entry editor and return its raw rows (validated later by task_validation)."""
     st.markdown(f"**{task_label} Tasks**")
 
     default_rows = [{"batch": "", "completed": 0, "hours": 0.0}]
@@ -541,10 +595,7 @@ def _render_task_entries(task_label, batch_options, key_prefix, allow_empty_batc
     else:
         rows = edited
         st.session_state[state_key] = rows
-    normalized = _normalize_task_rows(rows, allow_empty_batch=allow_empty_batch)
-    total_completed, total_hours = _calculate_row_totals(rows)
-    batches = [r["batch"] for r in normalized]
-    return normalized, total_completed, total_hours, batches
+    return rows
 
 def get_database_connection():
     """Get database connection with cloud compatibility"""
@@ -552,13 +603,38 @@ def get_database_connection():
         # Use cloud database adapter
         return db_adapter.get_connection()
     else:
-        # Fallback to SQLite for local development
-        conn = sqlite3.connect('team_dashboard.db', check_same_thread=False)
+        # Fallback to SQLite for local development (same file as DatabaseAdapter.sqlite_path)
+        conn = sqlite3.connect(os.getenv("SQLITE_DB_PATH", "team_dashboard.db"), check_same_thread=False)
         
         # Create tables if not exist (SQLite fallback)
         create_tables_sqlite(conn)
         return conn
 
+def get_read_connection():
+    """Connection for read-only queries: a read replica when configured, unless this session or any other just wrote"""
+    if not USE_CLOUD_DB:
+        return get_database_connection()
+    recent_write = time.time() - st.session_state.get("last_write_at", 0.0) < READ_YOUR_WRITES_SECONDS
+    return history_data.read_connection(prefer_primary=recent_write)
+
+def mark_session_write():
+    """Record a write so this session keeps reading from the primary for a while"""
+    st.session_state.last_write_at = time.time()
+
+def aggregate_views_usable():
+    """Whether the PostgreSQL aggregate views can answer reads for this session"""
+    if not (USE_CLOUD_DB and db_adapter.is_postgres and db_adapter.pg_matviews):
+        return False
+    # The views trail writes by a few seconds; a session that just wrote reads the tables
+    return time.time() - st.session_state.get("last_write_at", 0.0) >= READ_YOUR_WRITES_SECONDS
+
+def get_view_totals(reader, start_date=None, end_date=None):
+    """Rows from a materialized_views reader, or None to fall back to the raw tables"""
+    try:
+        return reader(db_adapter, start_date, end_date)
+    except Exception:
+        return None
+
 def create_tables_sqlite(conn):
     """Create SQLite tables if they don't exist"""
     conn.execute('''
@@ -611,7 +687,8 @@ def create_tables_sqlite(conn):
         )
     
     conn.commit()
-@st.cache_data(ttl=600)
+@run_memo.memoized
+@tracing.traced_loader(st.cache_data(ttl=600))
 def get_app_settings():
     """Load app settings"""
     conn = get_database_connection()
@@ -640,9 +717,10 @@ def update_app_settings(spatial_target: int, textual_target: int):
         )
     conn.commit()
     conn.close()
-    st.cache_data.clear()
+    clear_caches()
 
-@st.cache_data(ttl=600)
+@run_memo.memoized
+@tracing.traced_loader(shared_cache.cached(ttl=600, depends_on=_pm_files_stamp))
 def load_team_mapping_file():
     """Load team mapping from PM team file (PM.xlsx or PM_team.*)"""
     if os.path.exists('PM.xlsx'):
@@ -704,7 +782,8 @@ def upsert_team_member(name: str, team_function: str):
     conn.commit()
     conn.close()
 
-@st.cache_data(ttl=600)
+@run_memo.memoized
+@tracing.traced_loader(st.cache_data(ttl=600))
 def get_batch_options() -> List[str]:
     """Get batch options from DB"""
     conn = get_database_connection()
@@ -727,7 +806,7 @@ def add_batch_option(name: str):
         cursor.execute("INSERT OR IGNORE INTO batch_options (name) VALUES (?)", (name,))
     conn.commit()
     conn.close()
-    st.cache_data.clear()
+    clear_caches()
 
 def delete_batch_option(name: str):
     """Delete a batch option"""
@@ -739,9 +818,32 @@ def delete_batch_option(name: str):
         cursor.execute("DELETE FROM batch_options WHERE name = ?", (name,))
     conn.commit()
     conn.close()
-    st.cache_data.clear()
+    clear_caches()
+
+def _warmup_tasks():
+    """Loaders preloaded at startup: reference data and the default date windows"""
+    today = date.today()
+    windows = {
+        "7d": (today - timedelta(days=7), today),
+        "30d": (today - timedelta(days=30), today),
+        "month": (today.replace(day=1), today),
+    }
+    tasks = {
+        "login_roster": lambda: _load_login_roster(login_roster_version()),
+        "batch_options": get_batch_options,
+        "app_settings": get_app_settings,
+        "team_mapping": load_team_mapping_file,
+        "employee_codes": load_employee_code_mapping,
+        "users": load_users_from_file,
+    }
+    for label, (start, end) in windows.items():
+        tasks[f"submissions_{label}"] = lambda start=start, end=end: get_submissions_in_range(start, end)
+        tasks[f"entries_{label}"] = lambda start=start, end=end: get_task_entries_in_range(start, end)
+    return tasks
 
+@tracing.traced_run()
 def main():
+    tracing.checkpoint("setup")
     # Initialize database tables for cloud deployment
     if USE_CLOUD_DB and not st.session_state.get("db_tables_ready", False):
         try:
@@ -749,8 +851,16 @@ def main():
             st.session_state.db_tables_ready = True
         except Exception as e:
             st.error(f"Database initialization error: {e}")
+
+    # Preload common caches in the background (once per process)
+    if st.session_state.get("db_tables_ready", not USE_CLOUD_DB):
+        cache_warmup.start_once(_warmup_tasks)
+        if db_adapter.is_postgres and db_adapter.pg_matviews:
+            materialized_views.get_refresher(db_adapter)
+    api_server.start_api_from_env()
     
     # Password authentication
+    tracing.checkpoint("auth")
     if "authenticated" not in st.session_state:
         st.session_state.authenticated = False
         st.session_state.current_user = None
@@ -763,24 +873,19 @@ def main():
         # Check if admin mode checkbox is checked
         admin_mode = st.checkbox("Admin login")
         
-        # Get users from Supabase or PM.xlsx
-        if USE_CLOUD_DB:
-            users_dict = get_all_users_from_db()
-            if not users_dict and not admin_mode:
+        # Active user names (Supabase or PM.xlsx), cached until the user list changes
+        roster = get_login_roster()
+        if not roster and not admin_mode:
+            if USE_CLOUD_DB:
                 st.info("👋 Welcome! This is your first time setting up.")
                 st.warning("⚠️ No users in database yet. Please login as Admin to sync from PM.xlsx.")
                 st.markdown("**Admin Setup Steps:**")
                 st.markdown("1. ✅ Check the 'Admin login' box above")
                 st.markdown("2. 🔑 Enter admin password")
                 st.markdown("3. 🔄 Go to Configuration → User Management → Click 'Sync from PM.xlsx'")
-                st.stop()
-        else:
-            # Local development: use PM.xlsx
-            mapping = load_employee_code_mapping()
-            users_dict = {name: {"employee_code": code, "team_function": ""} for name, code in mapping.items()}
-            if not users_dict and not admin_mode:
+            else:
                 st.warning("No Employee Codes found. Please update PM.xlsx with an Employee Code column.")
-                st.stop()
+            st.stop()
 
         if admin_mode:
             # Admin login - only password
@@ -799,7 +904,7 @@ def main():
         else:
             # Regular user login
             with st.form("user_login_form"):
-                user_name = st.selectbox("Select Your Name", options=sorted(users_dict.keys()))
+                user_name = st.selectbox("Select Your Name", options=roster)
                 password = st.text_input("Password / Employee Code", type="password")
                 submitted = st.form_submit_button("Sign In")
             
@@ -815,6 +920,7 @@ def main():
         st.stop()
 
     # Sidebar navigation
+    tracing.checkpoint("sidebar")
     st.sidebar.title("Navigation")
     st.sidebar.info(f"👤 Logged in as: **{st.session_state.current_user}**")
     if st.session_state.is_admin:
@@ -852,7 +958,13 @@ def main():
         page_options,
         index=0
     )
+
+    if st.session_state.is_admin:
+        show_team_scope_selector()
+        show_trace_panel()
     
+    tracing.checkpoint("page")
+    tracing.set_trace_label(page, user=st.session_state.current_user)
     if page == "Daily Task Entry":
         show_daily_task_entry()
     elif page == "Data Management":
@@ -860,12 +972,134 @@ def main():
     elif page == "Configuration":
         show_configuration()
 
+def show_trace_panel():
+    """Admin-only sidebar panel with a timing waterfall of recent reruns"""
+    # Collapsed expanders still execute, so gate the panel behind a toggle
+    if not st.sidebar.toggle("⏱️ Performance Trace", key="trace_panel_open"):
+        return
+    with st.sidebar.container(border=True):
+        traces = tracing.recent_traces(TRACE_PANEL_RUNS)
+        if not traces:
+            st.caption("No completed reruns yet")
+            return
+
+        summary_df = pd.DataFrame([
+            {"Time": t["started_at"], "Page": t["label"], "User": t.get("user", ""), "Total (ms)": round(t["total_ms"], 1),
+             "Deduped": t.get("deduped", 0)}
+            for t in traces
+        ])
+        st.dataframe(summary_df, use_container_width=True, height=180, hide_index=True)
+
+        selected = st.selectbox(
+            "Rerun",
+            range(len(traces)),
+            format_func=lambda i: f"{traces[i]['started_at']} · {traces[i]['label']} · {traces[i]['total_ms']:.0f} ms",
+            key="trace_panel_run"
+        )
+        spans_df = pd.DataFrame(traces[selected]["spans"])
+        if spans_df.empty:
+            st.caption("No spans recorded")
+            return
+
+        spans_df["label"] = [
+            f"{i:02d} {'· ' * depth}{name}" for i, (depth, name) in enumerate(zip(spans_df["depth"], spans_df["name"]))
+        ]
+        spans_df["cache"] = spans_df["cache_hit"].map({True: "hit", False: "miss"}).fillna("")
+
+        fig = go.Figure()
+        for kind, group in spans_df.groupby("kind"):
+            fig.add_trace(go.Bar(
+                y=group["label"],
+                x=group["duration_ms"],
+                base=group["start_ms"],
+                orientation="h",
+                name=kind,
+                text=group["cache"],
+                textposition="inside",
+                hovertemplate="%{y}<br>start %{base:.1f} ms<br>%{x:.1f} ms<extra></extra>"
+            ))
+        fig.update_layout(
+            height=120 + 18 * len(spans_df),
+            barmode="overlay",
+            xaxis_title="ms",
+            yaxis=dict(autorange="reversed", categoryorder="array", categoryarray=spans_df["label"].tolist()),
+            margin=dict(l=0, r=0, t=10, b=0),
+            legend=dict(orientation="h")
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        hits = int((spans_df["cache"] == "hit").sum())
+        misses = int((spans_df["cache"] == "miss").sum())
+        st.caption(f"Cache: {hits} hits, {misses} misses · DB calls: {int((spans_df['kind'] == 'db').sum())}")
+
+def _task_type_key(task_type):
+    return f"task_type_{task_validation.TASK_TYPES[task_type].key}"
+
+@st.fragment
+def _task_details_fragment(batch_options):
+    """Task type selection, per-batch editors and totals of the entry page.
+
+    Edits rerun only this fragment, not authentication, the sidebar, the
+    page loaders or the submit form; the editors and the totals they feed
+    share it so the totals stay live. State lives in session_state, which
+    the submit handler reads on the full run.
+    """
+    st.markdown("---")
+    st.markdown("**Task Type Selection**")
+
+    # Task type selection outside form for immediate response
+    columns = st.columns(3)
+    for i, task_type in enumerate(task_validation.TASK_TYPES):
+        with columns[i // 2]:
+            st.checkbox(task_type, key=_task_type_key(task_type))
+    selected_types = [label for label in task_validation.TASK_TYPES if st.session_state.get(_task_type_key(label))]
+    frames = {}
+
+    # Task details outside form for live updates
+    if selected_types:
+        st.markdown("---")
+        st.markdown("**Task Details**")
+
+        details_container = st.container()
+
+        with details_container:
+            for task_type in selected_types:
+                spec = task_validation.TASK_TYPES[task_type]
+                frames[task_type] = _render_task_entries(
+                    task_type, batch_options, spec.key,
+                    allow_empty_batch=spec.allow_empty_batch,
+                    completed_max=spec.completed_max
+                )
+
+        # Coerce and validate all task rows in one pass
+        validation = task_validation.validate_task_frames(frames, selected=selected_types)
+
+        # Total hours (exclude overtime)
+        st.metric("Total Hours", f"{validation.total_hours:.2f} hours")
+
+        # Over time hours after total hours (not included in total)
+        st.number_input(
+            "Over Time Hours (optional)",
+            min_value=0.0,
+            step=0.1,
+            format="%.2f",
+            value=st.session_state.get("overtime_hours_input", 0.0),
+            key="overtime_hours_input",
+            help="Use the Submit button below to save changes."
+        )
+
+@tracing.traced(kind="page")
 def show_daily_task_entry():
     """Daily task entry page"""
-    # Pre-load data to avoid repeated queries during user interaction
-    batch_options = get_batch_options()
-    current_users = load_users_from_file()
-    settings = get_app_settings()
+    # Pre-load data in parallel to avoid repeated queries during user interaction
+    page_data = load_concurrently({
+        "batch_options": get_batch_options,
+        "current_users": load_users_from_file,
+        "settings": get_app_settings,
+    }, page="Daily Task Entry")
+    batch_options = page_data["batch_options"]
+    current_users = page_data["current_users"]
+    settings = page_data["settings"]
 
     # Create two column layout
     col_form, col_preview = st.columns([2, 1])
@@ -882,106 +1116,18 @@ def show_daily_task_entry():
         user_name = st.session_state.current_user
         st.info(f"Submitting as: **{user_name}**")
         
-        st.markdown("---")
-        st.markdown("**Task Type Selection**")
-        
-        # Task type selection outside form for immediate response
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            spatial_selected = st.checkbox("Spatial")
-            textual_selected = st.checkbox("Textual")
-        
-        with col2:
-            qa_selected = st.checkbox("QA")
-            qc_selected = st.checkbox("QC")
-        
-        with col3:
-            automation_selected = st.checkbox("Automation")
-            other_selected = st.checkbox("Other")
-        
-        # Initialize variables with defaults
-        spatial_completed = spatial_hours = 0
-        textual_completed = textual_hours = 0
-        qa_completed = qa_hours = 0
-        qc_completed = qc_hours = 0
-        automation_completed = automation_hours = 0
-        other_completed = other_hours = 0
-        overtime_hours = 0.0
-        base_total = 0.0
-        calculated_total = 0.0
-
-        spatial_batches = textual_batches = qa_batches = []
-        qc_batches = automation_batches = other_batches = []
-
-        task_entries = []
-
-        # Task details outside form for live updates
-        if any([spatial_selected, textual_selected, qa_selected, qc_selected, automation_selected, other_selected]):
-            st.markdown("---")
-            st.markdown("**Task Details**")
-
-            details_container = st.container()
+        # Task types, editors and totals rerun on their own while typing
+        _task_details_fragment(batch_options)
 
-            with details_container:
-                # Spatial Tasks
-                if spatial_selected:
-                    rows, spatial_completed, spatial_hours, spatial_batches = _render_task_entries(
-                        "Spatial", batch_options, "spatial"
-                    )
-                    task_entries += [{"task_type": "Spatial", **r} for r in rows]
-                
-                # Textual Tasks
-                if textual_selected:
-                    rows, textual_completed, textual_hours, textual_batches = _render_task_entries(
-                        "Textual", batch_options, "textual"
-                    )
-                    task_entries += [{"task_type": "Textual", **r} for r in rows]
-                
-                # QA Tasks
-                if qa_selected:
-                    rows, qa_completed, qa_hours, qa_batches = _render_task_entries(
-                        "QA", batch_options, "qa"
-                    )
-                    task_entries += [{"task_type": "QA", **r} for r in rows]
-                
-                # QC Tasks
-                if qc_selected:
-                    rows, qc_completed, qc_hours, qc_batches = _render_task_entries(
-                        "QC", batch_options, "qc"
-                    )
-                    task_entries += [{"task_type": "QC", **r} for r in rows]
-                
-                # Automation Tasks
-                if automation_selected:
-                    rows, automation_completed, automation_hours, automation_batches = _render_task_entries(
-                        "Automation", batch_options, "automation", completed_max=100.0
-                    )
-                    task_entries += [{"task_type": "Automation", **r} for r in rows]
-                
-                # Other Tasks
-                if other_selected:
-                    rows, other_completed, other_hours, other_batches = _render_task_entries(
-                        "Other", batch_options, "other", allow_empty_batch=True
-                    )
-                    task_entries += [{"task_type": "Other", **r} for r in rows]
-
-            # Calculate total hours (exclude overtime)
-            base_total = (spatial_hours + textual_hours + qa_hours + 
-                         qc_hours + automation_hours + other_hours)
-            calculated_total = base_total
-            st.metric("Total Hours", f"{calculated_total:.2f} hours")
-
-            # Over time hours after total hours (not included in total)
-            overtime_hours = st.number_input(
-                "Over Time Hours (optional)",
-                min_value=0.0,
-                step=0.1,
-                format="%.2f",
-                value=st.session_state.get("overtime_hours_input", 0.0),
-                key="overtime_hours_input",
-                help="Use the Submit button below to save changes."
-            )
+        # Full run (e.g. submit): read the fragment's widgets back from session state
+        selected_types = [label for label in task_validation.TASK_TYPES if st.session_state.get(_task_type_key(label))]
+        frames = {
+            label: st.session_state.get(f"{task_validation.TASK_TYPES[label].key}_entries_state", [])
+            for label in selected_types
+        }
+        validation = task_validation.validate_task_frames(frames, selected=selected_types)
+        calculated_total = validation.total_hours
+        overtime_hours = st.session_state.get("overtime_hours_input", 0.0) if selected_types else 0.0
 
         # Now create form with notes and submit
         with st.form("daily_task_form", clear_on_submit=False):
@@ -1013,32 +1159,11 @@ def show_daily_task_entry():
                     errors.append("Please select a user")
 
                 # Check if at least one task type is selected
-                selected_tasks = [spatial_selected, textual_selected, qa_selected, qc_selected, automation_selected, other_selected]
-                if not any(selected_tasks):
+                if not selected_types:
                     errors.append("Please select at least one task type")
 
-                # Validate selected task types have required rows
-                def _has_entries(task_type):
-                    return any(e["task_type"] == task_type for e in task_entries)
-
-                if spatial_selected and not _has_entries("Spatial"):
-                    errors.append("Spatial task requires at least one valid row")
-                if textual_selected and not _has_entries("Textual"):
-                    errors.append("Textual task requires at least one valid row")
-                if qa_selected and not _has_entries("QA"):
-                    errors.append("QA task requires at least one valid row")
-                if qc_selected and not _has_entries("QC"):
-                    errors.append("QC task requires at least one valid row")
-                if automation_selected and not _has_entries("Automation"):
-                    errors.append("Automation task requires at least one valid row")
-                # Other tasks can be selected without entries
-
-                # Recalculate to ensure total hours exclude overtime
-                calculated_total = (spatial_hours + textual_hours + qa_hours + 
-                                    qc_hours + automation_hours + other_hours)
-
-                if any(selected_tasks) and calculated_total > 8:
-                    errors.append("Total hours must be 8 or less")
+                # Task types without valid rows (incomplete rows are skipped), total hours above the limit
+                errors.extend(validation.error_messages())
 
                 if errors:
                     for error in errors:
@@ -1046,137 +1171,170 @@ def show_daily_task_entry():
                 else:
                     # Save data
                     try:
-                        save_task_submission({
+                        submission = {
                             'submission_date': submission_date,
                             'user_names': user_name,
-                            'spatial_completed': spatial_completed,
-                            'spatial_hours': spatial_hours,
-                            'spatial_batches': json.dumps(spatial_batches),
-                            'textual_completed': textual_completed,
-                            'textual_hours': textual_hours,
-                            'textual_batches': json.dumps(textual_batches),
-                            'qa_completed': qa_completed,
-                            'qa_hours': qa_hours,
-                            'qa_batches': json.dumps(qa_batches),
-                            'qc_completed': qc_completed,
-                            'qc_hours': qc_hours,
-                            'qc_batches': json.dumps(qc_batches),
-                            'automation_completed': automation_completed,
-                            'automation_hours': automation_hours,
-                            'automation_batches': json.dumps(automation_batches),
-                            'other_completed': other_completed,
-                            'other_hours': other_hours,
-                            'other_batches': json.dumps(other_batches),
+                        }
+                        for task_type, spec in task_validation.TASK_TYPES.items():
+                            submission[f'{spec.key}_completed'] = validation.completed(task_type)
+                            submission[f'{spec.key}_hours'] = validation.hours(task_type)
+                            submission[f'{spec.key}_batches'] = json.dumps(validation.batches(task_type))
+                        submission.update({
                             'overtime_hours': overtime_hours,
                             'total_hours': calculated_total,
                             'note': note,
                             'submitted_by': user_name
-                        }, task_entries)
+                        })
+                        save_task_submission(submission, validation.entry_records())
 
-                        st.success("Task report submitted successfully!")
-                        st.cache_data.clear()
+                        if get_submission_journal() is not None:
+                            st.success("Task report submitted successfully! It will appear in the dashboards once synced.")
+                        else:
+                            st.success("Task report submitted successfully!")
+                        invalidate_submission_days([submission['submission_date']])
                         st.balloons()
 
                     except Exception as e:
                         st.error(f"Error submitting form: {str(e)}")
 
-def save_task_submission(data, task_entries):
-    """Save task submission data"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    if db_adapter.is_postgres and not st.session_state.get("db_tables_ready", False):
-        db_adapter.create_tables()
-        st.session_state.db_tables_ready = True
-    placeholder = "%s" if db_adapter.is_postgres else "?"
-    values_placeholder = ", ".join([placeholder] * 24)
-    
-    insert_sql = f'''
-    INSERT INTO task_submissions 
-    (submission_date, user_names, 
-     spatial_completed, spatial_hours, spatial_batches,
-     textual_completed, textual_hours, textual_batches,
-     qa_completed, qa_hours, qa_batches,
-     qc_completed, qc_hours, qc_batches,
-     automation_completed, automation_hours, automation_batches,
-     other_completed, other_hours, other_batches,
-    overtime_hours, total_hours, note, submitted_by)
-    VALUES ({values_placeholder})
+SUBMISSION_COLUMNS = [
+    'submission_date', 'user_names',
+    'spatial_completed', 'spatial_hours', 'spatial_batches',
+    'textual_completed', 'textual_hours', 'textual_batches',
+    'qa_completed', 'qa_hours', 'qa_batches',
+    'qc_completed', 'qc_hours', 'qc_batches',
+    'automation_completed', 'automation_hours', 'automation_batches',
+    'other_completed', 'other_hours', 'other_batches',
+    'overtime_hours', 'total_hours', 'note', 'submitted_by'
+]
+
+_INSERT_SUBMISSION_SQL = f'''
+    INSERT INTO task_submissions ({", ".join(SUBMISSION_COLUMNS)})
+    VALUES ({", ".join(["?"] * len(SUBMISSION_COLUMNS))})
     '''
+INSERT_SUBMISSION = db_adapter.statement(
+    "insert_submission", _INSERT_SUBMISSION_SQL, _INSERT_SUBMISSION_SQL + " RETURNING id"
+)
+# Idempotency keys are only used with PostgreSQL
+INSERT_SUBMISSION_IDEMPOTENT = db_adapter.statement("insert_submission_idempotent", f'''
+    INSERT INTO task_submissions ({", ".join(SUBMISSION_COLUMNS)}, idempotency_key)
+    VALUES ({", ".join(["?"] * (len(SUBMISSION_COLUMNS) + 1))})
+    ON CONFLICT (idempotency_key, submission_date) DO NOTHING RETURNING id
+    ''')
+INSERT_TASK_ENTRY = db_adapter.statement("insert_task_entry", '''
+    INSERT INTO task_entries
+    (submission_id, submission_date, user_name, task_type, batch, completed, hours)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''')
 
-    if db_adapter.is_postgres:
-        insert_sql += " RETURNING id"
-
-    cursor.execute(insert_sql, (
-        data['submission_date'],
-        data['user_names'],
-        data['spatial_completed'],
-        data['spatial_hours'],
-        data['spatial_batches'],
-        data['textual_completed'],
-        data['textual_hours'],
-        data['textual_batches'],
-        data['qa_completed'],
-        data['qa_hours'],
-        data['qa_batches'],
-        data['qc_completed'],
-        data['qc_hours'],
-        data['qc_batches'],
-        data['automation_completed'],
-        data['automation_hours'],
-        data['automation_batches'],
-        data['other_completed'],
-        data['other_hours'],
-        data['other_batches'],
-        data['overtime_hours'],
-        data['total_hours'],
-        data['note'],
-        data['submitted_by']
-    ))
+def _insert_submission_row(cursor, data, idempotency_key=None):
+    """Insert one task_submissions row and return its id.
 
-    if db_adapter.is_postgres:
-        submission_id = cursor.fetchone()[0]
+    With an idempotency key (PostgreSQL only) a replayed submission is
+    skipped and None is returned.
+    """
+    values = [data[col] for col in SUBMISSION_COLUMNS]
+    if idempotency_key:
+        db_adapter.run(cursor, INSERT_SUBMISSION_IDEMPOTENT, tuple(values) + (idempotency_key,))
     else:
-        submission_id = cursor.lastrowid
+        db_adapter.run(cursor, INSERT_SUBMISSION, tuple(values))
 
-    # Insert task entries (per batch)
-    entry_placeholder = "%s" if db_adapter.is_postgres else "?"
-    entry_values_placeholder = ", ".join([entry_placeholder] * 7)
-    entry_sql = f'''
-    INSERT INTO task_entries
-    (submission_id, submission_date, user_name, task_type, batch, completed, hours)
-    VALUES ({entry_values_placeholder})
-    '''
+    if db_adapter.is_postgres:
+        row = cursor.fetchone()
+        return row[0] if row else None
+    return cursor.lastrowid
+
+def _insert_task_entries(cursor, submission_id, data, task_entries):
+    """Insert the per-batch task_entries rows of a submission"""
+    rows = [
+        (
+            submission_id,
+            data['submission_date'],
+            data['user_names'],
+            entry['task_type'],
+            entry['batch'],
+            entry['completed'],
+            entry['hours']
+        )
+        for entry in task_entries
+    ]
+    if rows:
+        db_adapter.run_many(cursor, INSERT_TASK_ENTRY, rows)
 
+def _flush_journal_batch(items):
+    """Write journaled submissions to PostgreSQL in one transaction (write-behind flusher)"""
+    conn = db_adapter.get_connection()
+    failures = {}
     try:
-        for entry in task_entries:
-            cursor.execute(entry_sql, (
-                submission_id,
-                data['submission_date'],
-                data['user_names'],
-                entry['task_type'],
-                entry['batch'],
-                entry['completed'],
-                entry['hours']
-            ))
-    except Exception as e:
-        if db_adapter.is_postgres and "task_entries" in str(e):
-            db_adapter.create_tables()
-            st.session_state.db_tables_ready = True
-            for entry in task_entries:
-                cursor.execute(entry_sql, (
-                    submission_id,
-                    data['submission_date'],
-                    data['user_names'],
-                    entry['task_type'],
-                    entry['batch'],
-                    entry['completed'],
-                    entry['hours']
-                ))
-        else:
-            raise
+        conn.autocommit = False
+        cursor = conn.cursor()
+        for key, data, task_entries in items:
+            cursor.execute("SAVEPOINT journal_item")
+            try:
+                submission_id = _insert_submission_row(cursor, data, idempotency_key=key)
+                # None means this key was already written by an earlier flush
+                if submission_id is not None:
+                    _insert_task_entries(cursor, submission_id, data, task_entries)
+                cursor.execute("RELEASE SAVEPOINT journal_item")
+            except Exception as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT journal_item")
+                failures[key] = e
+        conn.commit()
+    finally:
+        conn.close()
+    return failures
 
-    conn.commit()
-    conn.close()
+def _on_journal_flushed(items):
+    # Flushed submissions become visible in the dashboards
+    invalidate_submission_days([data["submission_date"] for _, data, _ in items])
+
+def get_submission_journal():
+    """Write-behind journal for PostgreSQL submissions, or None when not in use"""
+    if not (WRITE_BEHIND_ENABLED and db_adapter.is_postgres):
+        return None
+    return write_behind.get_journal(
+        _flush_journal_batch,
+        on_flushed=_on_journal_flushed,
+        prepare=db_adapter.create_tables
+    )
+
+def save_task_submission(data, task_entries):
+    """Save task submission data"""
+    mark_session_write()
+    journal = get_submission_journal()
+    if journal is not None:
+        # Acknowledged once stored locally; the flusher replays it to PostgreSQL
+        return journal.enqueue(data, task_entries)
+
+    if db_adapter.is_postgres and not st.session_state.get("db_tables_ready", False):
+        db_adapter.create_tables()
+        st.session_state.db_tables_ready = True
+
+    if db_adapter.uses_sqlite_writer:
+        # Queued to the single SQLite writer, which group-commits concurrent submissions
+        def _write(cursor):
+            submission_id = _insert_submission_row(cursor, data)
+            _insert_task_entries(cursor, submission_id, data, task_entries)
+            return submission_id
+        return db_adapter.run_write(_write)
+
+    conn = get_database_connection()
+    cursor = conn.cursor()
+    try:
+        submission_id = _insert_submission_row(cursor, data)
+        try:
+            _insert_task_entries(cursor, submission_id, data, task_entries)
+        except Exception as e:
+            if db_adapter.is_postgres and "task_entries" in str(e):
+                db_adapter.create_tables()
+                st.session_state.db_tables_ready = True
+                _insert_task_entries(cursor, submission_id, data, task_entries)
+            else:
+                raise
+        conn.commit()
+    finally:
+        conn.close()
+    return submission_id
 
 # Ensure Add New User updates the user list
 @st.cache_data(ttl=600)
@@ -1190,6 +1348,7 @@ def add_new_user(new_user):
     else:
         st.warning(f"User '{new_user}' already exists.")
 
+@tracing.traced(kind="page")
 def show_performance_overview():
     """Performance overview page"""
     st.header("Performance Overview")
@@ -1206,8 +1365,17 @@ def show_performance_overview():
         if st.button("Refresh Data", use_container_width=True):
             st.rerun()
     
-    # Get data
-    df = get_submissions_in_range(start_date, end_date)
+    # Get submissions and per-batch entries in parallel (the aggregate views are not per team)
+    team = current_team()
+    if team:
+        st.caption(f"Team: {team}")
+    use_views = aggregate_views_usable() and team is None
+    page_data = load_concurrently({
+        "submissions": lambda: get_submissions_in_range(start_date, end_date, team),
+        "entries": lambda: get_batch_entries(start_date, end_date, use_views, team),
+        "user_totals": lambda: get_view_totals(materialized_views.user_totals, start_date, end_date) if use_views else None,
+    }, page="Performance Overview")
+    df = page_data["submissions"]
     
     if not df.empty:
         # Overview metrics
@@ -1232,55 +1400,127 @@ def show_performance_overview():
             st.metric("Total Hours", f"{total_hours:.1f}")
         
         # Visualization charts
-        tab1, tab2, tab3 = st.tabs(["Trends", "Team Performance", "Batch Analysis"])
+        tab1, tab2, tab3, tab4 = st.tabs(["Trends", "Team Performance", "Batch Analysis", "Anomalies"])
         
         with tab1:
             show_trend_charts(df)
         
         with tab2:
-            show_team_performance(df)
+            show_team_performance(df, page_data["user_totals"])
         
         with tab3:
-            show_batch_analysis(df)
+            show_batch_analysis(df, page_data["entries"])
+        
+        with tab4:
+            show_anomalies(start_date, end_date, team)
             
     else:
         st.info("No data available for the selected date range")
 
-@st.cache_data(ttl=300)
-def get_submissions_in_range(start_date, end_date):
-    """Get submissions within date range"""
-    conn = get_database_connection()
-    placeholder = "%s" if db_adapter.is_postgres else "?"
-    query = f'''
-    SELECT * FROM task_submissions 
-    WHERE submission_date BETWEEN {placeholder} AND {placeholder}
-    ORDER BY submission_date DESC
-    '''
+@run_memo.memoized
+def get_submissions_in_range(start_date, end_date, team=None):
+    """Get submissions within date range (of one team's members when ``team`` is set)"""
     try:
-        df = pd.read_sql_query(query, conn, params=[start_date, end_date])
+        return history_data.submissions_in_range(start_date, end_date, team)
     except Exception:
-        df = pd.DataFrame()
+        return pd.DataFrame()
+
+@run_memo.memoized
+def get_task_entries_in_range(start_date, end_date, team=None):
+    """Get task entries within date range (of one team's members when ``team`` is set)"""
+    try:
+        return history_data.task_entries_in_range(start_date, end_date, team)
+    except Exception:
+        return pd.DataFrame()
+
+ALL_TEAMS = "All Teams"
+
+@run_memo.memoized
+@tracing.traced_loader(shared_cache.cached(ttl=300))
+def get_team_functions() -> List[str]:
+    """Team functions of the active users"""
+    conn = get_read_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT DISTINCT team_function FROM user_profiles "
+            "WHERE active = TRUE AND team_function IS NOT NULL AND team_function <> '' "
+            "ORDER BY team_function"
+        )
+        return [row[0] for row in cursor.fetchall()]
     finally:
         conn.close()
-    return df
 
-@st.cache_data(ttl=600)
-def get_task_entries_in_range(start_date, end_date):
-    """Get task entries within date range"""
-    conn = get_database_connection()
-    placeholder = "%s" if db_adapter.is_postgres else "?"
-    query = f'''
-    SELECT submission_date, user_name, task_type, batch, completed, hours
-    FROM task_entries
-    WHERE submission_date BETWEEN {placeholder} AND {placeholder}
-    '''
+TEAM_MEMBER_NAMES = db_adapter.statement("team_member_names", history_data.TEAM_MEMBERS)
+
+@run_memo.memoized
+@tracing.traced_loader(shared_cache.cached(ttl=300))
+def get_team_member_names(team: str) -> List[str]:
+    """Users of one team function, including deactivated ones (their history still counts)"""
+    conn = get_read_connection()
     try:
-        df = pd.read_sql_query(query, conn, params=[start_date, end_date])
-    except Exception:
-        df = pd.DataFrame()
+        return db_adapter.query_df(TEAM_MEMBER_NAMES, (team,), conn=conn)["user_name"].tolist()
     finally:
         conn.close()
-    return df
+
+def current_team() -> Optional[str]:
+    """Team the admin scoped the pages to, or None for all teams"""
+    team = st.session_state.get("team_scope")
+    return None if team in (None, ALL_TEAMS) else team
+
+def show_team_scope_selector():
+    """Admin sidebar filter scoping Overview, Data Management and Export to one team"""
+    try:
+        teams = get_team_functions()
+    except Exception as e:
+        # Keep any scope already chosen; the selector comes back on the next rerun
+        st.sidebar.warning(f"Team list unavailable: {e}")
+        return
+    if not teams:
+        return
+    options = [ALL_TEAMS] + teams
+    if st.session_state.get("team_scope") not in options:
+        st.session_state.team_scope = ALL_TEAMS
+    st.sidebar.selectbox("Team", options, key="team_scope")
+
+def lazy_tabs(labels, key, keep=()):
+    """Tab strip where only the selected section runs; returns its label.
+
+    st.tabs runs every tab body on each rerun. Here the other sections are
+    skipped entirely, so a page should load only the data the returned
+    section uses. Widgets that are not rendered lose their state, so the
+    widget keys in ``keep`` are carried over while their section is hidden.
+    """
+    for widget_key in keep:
+        if widget_key in st.session_state:
+            st.session_state[widget_key] = st.session_state[widget_key]
+    if st.session_state.get(key) not in labels:
+        st.session_state[key] = labels[0]
+    return st.radio(key, labels, key=key, horizontal=True, label_visibility="collapsed")
+
+def get_batch_entries(start_date, end_date, use_views=False, team=None):
+    """Per-batch rows for batch analysis: view totals per task type and batch, else raw task entries"""
+    if use_views:
+        totals = get_view_totals(materialized_views.batch_totals, start_date, end_date)
+        if totals is not None:
+            # The view stores a missing batch as ''; keep it missing like the raw rows
+            totals['batch'] = totals['batch'].replace('', None)
+            return totals
+    return get_task_entries_in_range(start_date, end_date, team)
+
+def invalidate_team_scopes():
+    """Team membership changed: the cached team slices of the history are stale"""
+    history_data.invalidate_days()
+
+def invalidate_submission_days(days=None):
+    """Drop cached data after submissions on ``days`` changed (every day when None)"""
+    days = list(days) if days is not None else None
+    history_data.invalidate_days(days)
+    anomaly_detection.invalidate(days)
+    clear_caches()
+    refresher = materialized_views.active_refresher()
+    if refresher is not None:
+        refresher.mark_dirty()
 
 def show_trend_charts(df):
     """Show trend charts"""
@@ -1329,18 +1569,24 @@ def show_trend_charts(df):
     fig2.update_layout(height=400)
     st.plotly_chart(fig2, use_container_width=True)
 
-def show_team_performance(df):
-    """Show team performance"""
+def show_team_performance(df, user_totals=None):
+    """Show team performance (``user_totals``: per-user sums from the aggregate view)"""
     # User performance
-    user_performance = df.groupby('user_names').agg({
-        'spatial_completed': 'sum',
-        'textual_completed': 'sum',
-        'qa_completed': 'sum',
-        'qc_completed': 'sum',
-        'automation_completed': 'sum',
-        'other_completed': 'sum',
-        'total_hours': 'sum'
-    }).round(2)
+    if user_totals is not None:
+        user_performance = user_totals.set_index('user_names')[[
+            'spatial_completed', 'textual_completed', 'qa_completed', 'qc_completed',
+            'automation_completed', 'other_completed', 'total_hours'
+        ]].astype(float).round(2)
+    else:
+        user_performance = df.groupby('user_names').agg({
+            'spatial_completed': 'sum',
+            'textual_completed': 'sum',
+            'qa_completed': 'sum',
+            'qc_completed': 'sum',
+            'automation_completed': 'sum',
+            'other_completed': 'sum',
+            'total_hours': 'sum'
+        }).round(2)
     
     user_performance['total_tasks'] = (user_performance['spatial_completed'] + 
                                       user_performance['textual_completed'] + 
@@ -1352,14 +1598,14 @@ def show_team_performance(df):
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.bar(user_performance.reset_index(), x='user_name', y='total_tasks',
+        fig = px.bar(user_performance.reset_index(), x='user_names', y='total_tasks',
                     title="Total Tasks by User")
         fig.update_xaxes(tickangle=45)
         fig.update_layout(height=400)
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
-        fig = px.bar(user_performance.reset_index(), x='user_name', y='total_hours',
+        fig = px.bar(user_performance.reset_index(), x='user_names', y='total_hours',
                     title="Total Hours by User")
         fig.update_xaxes(tickangle=45)
         fig.update_layout(height=400)
@@ -1371,15 +1617,43 @@ def show_team_performance(df):
     user_performance = user_performance.round(2)
     st.dataframe(user_performance, use_container_width=True)
 
-def show_batch_analysis(df):
+# Baselines come from the raising history reader, so a failed read is never mistaken for an empty day
+anomaly_scanner = anomaly_detection.AnomalyScanner(history_data.submissions_in_range)
+
+def show_anomalies(start_date, end_date, team=None):
+    """User-days far from the user's own baseline (completed, hours, tasks per hour)"""
+    try:
+        flagged = anomaly_scanner.scan(start_date, end_date)
+        if team and not flagged.empty:
+            flagged = flagged[flagged["user_names"].isin(get_team_member_names(team))]
+    except Exception as e:
+        st.error(f"Anomaly scan failed: {e}")
+        return
+    st.caption(
+        f"Each user is compared with their own recent submissions; days with |z| ≥ "
+        f"{anomaly_detection.Z_THRESHOLD:g} on any measure are listed."
+    )
+    if flagged.empty:
+        st.success("No unusual days in the selected range")
+        return
+    st.dataframe(
+        flagged[["submission_date", "user_names", "completed", "hours", "efficiency", "reason"]].round(2),
+        use_container_width=True,
+        hide_index=True
+    )
+
+def show_batch_analysis(df, batch_df=None):
     """Show batch analysis"""
     if df.empty:
         st.info("No data available for batch analysis")
         return
 
-    start_date = pd.to_datetime(df['submission_date']).min().date()
-    end_date = pd.to_datetime(df['submission_date']).max().date()
-    batch_df = get_task_entries_in_range(start_date, end_date)
+    if batch_df is None:
+        start_date = pd.to_datetime(df['submission_date']).min().date()
+        end_date = pd.to_datetime(df['submission_date']).max().date()
+        batch_df = get_task_entries_in_range(start_date, end_date)
+    else:
+        batch_df = batch_df.copy()
 
     if not batch_df.empty:
         batch_df['task_type'] = batch_df['task_type'].astype(str).str.strip().str.title()
@@ -1419,17 +1693,45 @@ def show_batch_analysis(df):
         )
         st.dataframe(batch_task_pivot, use_container_width=True)
 
+EXPORT_WIDGET_KEYS = ("export_dataset", "export_format", "export_start_date", "export_end_date")
+
+@tracing.traced(kind="page")
 def show_data_management():
     """Data management page"""
     st.header("Data Management")
 
+    team = current_team()
+    if team:
+        st.caption(f"Team: {team}")
+
     if st.session_state.get("is_admin", False):
-        tab1, tab2, tab3, tab4 = st.tabs(["View All Data", "Edit Records", "Export Data", "Data Cleanup"])
+        section = lazy_tabs(
+            ["View All Data", "Edit Records", "Export Data", "Data Cleanup", "Bulk Import"],
+            key="data_management_section", keep=EXPORT_WIDGET_KEYS
+        )
     else:
-        tab1 = st.tabs(["View All Data"])[0]
-        st.info("Admin access is required for Edit Records, Export Data, and Data Cleanup.")
+        section = lazy_tabs(["View All Data"], key="data_management_section")
+        st.info("Admin access is required for Edit Records, Export Data, Data Cleanup, and Bulk Import.")
+
+    # Only the open section's datasets, fetched in parallel (only the scoped team's rows)
+    loaders = {}
+    if section in ("View All Data", "Edit Records"):
+        loaders["users"] = load_users_from_file
+        if team:
+            loaders["team_members"] = lambda: get_team_member_names(team)
+    if section == "View All Data":
+        loaders["submissions"] = lambda: get_all_submissions(team)
+    try:
+        page_data = load_concurrently(loaders, page="Data Management") if loaders else {}
+    except Exception as e:
+        # e.g. the team's member list: an empty one would hide every user
+        st.error(f"Failed to load data: {e}")
+        return
+    if team and "users" in page_data:
+        members = set(page_data["team_members"])
+        page_data["users"] = [user for user in page_data["users"] if user in members]
 
-    with tab1:
+    if section == "View All Data":
         st.subheader("All Task Submissions")
         
         if "data_filters" not in st.session_state:
@@ -1444,7 +1746,7 @@ def show_data_management():
                     value=st.session_state.data_filters.get("date")
                 )
             with col2:
-                user_options = ["All Users"] + load_users_from_file()
+                user_options = ["All Users"] + page_data["users"]
                 current_user = st.session_state.data_filters.get("user", "All Users")
                 try:
                     user_index = user_options.index(current_user)
@@ -1459,7 +1761,7 @@ def show_data_management():
 
         # Apply filters
         filters = st.session_state.data_filters
-        df = get_all_submissions()
+        df = page_data["submissions"]
         
         if filters.get("date"):
             df = df[pd.to_datetime(df['submission_date']).dt.date == filters["date"]]
@@ -1476,7 +1778,7 @@ def show_data_management():
                 try:
                     start_date = pd.to_datetime(df['submission_date']).min().date()
                     end_date = pd.to_datetime(df['submission_date']).max().date()
-                    entries_df = get_task_entries_in_range(start_date, end_date)
+                    entries_df = get_task_entries_in_range(start_date, end_date, team)
                 except Exception:
                     entries_df = pd.DataFrame()
 
@@ -1495,18 +1797,55 @@ def show_data_management():
             st.info("No data matches the current filters")
     
     if st.session_state.get("is_admin", False):
-        with tab2:
+        if section == "Edit Records":
             st.subheader("Edit Task Records")
-            
-            df = get_all_submissions()
-            if not df.empty:
-                # Select record to edit
-                selected_id = st.selectbox("Select Record to Edit", df['id'].tolist(), 
-                                         format_func=lambda x: f"ID {x} - {df[df['id']==x]['user_names'].iloc[0]} - {df[df['id']==x]['submission_date'].iloc[0]}")
-                
-                if selected_id:
-                    record = df[df['id'] == selected_id].iloc[0]
-                    
+
+            if "edit_filters" not in st.session_state:
+                st.session_state.edit_filters = {"user": "All Users", "date": None, "id": 0}
+
+            with st.form("edit_search_form"):
+                col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
+                with col1:
+                    user_options = ["All Users"] + page_data["users"]
+                    current_user = st.session_state.edit_filters["user"]
+                    search_user = st.selectbox(
+                        "User", user_options,
+                        index=user_options.index(current_user) if current_user in user_options else 0
+                    )
+                with col2:
+                    search_date = st.date_input("Date", value=st.session_state.edit_filters["date"])
+                with col3:
+                    search_id = st.number_input("ID", min_value=0, step=1, value=st.session_state.edit_filters["id"])
+                with col4:
+                    st.write("")
+                    search = st.form_submit_button("Search")
+
+            if search:
+                st.session_state.edit_filters = {"user": search_user, "date": search_date, "id": int(search_id)}
+
+            filters = st.session_state.edit_filters
+            try:
+                matches = search_submissions(
+                    user=None if filters["user"] == "All Users" else filters["user"],
+                    on_date=filters["date"],
+                    record_id=filters["id"] or None,
+                    team=team,
+                )
+            except Exception as e:
+                st.error(f"Record search failed: {e}")
+                matches = None
+            if matches is not None and not matches.empty:
+                # id -> row of this page of results, for O(1) labels
+                labels = {
+                    int(row.id): f"ID {row.id} - {row.user_names} - {str(row.submission_date)[:10]}"
+                    for row in matches.itertuples(index=False)
+                }
+                if len(matches) >= EDIT_SEARCH_LIMIT:
+                    st.caption(f"Showing the newest {EDIT_SEARCH_LIMIT} matches; narrow the search to find older records.")
+                selected_id = st.selectbox("Select Record to Edit", list(labels), format_func=labels.get)
+                record = get_submission_by_id(selected_id)
+
+                if record is not None:
                     # Edit form
                     with st.form(f"edit_form_{selected_id}"):
                         st.write(f"Editing Record ID: {selected_id}")
@@ -1526,30 +1865,36 @@ def show_data_management():
                                 st.rerun()
                             else:
                                 st.error("Please confirm deletion before proceeding")
-            else:
-                st.info("No records to edit")
+                else:
+                    st.info("This record no longer exists")
+            elif matches is not None:
+                st.info("No records match the search")
 
-        with tab3:
+        if section == "Export Data":
             st.subheader("Export Data")
             
             export_dataset = st.selectbox(
                 "Export Dataset",
-                ["Task Submissions (summary)", "Task Entries (per batch)"]
+                ["Task Submissions (summary)", "Task Entries (per batch)"],
+                key="export_dataset"
             )
 
-            export_format = st.radio("Export Format", ["Excel", "CSV", "JSON"])
+            export_format = st.radio("Export Format", ["Excel", "CSV", "JSON"], key="export_format")
             
+            # Defaults through session state, so kept values do not clash with a widget default
+            st.session_state.setdefault("export_start_date", date.today() - timedelta(days=30))
+            st.session_state.setdefault("export_end_date", date.today())
             col1, col2 = st.columns(2)
             with col1:
-                export_start_date = st.date_input("Export Start Date", value=date.today()-pd.Timedelta(days=30))
+                export_start_date = st.date_input("Export Start Date", key="export_start_date")
             with col2:
-                export_end_date = st.date_input("Export End Date", value=date.today())
+                export_end_date = st.date_input("Export End Date", key="export_end_date")
             
             if st.button("Export Data"):
                 if export_dataset == "Task Entries (per batch)":
-                    df = get_task_entries_in_range(export_start_date, export_end_date)
+                    df = get_task_entries_in_range(export_start_date, export_end_date, team)
                 else:
-                    df = get_submissions_in_range(export_start_date, export_end_date)
+                    df = get_submissions_in_range(export_start_date, export_end_date, team)
                     df = _prepare_export_df(df)
                 
                 if export_format == "Excel":
@@ -1580,24 +1925,41 @@ def show_data_management():
                         "application/json"
                     )
     
-        with tab4:
+        if section == "Data Cleanup":
             st.subheader("Data Cleanup")
-            st.warning("Use these options carefully. Deleted data cannot be recovered.")
+            st.warning("Use these options carefully. Deleted data cannot be recovered. They affect every team.")
+            if team:
+                # The team scope does not apply here: keep a scoped admin from wiping other teams
+                st.info(f"Cleanup is disabled while the Team filter is set to {team}. Select {ALL_TEAMS} in the sidebar to use it.")
             
             col1, col2 = st.columns(2)
             
             with col1:
-                if st.button("Delete Old Records (>90 days)", type="secondary"):
+                retention_days = st.number_input("Keep last N days", min_value=1, value=90, step=1)
+                archive_old = st.checkbox("Archive to Parquet before deleting", value=True)
+                if st.button(f"Delete Old Records of All Teams (>{retention_days} days)", type="secondary", disabled=bool(team)):
                     if st.session_state.get('confirm_delete', False):
-                        delete_old_records(90)
-                        st.success("Old records deleted")
+                        progress_bar = st.progress(0.0, text="Archiving and deleting old records...")
+
+                        def _report_progress(done, total):
+                            progress_bar.progress(done / total if total else 1.0, text=f"{done} / {total} submissions")
+
+                        result = delete_old_records(retention_days, archive=archive_old, progress=_report_progress)
+                        st.success(
+                            f"Deleted {result['submissions']} submissions and {result['entries']} task entries "
+                            f"in {result['batches']} batches"
+                            + (f", {result['partitions_dropped']} monthly partitions dropped" if result['partitions_dropped'] else "")
+                            + (f" (plus {result['orphans']} orphaned entries)" if result['orphans'] else "")
+                        )
+                        if result['archive_files']:
+                            st.info(f"Archived to {os.path.dirname(result['archive_files'][0])}")
                         del st.session_state.confirm_delete
                     else:
                         st.session_state.confirm_delete = True
                         st.warning("Click again to confirm deletion")
             
             with col2:
-                if st.button("Reset All Data", type="secondary"):
+                if st.button("Reset All Data (All Teams)", type="secondary", disabled=bool(team)):
                     if st.session_state.get('confirm_reset', False):
                         reset_all_data()
                         st.success("All data reset")
@@ -1606,41 +1968,173 @@ def show_data_management():
                         st.session_state.confirm_reset = True
                         st.warning("Click again to confirm reset")
 
+        if section == "Bulk Import":
+            st.subheader("Bulk Import")
+            st.caption(
+                "Upload historical task entries as CSV or Excel, one row per batch with date (YYYY-MM-DD), user, "
+                "task type, batch, completed and hours columns (note is optional). "
+                "Rows are grouped into one submission per user and day."
+            )
+            uploaded = st.file_uploader("Entries file", type=["csv", "xlsx"], key="bulk_import_file")
+            col1, col2 = st.columns(2)
+            with col1:
+                existing_days = st.radio(
+                    "Days that already have a submission", ["Skip", "Replace"], horizontal=True,
+                    key="bulk_import_existing"
+                )
+            with col2:
+                enforce_hours = st.checkbox(
+                    f"Reject days above {task_validation.MAX_TOTAL_HOURS:g} hours", value=True
+                )
+
+            if uploaded is not None:
+                dry_run = st.button("Validate Only")
+                run_import = st.button("Import", type="primary")
+                if dry_run or run_import:
+                    with st.spinner("Importing..." if run_import else "Validating..."):
+                        try:
+                            result = run_bulk_import(
+                                uploaded, uploaded.name,
+                                replace_existing=existing_days == "Replace",
+                                max_total_hours=task_validation.MAX_TOTAL_HOURS if enforce_hours else None,
+                                dry_run=not run_import,
+                            )
+                        except ValueError as e:
+                            st.error(str(e))
+                            result = None
+                    if result is not None:
+                        summary = result.summary()
+                        verb = "Imported" if run_import else "Would import"
+                        st.success(
+                            f"{verb} {summary['submissions_created']} submissions "
+                            f"({summary['entries_loaded']} entries) from {summary['rows_read']} rows "
+                            f"in {summary['seconds']:.1f} s"
+                        )
+                        if summary["submissions_skipped_existing"]:
+                            st.info(f"{summary['submissions_skipped_existing']} user-days already had a submission")
+                        if summary["submissions_replaced_existing"]:
+                            replaced_verb = "Replaced" if run_import else "Would replace"
+                            st.info(f"{replaced_verb} the existing submissions of "
+                                    f"{summary['submissions_replaced_existing']} user-days")
+                        rejected = result.rejected_rows
+                        if not rejected.empty:
+                            st.warning(f"{len(rejected)} rows rejected")
+                            st.dataframe(rejected.head(1000), use_container_width=True, hide_index=True)
+                            st.download_button(
+                                "Download Rejected Rows",
+                                rejected.to_csv(index=False),
+                                f"bulk_import_rejected_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                                "text/csv"
+                            )
+
+
+@tracing.traced_loader(shared_cache.cached(ttl=120))
+def _load_all_submissions(team=None):
+    """All submissions (of one team's members when ``team`` is set); raises, so errors are never cached"""
+    placeholder = "%s" if db_adapter.is_postgres else "?"
+    conn = get_read_connection()
+    query = "SELECT * FROM task_submissions"
+    params = []
+    if team:
+        query += f" WHERE user_names IN (SELECT user_name FROM user_profiles WHERE team_function = {placeholder})"
+        params.append(team)
+    query += " ORDER BY submit_time DESC"
+    try:
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
 
-@st.cache_data(ttl=120)
-def get_all_submissions():
-    """Get all submission data"""
-    conn = get_database_connection()
-    query = "SELECT * FROM task_submissions ORDER BY submit_time DESC"
+@run_memo.memoized
+def get_all_submissions(team=None):
+    """Get all submission data (of one team's members when ``team`` is set)"""
     try:
-        df = pd.read_sql_query(query, conn)
+        return _load_all_submissions(team)
     except Exception:
-        df = pd.DataFrame()
+        return pd.DataFrame()
+
+@tracing.traced_loader(shared_cache.cached(ttl=120))
+def search_submissions(user=None, on_date=None, record_id=None, limit=EDIT_SEARCH_LIMIT, team=None):
+    """Newest submissions matching the filters, at most ``limit`` rows (id, date, user, hours)"""
+    placeholder = "%s" if db_adapter.is_postgres else "?"
+    conditions, params = [], []
+    if record_id:
+        conditions.append(f"id = {placeholder}")
+        params.append(int(record_id))
+    if user:
+        conditions.append(f"user_names = {placeholder}")
+        params.append(user)
+    if on_date:
+        conditions.append(f"submission_date = {placeholder}")
+        params.append(on_date)
+    if team:
+        conditions.append(f"user_names IN (SELECT user_name FROM user_profiles WHERE team_function = {placeholder})")
+        params.append(team)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+    SELECT id, submission_date, user_names, total_hours FROM task_submissions
+    {where}
+    ORDER BY id DESC
+    LIMIT {int(limit)}
+    """
+    conn = get_read_connection()
+    try:
+        # Errors propagate so a failed search is never cached as "no matches"
+        return pd.read_sql_query(query, conn, params=params)
     finally:
         conn.close()
-    return df
+
+SUBMISSION_BY_ID = db_adapter.statement("submission_by_id", "SELECT * FROM task_submissions WHERE id = ?")
+SUBMISSION_DATE_OF = db_adapter.statement(
+    "submission_date_of", "SELECT submission_date FROM task_submissions WHERE id = ?"
+)
+
+def get_submission_by_id(record_id):
+    """Current row of one submission from the primary, or None"""
+    conn = get_database_connection()
+    try:
+        df = db_adapter.query_df(SUBMISSION_BY_ID, (int(record_id),), conn=conn)
+    finally:
+        conn.close()
+    return None if df.empty else df.iloc[0]
+
+def _submission_date_of(cursor, record_id):
+    row = db_adapter.run(cursor, SUBMISSION_DATE_OF, (record_id,)).fetchone()
+    return row[0] if row else None
 
 def update_record(record_id, new_date, new_note):
     """Update record"""
+    mark_session_write()
     conn = get_database_connection()
     cursor = conn.cursor()
+    old_date = _submission_date_of(cursor, record_id)
     if db_adapter.is_postgres:
         cursor.execute(
             "UPDATE task_submissions SET submission_date = %s, note = %s WHERE id = %s",
             (new_date, new_note, record_id)
         )
+        cursor.execute(
+            "UPDATE task_entries SET submission_date = %s WHERE submission_id = %s",
+            (new_date, record_id)
+        )
     else:
         cursor.execute(
             "UPDATE task_submissions SET submission_date = ?, note = ? WHERE id = ?",
             (new_date, new_note, record_id)
         )
+        cursor.execute(
+            "UPDATE task_entries SET submission_date = ? WHERE submission_id = ?",
+            (new_date, record_id)
+        )
     conn.commit()
     conn.close()
+    invalidate_submission_days([old_date, new_date])
 
 def delete_record(record_id: int):
     """Delete a specific record and its task entries"""
+    mark_session_write()
     conn = get_database_connection()
     cursor = conn.cursor()
+    record_date = _submission_date_of(cursor, record_id)
     if db_adapter.is_postgres:
         cursor.execute("DELETE FROM task_entries WHERE submission_id = %s", (record_id,))
         cursor.execute("DELETE FROM task_submissions WHERE id = %s", (record_id,))
@@ -1649,33 +2143,34 @@ def delete_record(record_id: int):
         cursor.execute("DELETE FROM task_submissions WHERE id = ?", (record_id,))
     conn.commit()
     conn.close()
-    st.cache_data.clear()
-
-def delete_old_records(days):
-    """Delete old records"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    cutoff_date = date.today() - pd.Timedelta(days=days)
-    if db_adapter.is_postgres:
-        cursor.execute(
-            "DELETE FROM task_submissions WHERE submission_date < %s",
-            (cutoff_date,)
-        )
-    else:
-        cursor.execute(
-            "DELETE FROM task_submissions WHERE submission_date < ?",
-            (cutoff_date,)
-        )
-    conn.commit()
-    conn.close()
+    invalidate_submission_days([record_date])
+
+def delete_old_records(days, archive=True, progress=None):
+    """Archive and delete records older than ``days`` in bounded batches"""
+    mark_session_write()
+    cutoff_date = date.today() - timedelta(days=days)
+    result = retention.purge_before(db_adapter, cutoff_date, archive=archive, progress=progress)
+    invalidate_submission_days()
+    return result
+
+def run_bulk_import(source, filename, replace_existing=False, max_total_hours=task_validation.MAX_TOTAL_HOURS,
+                    dry_run=False):
+    """Validate and load a CSV/XLSX of historical task entries"""
+    submitted_by = st.session_state.get("current_user") or "Bulk Import"
+    result = bulk_import.import_file(
+        db_adapter, source, filename, submitted_by=submitted_by,
+        replace_existing=replace_existing, max_total_hours=max_total_hours, dry_run=dry_run
+    )
+    if not dry_run and result.submissions:
+        mark_session_write()
+        invalidate_submission_days(result.dates)
+    return result
 
 def reset_all_data():
     """Reset all data"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM task_submissions")
-    conn.commit()
-    conn.close()
+    mark_session_write()
+    retention.truncate_all(db_adapter)
+    invalidate_submission_days()
 
 def _format_batch_list(value):
     """Format batch list values for export display"""
@@ -1754,18 +2249,23 @@ def create_excel_entries_export(df):
         export_df.to_excel(writer, sheet_name='Task Entries', index=False)
     return output.getvalue()
 
+@tracing.traced(kind="page")
 def show_analytics():
     """Analytics page"""
     st.header("Analytics")
     
-    # Get data
-    df = get_all_submissions()
+    # Get data (only the scoped team's rows)
+    team = current_team()
+    if team:
+        st.caption(f"Team: {team}")
+    df = get_all_submissions(team)
     
     if not df.empty:
         tab1, tab2, tab3 = st.tabs(["KPI Dashboard", "Productivity Analysis", "Forecasting"])
         
         with tab1:
-            show_kpi_dashboard(df)
+            # The aggregate views are not per team
+            show_kpi_dashboard(df, use_views=team is None)
         
         with tab2:
             show_productivity_analysis(df)
@@ -1775,15 +2275,40 @@ def show_analytics():
     else:
         st.info("Not enough data for advanced analytics")
 
-def show_kpi_dashboard(df):
+def show_kpi_dashboard(df, use_views=True):
     """KPI dashboard"""
     st.subheader("Key Performance Indicators")
     
+    # Daily totals: from the aggregate views on PostgreSQL, else from the submissions
+    daily_kpis = user_totals = None
+    if use_views and aggregate_views_usable():
+        daily_kpis = get_view_totals(materialized_views.daily_totals)
+        user_totals = get_view_totals(materialized_views.user_totals)
+    if daily_kpis is not None and user_totals is not None:
+        daily_kpis = daily_kpis.set_index('submission_date')[[
+            'spatial_completed', 'textual_completed', 'qa_completed', 'qc_completed',
+            'automation_completed', 'other_completed', 'total_hours'
+        ]].astype(float)
+        unique_users = len(user_totals)
+    else:
+        daily_kpis = df.groupby('submission_date').agg({
+            'spatial_completed': 'sum',
+            'textual_completed': 'sum',
+            'qa_completed': 'sum',
+            'qc_completed': 'sum',
+            'automation_completed': 'sum',
+            'other_completed': 'sum',
+            'total_hours': 'sum'
+        })
+        unique_users = df['user_names'].nunique()
+    
+    daily_kpis['total_tasks'] = (daily_kpis['spatial_completed'] + daily_kpis['textual_completed'] + 
+                                daily_kpis['qa_completed'] + daily_kpis['qc_completed'] + 
+                                daily_kpis['automation_completed'] + daily_kpis['other_completed'])
+    
     # Calculate KPIs
-    total_tasks = (df['spatial_completed'] + df['textual_completed'] + 
-                  df['qa_completed'] + df['qc_completed'] + 
-                  df['automation_completed'] + df['other_completed']).sum()
-    total_hours = df['total_hours'].sum()
+    total_tasks = daily_kpis['total_tasks'].sum()
+    total_hours = daily_kpis['total_hours'].sum()
     
     # KPI cards
     kpi_col1, kpi_col2, kpi_col3, kpi_col4 = st.columns(4)
@@ -1796,31 +2321,17 @@ def show_kpi_dashboard(df):
         )
     
     with kpi_col2:
-        automation_ratio = df['automation_completed'].sum() / (total_tasks + 0.01) * 100
+        automation_ratio = daily_kpis['automation_completed'].sum() / (total_tasks + 0.01) * 100
         st.metric("Automation Ratio", f"{automation_ratio:.1f}%")
     
     with kpi_col3:
-        avg_daily_tasks = total_tasks / max(len(df['submission_date'].unique()), 1)
+        avg_daily_tasks = total_tasks / max(len(daily_kpis), 1)
         st.metric("Avg Daily Tasks", f"{avg_daily_tasks:.1f}")
     
     with kpi_col4:
-        unique_users = df['user_names'].nunique()
         st.metric("Active Users", unique_users)
     
     # KPI trends
-    daily_kpis = df.groupby('submission_date').agg({
-        'spatial_completed': 'sum',
-        'textual_completed': 'sum',
-        'qa_completed': 'sum',
-        'qc_completed': 'sum',
-        'automation_completed': 'sum',
-        'other_completed': 'sum',
-        'total_hours': 'sum'
-    })
-    
-    daily_kpis['total_tasks'] = (daily_kpis['spatial_completed'] + daily_kpis['textual_completed'] + 
-                                daily_kpis['qa_completed'] + daily_kpis['qc_completed'] + 
-                                daily_kpis['automation_completed'] + daily_kpis['other_completed'])
     daily_kpis['efficiency'] = daily_kpis['total_tasks'] / (daily_kpis['total_hours'] + 0.01)
     
     fig = px.line(daily_kpis.reset_index(), x='submission_date', y='efficiency',
@@ -1943,6 +2454,7 @@ def show_forecasting(df):
     else:
         st.info("Need at least 7 days of data for forecasting")
 
+@tracing.traced(kind="page")
 def show_configuration():
     """Configuration page for updating users and batches"""
     st.header("Configuration")
@@ -1951,9 +2463,20 @@ def show_configuration():
         st.warning("Admin access required to view configuration.")
         st.stop()
     
-    tab1, tab2, tab3 = st.tabs(["User Management", "Batch Management", "System Settings"])
+    section = lazy_tabs(
+        ["User Management", "Batch Management", "System Settings"],
+        key="configuration_section"
+    )
+
+    # Only the open section's dataset
+    loaders = {
+        "User Management": {"users": get_all_users_from_db if USE_CLOUD_DB else dict},
+        "Batch Management": {"batches": get_batch_options},
+        "System Settings": {"submissions": get_all_submissions},
+    }[section]
+    page_data = load_concurrently(loaders, page="Configuration")
     
-    with tab1:
+    if section == "User Management":
         st.subheader("User Management")
         
         # Architecture explanation
@@ -1975,7 +2498,7 @@ def show_configuration():
             """)
         
         # Get users from Supabase
-        users_dict = get_all_users_from_db() if USE_CLOUD_DB else {}
+        users_dict = page_data["users"]
         
         # Fallback to PM.xlsx for local testing
         if not users_dict:
@@ -1999,7 +2522,7 @@ def show_configuration():
         with col2:
             st.markdown("**Actions:**")
             if st.button("Refresh User List"):
-                st.cache_data.clear()
+                clear_caches()
                 st.rerun()
             
             if st.session_state.get("is_admin", False) and USE_CLOUD_DB:
@@ -2008,7 +2531,7 @@ def show_configuration():
                         count = sync_pm_to_supabase()
                     if count > 0:
                         st.success(f"✅ Synced {count} users from PM.xlsx (existing users updated, deleted users remain inactive)")
-                        st.cache_data.clear()
+                        clear_caches()
                         st.rerun()
                     else:
                         st.warning("⚠️ No users to sync. Make sure PM.xlsx exists in your deployment.")
@@ -2097,10 +2620,10 @@ def show_configuration():
         else:
             st.info("Admin access required to reset passwords")
     
-    with tab2:
+    if section == "Batch Management":
         st.subheader("Batch Management")
 
-        current_batches = get_batch_options()
+        current_batches = page_data["batches"]
         st.info("Current Batches:")
         for i, batch in enumerate(current_batches):
             st.write(f"{i+1}. {batch}")
@@ -2124,20 +2647,20 @@ def show_configuration():
         else:
             st.info("Admin access required to modify batches")
     
-    with tab3:
+    if section == "System Settings":
         st.subheader("System Settings")
         
         st.markdown("---")
         st.markdown("**Database Info:**")
         try:
-            df = get_all_submissions()
+            df = page_data["submissions"]
             st.write(f"Total Records: {len(df)}")
             if not df.empty:
                 st.write(f"Date Range: {df['submission_date'].min()} to {df['submission_date'].max()}")
                 
                 # Calculate database size
-                if os.path.exists('team_dashboard.db'):
-                    size_bytes = os.path.getsize('team_dashboard.db')
+                if os.path.exists(db_adapter.sqlite_path):
+                    size_bytes = os.path.getsize(db_adapter.sqlite_path)
                     size_mb = size_bytes / (1024 * 1024)
                     st.write(f"Database Size: {size_mb:.2f} MB")
                 
@@ -2155,12 +2678,36 @@ def show_configuration():
         elif db_url:
             st.write(f"- Database: DATABASE_URL is set but PostgreSQL not available (psycopg2 not installed). Using SQLite fallback.")
         else:
-            st.write("- Database: **team_dashboard.db** (local SQLite)")
+            st.write(f"- Database: **{db_adapter.sqlite_path}** (local SQLite)")
+        
+        if db_adapter.read_urls:
+            st.write(f"- Read replicas: {len(db_adapter.read_urls)} configured")
+            replica_status = db_adapter.replica_status()
+            if any(r["healthy"] is not None for r in replica_status):
+                st.dataframe(pd.DataFrame(replica_status), use_container_width=True)
         
         if os.path.exists('PM.xlsx'):
             st.write("- User List: PM.xlsx")
         else:
             st.write("- User List: PM_users.txt")
+
+        journal = get_submission_journal()
+        if journal is not None:
+            st.markdown("---")
+            show_write_behind_status(journal)
+
+        warmup = cache_warmup.active_warmup()
+        if warmup is not None:
+            st.markdown("---")
+            show_warmup_status(warmup)
+
+        refresher = materialized_views.active_refresher()
+        if refresher is not None:
+            st.markdown("---")
+            show_matview_status(refresher)
+
+        st.markdown("---")
+        show_query_metrics()
         
         if st.button("Export Current Configuration"):
             config_data = {
@@ -2176,6 +2723,143 @@ def show_configuration():
                 "application/json"
             )
 
+def show_write_behind_status(journal):
+    """Backlog of journaled submissions not yet written to PostgreSQL (System Settings)"""
+    st.markdown("**Write-behind Journal:**")
+    stats = journal.stats()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Pending Submissions", stats["backlog"])
+    with col2:
+        st.metric("Oldest Pending", f"{stats['oldest_age_s']:.0f} s")
+    with col3:
+        st.metric("Flushed (this process)", stats["flushed"])
+
+    if stats["retry_in_s"] > 0:
+        st.warning(f"Database unreachable, retrying in {stats['retry_in_s']:.0f} s: {stats['last_error']}")
+    elif stats["failing"]:
+        st.warning(f"{stats['failing']} submission(s) failed and will be retried: {stats['last_error']}")
+
+    if stats["backlog"] and st.button("Flush Now"):
+        journal.flush_once()
+        st.rerun()
+
+def show_warmup_status(warmup):
+    """Timing of the startup cache warm-up (System Settings)"""
+    st.markdown("**Cache Warm-up:**")
+    status = warmup.status()
+    if status["done"]:
+        st.write(f"Finished in {status['elapsed_s']:.2f} s")
+    else:
+        st.write(f"Running for {status['elapsed_s']:.1f} s, {len(status['pending'])} loaders pending")
+    if status["timings"]:
+        timings = pd.DataFrame(
+            [{"loader": name, "ms": seconds * 1000, "error": status["errors"].get(name, "")}
+             for name, seconds in status["timings"].items()]
+        )
+        st.dataframe(timings.round(1), use_container_width=True, hide_index=True)
+
+def show_matview_status(refresher):
+    """Refresh state of the PostgreSQL aggregate views (System Settings)"""
+    st.markdown("**Aggregate Views:**")
+    stats = refresher.stats()
+    age = stats["last_refresh_age_s"]
+    st.write(
+        f"{stats['refreshes']} refreshes, last "
+        + (f"{age:.0f} s ago in {stats['last_duration_s']:.2f} s" if age is not None else "not yet run")
+        + (" (refresh pending)" if stats["pending"] else "")
+    )
+    if stats["last_error"]:
+        st.warning(f"Last refresh failed: {stats['last_error']}")
+    if st.button("Refresh Views Now"):
+        refresher.refresh_now()
+        st.rerun()
+
+def show_query_metrics():
+    """Query timing, slow-query log and metrics export (System Settings)"""
+    st.markdown("**Query Performance:**")
+    snapshot = query_metrics.snapshot()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Open Connections", sum(snapshot["open_connections"].values()))
+    with col2:
+        st.metric("Peak Connections", sum(snapshot["peak_connections"].values()))
+    with col3:
+        st.metric(f"Slow Queries (>{snapshot['slow_threshold_ms']:.0f} ms)", snapshot["slow_query_count"])
+
+    if snapshot["statements"]:
+        stats_df = pd.DataFrame(snapshot["statements"]).sort_values("total_ms", ascending=False)
+        st.dataframe(
+            stats_df[["sql", "backend", "calls", "errors", "rows", "total_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]].round(2),
+            use_container_width=True,
+            height=260
+        )
+    else:
+        st.info("No queries recorded yet in this process")
+
+    if snapshot["connection_acquire"]:
+        acquire_df = pd.DataFrame(snapshot["connection_acquire"]).T
+        st.write("Connection acquire time (ms):")
+        st.dataframe(acquire_df[["calls", "p50_ms", "p95_ms", "p99_ms", "max_ms"]].round(2), use_container_width=True)
+
+    writer_stats = db_adapter.sqlite_writer_stats()
+    if writer_stats:
+        st.write(
+            f"SQLite writer: {writer_stats['jobs']} writes in {writer_stats['transactions']} transactions "
+            f"(largest group {writer_stats['largest_batch']}, {writer_stats['queued']} queued)"
+        )
+
+    if db_adapter.is_postgres and db_adapter.pg_pool is not None:
+        pool_stats = db_adapter.pg_pool.stats()
+        st.write(
+            f"Connection pool: {pool_stats['idle']} idle (max {pool_stats['size']} per server), "
+            f"{pool_stats['hits']} reused / {pool_stats['misses']} opened; prepared statements "
+            + ("on" if db_adapter.pg_prepared else "off")
+        )
+
+    memo_stats = run_memo.stats()
+    if memo_stats:
+        st.write(
+            f"Per-rerun memo: {sum(memo_stats.values())} duplicate loads shared ("
+            + ", ".join(f"{name} {count}" for name, count in sorted(memo_stats.items(), key=lambda item: -item[1]))
+            + ")"
+        )
+
+    statement_stats = [row for row in db_adapter.statements.stats() if row["calls"]]
+    if statement_stats:
+        st.write("Registered statements:")
+        st.dataframe(pd.DataFrame(statement_stats).round(3), use_container_width=True, hide_index=True)
+
+    cache_stats = shared_cache.stats()
+    if "error" in cache_stats:
+        st.write(f"Shared cache: unavailable ({cache_stats['error']})")
+    elif cache_stats:
+        st.write(
+            f"Shared cache ({cache_stats['backend']}): {cache_stats['entries']} entries, "
+            f"{cache_stats['size_mb']:.1f} / {cache_stats['max_mb']:.0f} MB"
+            + (f", {cache_stats['hits']} hits / {cache_stats['misses']} misses in this process, "
+               f"{cache_stats['evictions']} evicted" if "hits" in cache_stats else "")
+        )
+
+    if snapshot["slow_queries"]:
+        with st.expander(f"Slow Query Log ({len(snapshot['slow_queries'])} most recent)"):
+            st.dataframe(pd.DataFrame(snapshot["slow_queries"][::-1]), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "Download Metrics (Prometheus)",
+            query_metrics.render_prometheus(),
+            f"dashboard_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prom",
+            "text/plain"
+        )
+    with col2:
+        if st.button("Reset Query Metrics"):
+            query_metrics.reset()
+            st.rerun()
+
 if __name__ == "__main__":
     # Initialize database
     get_database_connection()
@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+import pytest
+
+# Loader caches stay in process memory instead of query_cache.db in the working directory
+os.environ.setdefault("SHARED_CACHE", "memory")
+
+# The dashboard's own database is a scratch file, and no warmup threads start on import
+os.environ.setdefault("SQLITE_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="team_dashboard_tests_"), "team_dashboard.db"))
+os.environ.setdefault("CACHE_WARMUP", "off")
+
+@pytest.fixture
+def dashboard(monkeypatch):
+    """The dashboard module over empty tables in the scratch database, with a fresh shared cache"""
+    import shared_cache
+    import team_dashboard
+
+    monkeypatch.setattr(shared_cache, "_backend", shared_cache.MemoryBackend())
+    adapter = team_dashboard.db_adapter
+    adapter.create_tables()
+
+    def _empty(cursor):
+        for table in ("task_entries", "task_submissions", "user_profiles"):
+            cursor.execute(f"DELETE FROM {table}")
+    adapter.run_write(_empty)
+    return team_dashboard
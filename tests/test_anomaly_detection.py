@@ -0,0 +1,95 @@
+"""
+Anomaly baselines: incremental updates match a full rebuild, and only new days are read
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import anomaly_detection
+
+TODAY = date(2024, 6, 30)
+START = TODAY - timedelta(days=anomaly_detection.HISTORY_DAYS)
+
+def _history(spike_day=None) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    rows = []
+    day = START
+    while day <= TODAY:
+        for user in ("Alice", "Bob"):
+            completed = 40 + rng.normal(0, 3)
+            if user == "Alice" and day == spike_day:
+                completed = 400
+            row = {column: 0.0 for column in anomaly_detection.COMPLETED_COLUMNS}
+            row.update(submission_date=day.isoformat(), user_names=user, spatial_completed=completed,
+                       total_hours=8.0 + rng.normal(0, 0.2))
+            rows.append(row)
+        day += timedelta(days=1)
+    return pd.DataFrame(rows)
+
+class RecordingLoader:
+    def __init__(self, df):
+        self.df = df
+        self.calls = []
+
+    def __call__(self, start, end):
+        self.calls.append((start, end))
+        dates = pd.to_datetime(self.df["submission_date"]).dt.date
+        return self.df[(dates >= start) & (dates <= end)]
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    anomaly_detection.invalidate()
+    yield
+    anomaly_detection.invalidate()
+
+def test_incremental_update_matches_full_rebuild():
+    loader = RecordingLoader(_history())
+    midpoint = TODAY - timedelta(days=20)
+
+    scanner = anomaly_detection.AnomalyScanner(loader)
+    scanner._current_state(midpoint)
+    incremental = scanner._current_state(TODAY)
+    # The second call only reads the days after the stored state
+    first_start = midpoint - timedelta(days=anomaly_detection.HISTORY_DAYS)
+    assert loader.calls == [(first_start, midpoint - timedelta(days=1)), (midpoint, TODAY - timedelta(days=1))]
+
+    anomaly_detection.invalidate()
+    full = anomaly_detection.AnomalyScanner(RecordingLoader(loader.df))._current_state(TODAY)
+
+    assert incremental.through == full.through == TODAY - timedelta(days=1)
+    assert incremental.users == full.users
+    np.testing.assert_allclose(incremental.mean, full.mean)
+    np.testing.assert_allclose(incremental.var, full.var)
+    np.testing.assert_array_equal(incremental.count, full.count)
+
+def test_stored_state_is_shared_between_scanners():
+    loader = RecordingLoader(_history())
+    anomaly_detection.AnomalyScanner(loader)._current_state(TODAY)
+    other = RecordingLoader(loader.df)
+    anomaly_detection.AnomalyScanner(other)._current_state(TODAY)
+    assert other.calls == []
+
+def test_outlier_day_is_flagged():
+    spike = TODAY - timedelta(days=10)
+    state = anomaly_detection.AnomalyScanner(RecordingLoader(_history(spike)))._current_state(TODAY)
+    flags = state.flags[state.flags["submission_date"] == spike]
+
+    assert list(flags["user_names"]) == ["Alice"]
+    assert flags.iloc[0]["reason"].startswith("completed high")
+
+def test_invalidate_keeps_state_for_days_after_it():
+    loader = RecordingLoader(_history())
+    scanner = anomaly_detection.AnomalyScanner(loader)
+    scanner._current_state(TODAY)
+
+    # Today is not part of the baselines yet
+    anomaly_detection.invalidate([TODAY])
+    scanner._current_state(TODAY)
+    assert len(loader.calls) == 1
+
+    anomaly_detection.invalidate([TODAY - timedelta(days=3)])
+    scanner._current_state(TODAY)
+    assert loader.calls[-1] == (START, TODAY - timedelta(days=1))
@@ -0,0 +1,123 @@
+"""
+Read-only JSON API: ETags, conditional requests and bearer-token auth
+"""
+
+import gzip
+import json
+import urllib.error
+import urllib.request
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import api_server
+import history_data
+
+SUBMISSIONS = pd.DataFrame({
+    "id": [2, 1],
+    "submission_date": ["2024-05-02", "2024-05-01"],
+    "user_names": ["Bob", "Alice"],
+    "total_hours": [6.0, 8.0],
+    "overtime_hours": [0.0, 1.0],
+})
+
+class FakeDate(date):
+    current = date(2024, 5, 2)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+@pytest.fixture
+def api(monkeypatch):
+    requested = []
+
+    def submissions_in_range(start, end, team=None):
+        requested.append((start, end))
+        dates = pd.to_datetime(SUBMISSIONS["submission_date"]).dt.date
+        return SUBMISSIONS[(dates >= start) & (dates <= end)]
+
+    monkeypatch.setattr(history_data, "submissions_in_range", submissions_in_range)
+    monkeypatch.setattr(api_server, "_embedded", True)
+    monkeypatch.setattr(api_server, "API_TOKEN", "s3cret")
+    monkeypatch.setattr(api_server, "date", FakeDate)
+    monkeypatch.setattr(FakeDate, "current", date(2024, 5, 2))
+    server = api_server.start_api_server(0, host="127.0.0.1")
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def get(path, token="s3cret", **headers):
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        request = urllib.request.Request(base + path, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, dict(response.headers), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, dict(e.headers), e.read()
+
+    yield get, requested
+    server.shutdown()
+    server.server_close()
+
+def test_token_is_required_except_for_health(api):
+    get, _ = api
+    assert get("/api/submissions", token=None)[0] == 401
+    assert get("/api/submissions", token="wrong")[0] == 401
+    assert get("/api/health", token=None)[0] == 200
+    assert get("/api/submissions")[0] == 200
+
+def test_unchanged_data_is_answered_with_304(api):
+    get, requested = api
+    status, headers, body = get("/api/submissions?start=2024-05-01&end=2024-05-02")
+    assert status == 200
+    assert json.loads(body)["total"] == 2
+    etag = headers["ETag"]
+
+    status, _, body = get("/api/submissions?start=2024-05-01&end=2024-05-02", **{"If-None-Match": etag})
+    assert status == 304
+    assert body == b""
+    # Answered without reading the history
+    assert len(requested) == 1
+
+    history_data.bump_data_version()
+    assert get("/api/submissions?start=2024-05-01&end=2024-05-02", **{"If-None-Match": etag})[0] == 200
+
+def test_default_window_gets_a_new_etag_after_midnight(api):
+    get, _ = api
+    etag = get("/api/submissions")[1]["ETag"]
+    assert get("/api/submissions", **{"If-None-Match": etag})[0] == 304
+
+    FakeDate.current = date(2024, 5, 3)
+    status, headers, body = get("/api/submissions", **{"If-None-Match": etag})
+    assert status == 200
+    assert headers["ETag"] != etag
+    assert json.loads(body)["end"] == "2024-05-03"
+
+def test_paging_and_bad_parameters(api):
+    get, _ = api
+    page = json.loads(get("/api/submissions?start=2024-05-01&end=2024-05-02&page_size=1&page=2")[2])
+    assert page["total"] == 2
+    assert page["next_page"] is None
+    assert [row["user_names"] for row in page["data"]] == ["Alice"]
+
+    assert get("/api/submissions?start=May")[0] == 400
+    assert get("/api/submissions?start=2024-05-03&end=2024-05-01")[0] == 400
+    assert get("/api/nothing")[0] == 404
+
+def test_large_responses_are_gzipped(api, monkeypatch):
+    get, _ = api
+    monkeypatch.setattr(api_server, "GZIP_MIN_BYTES", 10)
+    status, headers, body = get("/api/submissions?start=2024-05-01&end=2024-05-02", **{"Accept-Encoding": "gzip"})
+    assert status == 200
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body))["total"] == 2
+
+def test_embedded_api_needs_a_token(monkeypatch):
+    started = []
+    monkeypatch.setenv("API_PORT", "8699")
+    monkeypatch.setattr(api_server, "API_TOKEN", "")
+    monkeypatch.setattr(api_server, "_api_started", False)
+    monkeypatch.setattr(api_server, "start_api_server", lambda port: started.append(port))
+    api_server.start_api_from_env()
+    assert started == []
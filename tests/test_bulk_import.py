@@ -0,0 +1,148 @@
+"""
+Bulk import of historical task entries into a scratch SQLite database
+"""
+
+import io
+import json
+
+import pytest
+
+import bulk_import
+
+CSV = """Date,PM Name,Task Type,Batch,Completed,Hours,Notes
+2024-05-02,Alice,Spatial,B1,10,2,first
+2024-05-02,Alice,QA,B2,4,1.5,
+2024-05-02,Bob,Spatial,B1,7,3,
+2024-05-03,Bob,Dance,B3,1,1,
+2024-05-03,Bob,Spatial,,5,1,
+2024-05-03,,Spatial,B1,5,1,
+not a date,Carol,QA,B2,1,1,
+,,,,,,
+2024-05-04,Carol,QA,B2,5,6,
+2024-05-04,Carol,QC,B4,5,3,
+"""
+
+@pytest.fixture
+def adapter(tmp_path, monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    from database_adapter import DatabaseAdapter
+    adapter = DatabaseAdapter(sqlite_path=str(tmp_path / "import.db"))
+    adapter.create_tables()
+    return adapter
+
+def _import(adapter, text=CSV, **kwargs):
+    return bulk_import.import_file(adapter, io.BytesIO(text.encode()), "history.csv", **kwargs)
+
+def test_invalid_rows_are_rejected_with_line_and_reason(adapter):
+    result = _import(adapter)
+    rejected = result.rejected_rows.set_index("line")["error"].to_dict()
+
+    assert rejected == {
+        5: "unknown task type",
+        6: "batch is required",
+        7: "user is required",
+        8: "invalid date (expected YYYY-MM-DD)",
+        # Carol's day is 9 hours: every entry of the day goes
+        10: "day total above 8 hours",
+        11: "day total above 8 hours",
+    }
+    assert result.rows_read == 10
+    assert result.submissions == 2
+    assert result.entries == 3
+    assert result.dates == ["2024-05-02"]
+
+def test_submissions_group_entries_per_user_and_day(adapter):
+    _import(adapter)
+    rows = adapter.read_sql(
+        "SELECT user_names, submission_date, spatial_completed, spatial_batches, qa_hours, total_hours, note "
+        "FROM task_submissions ORDER BY user_names"
+    )
+    alice = rows.iloc[0]
+    assert alice["user_names"] == "Alice"
+    assert alice["spatial_completed"] == 10
+    assert json.loads(alice["spatial_batches"]) == ["B1"]
+    assert alice["qa_hours"] == 1.5
+    assert alice["total_hours"] == 3.5
+    assert alice["note"] == "first"
+
+    entries = adapter.read_sql("SELECT COUNT(*) AS n FROM task_entries")
+    assert entries["n"][0] == 3
+
+def test_existing_days_are_skipped_on_reimport(adapter):
+    _import(adapter)
+    again = _import(adapter)
+
+    assert again.skipped_existing == 2
+    assert again.submissions == 0
+    assert again.dates == []
+    assert set(again.rejected_rows["error"]) >= {"submission already exists"}
+    count = adapter.read_sql("SELECT COUNT(*) AS n FROM task_submissions")
+    assert count["n"][0] == 2
+
+def test_existing_check_and_max_hours_can_be_disabled(adapter):
+    _import(adapter)
+    again = _import(adapter, skip_existing=False, max_total_hours=None)
+    assert again.skipped_existing == 0
+    assert again.submissions == 3
+    count = adapter.read_sql("SELECT COUNT(*) AS n FROM task_submissions")
+    assert count["n"][0] == 5
+
+def test_replace_existing_swaps_the_day_in_one_import(adapter):
+    _import(adapter)
+    text = "date,user,task type,batch,completed,hours\n2024-05-02,Alice,QC,B9,2,1\n2024-05-05,Alice,QC,B9,3,1\n"
+    result = _import(adapter, text=text, replace_existing=True)
+
+    assert result.replaced_existing == 1
+    assert result.skipped_existing == 0
+    assert result.submissions == 2
+    rows = adapter.read_sql(
+        "SELECT user_names, submission_date, qc_completed, total_hours FROM task_submissions "
+        "WHERE user_names = 'Alice' ORDER BY submission_date"
+    )
+    assert list(rows["qc_completed"]) == [2, 3]
+    assert list(rows["total_hours"]) == [1.0, 1.0]
+    entries = adapter.read_sql("SELECT task_type, batch FROM task_entries WHERE user_name = 'Alice'")
+    assert set(entries["batch"]) == {"B9"}
+    # Bob's day was not in the file and stays
+    bob = adapter.read_sql("SELECT COUNT(*) AS n FROM task_submissions WHERE user_names = 'Bob'")
+    assert bob["n"][0] == 1
+
+def test_dry_run_writes_nothing(adapter):
+    result = _import(adapter, dry_run=True)
+    assert result.submissions == 2
+    assert result.dates == []
+    count = adapter.read_sql("SELECT COUNT(*) AS n FROM task_submissions")
+    assert count["n"][0] == 0
+
+def test_non_iso_dates_are_rejected_not_guessed(adapter):
+    text = (
+        "date,user,task type,batch,completed,hours\n"
+        "2024-05-02T00:00:00,Alice,QA,B1,1,1\n"
+        "05/02/2024,Alice,QA,B1,1,1\n"
+        "13/02/2024,Bob,QA,B1,1,1\n"
+    )
+    result = _import(adapter, text=text)
+    assert result.dates == ["2024-05-02"]
+    assert set(result.rejected_rows["line"]) == {3, 4}
+    assert set(result.rejected_rows["error"]) == {"invalid date (expected YYYY-MM-DD)"}
+
+def test_chunks_keep_file_line_numbers(adapter):
+    result = _import(adapter, chunk_rows=3)
+    assert sorted(result.rejected_rows["line"]) == [5, 6, 7, 8, 10, 11]
+
+def test_missing_required_column_is_an_error(adapter):
+    with pytest.raises(ValueError, match="hours"):
+        _import(adapter, text="date,user,task type,batch,completed\n2024-05-02,Alice,QA,B1,1\n")
+
+def test_sqlite_ids_are_not_reused_after_deletes(adapter):
+    for user in ("u1", "u2", "u3"):
+        adapter.execute_sql("INSERT INTO task_submissions (submission_date, user_names) VALUES ('2024-01-01', ?)", (user,))
+    adapter.execute_sql("DELETE FROM task_submissions WHERE user_names IN ('u2', 'u3')")
+
+    _import(adapter)
+    ids = adapter.read_sql("SELECT id FROM task_submissions WHERE submitted_by = 'Bulk Import'")["id"]
+    assert sorted(ids) == [4, 5]
+
+    adapter.execute_sql("INSERT INTO task_submissions (submission_date, user_names) VALUES ('2024-01-02', 'u4')")
+    latest = adapter.read_sql("SELECT MAX(id) AS id FROM task_submissions")
+    assert latest["id"][0] == 6
@@ -0,0 +1,60 @@
+"""
+Concurrent page preloading
+"""
+
+import threading
+import time
+
+import pytest
+
+from concurrent_loader import load_concurrently
+
+def test_loaders_run_in_parallel():
+    threads = set()
+
+    def slow(value):
+        def load():
+            threads.add(threading.current_thread().name)
+            time.sleep(0.2)
+            return value
+        return load
+
+    started = time.perf_counter()
+    results = load_concurrently({"batches": slow([1]), "users": slow(["Alice"]), "settings": slow({})})
+    elapsed = time.perf_counter() - started
+
+    assert results == {"batches": [1], "users": ["Alice"], "settings": {}}
+    assert len(threads) == 3
+    # Close to the slowest loader, not the sum of all three
+    assert elapsed < 0.5
+
+def test_single_loader_runs_in_the_calling_thread():
+    results = load_concurrently({"only": lambda: threading.current_thread().name})
+    assert results == {"only": threading.current_thread().name}
+    assert load_concurrently({}) == {}
+
+def test_first_loader_error_is_raised():
+    def broken():
+        raise ConnectionError("database unreachable")
+
+    with pytest.raises(ConnectionError):
+        load_concurrently({"ok": lambda: 1, "broken": broken})
+
+@pytest.mark.parametrize("is_admin, pages", [
+    (False, ["Daily Task Entry"]),
+    (True, ["Data Management", "Configuration"]),
+])
+def test_each_role_preloads_its_first_page(is_admin, pages):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file("../team_dashboard.py", default_timeout=60)
+    at.session_state["authenticated"] = True
+    at.session_state["current_user"] = "Alice"
+    at.session_state["is_admin"] = is_admin
+    at.run()
+
+    assert not at.exception
+    assert at.sidebar.radio[0].options == pages
+    timings = at.session_state["preload_timings"][pages[0]]
+    assert "total" in timings
+    assert timings["total"] >= max(v for k, v in timings.items() if k != "total")
@@ -0,0 +1,40 @@
+"""
+Login roster cache: served from cache until the user list changes in any process
+"""
+
+import shared_cache
+
+def _add_user(dashboard, name, active=True):
+    dashboard.db_adapter.execute_sql(
+        "INSERT INTO user_profiles (user_name, team_function, active) VALUES (?, 'QA', ?)", (name, int(active))
+    )
+
+def test_roster_is_cached_until_invalidated(dashboard):
+    _add_user(dashboard, "Bob")
+    _add_user(dashboard, "Alice")
+    _add_user(dashboard, "Gone", active=False)
+    version = dashboard.login_roster_version()
+    assert dashboard.get_login_roster() == ["Alice", "Bob"]
+
+    _add_user(dashboard, "Carol")
+    assert dashboard.login_roster_version() == version
+    assert dashboard.get_login_roster() == ["Alice", "Bob"]
+
+    assert dashboard.invalidate_login_roster() != version
+    assert dashboard.get_login_roster() == ["Alice", "Bob", "Carol"]
+
+def test_a_change_in_another_process_is_seen(dashboard, tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    monkeypatch.setattr(shared_cache, "_backend", shared_cache.SQLiteCacheBackend(path=path))
+    version = dashboard.login_roster_version()
+
+    # Another process shares the cache file and records a user change
+    other = shared_cache.SQLiteCacheBackend(path=path)
+    other.set(dashboard._ROSTER_VERSION_KEY, b"changed-elsewhere", 60)
+
+    assert dashboard.login_roster_version() == "changed-elsewhere" != version
+
+def test_a_lost_version_starts_a_new_one(dashboard):
+    version = dashboard.login_roster_version()
+    shared_cache.get_backend().clear()
+    assert dashboard.login_roster_version() != version
@@ -0,0 +1,123 @@
+"""
+Aggregate views: totals on PostgreSQL, raw-table fallback everywhere else
+Set TEST_DATABASE_URL (see test_partitioning_pg.py) to run the PostgreSQL tests
+"""
+
+import os
+import time
+import uuid
+from datetime import date
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+import materialized_views
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+needs_postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+ENTRIES = [
+    ("2024-05-01", "Alice", "Spatial", "B1", 10, 2.0),
+    ("2024-05-01", "Bob", "Spatial", "B1", 6, 1.5),
+    ("2024-05-02", "Alice", "QA", "", 4, 1.0),
+    ("2024-05-03", "Bob", "QA", "B2", 3, 3.0),
+]
+
+def _fill(adapter):
+    ph = "%s" if adapter.is_postgres else "?"
+
+    def _insert(cursor):
+        for day, user, task_type, batch, completed, hours in ENTRIES:
+            key = task_type.lower()
+            cursor.execute(
+                f"INSERT INTO task_submissions (submission_date, user_names, {key}_completed, {key}_hours, total_hours) "
+                f"VALUES ({ph}, {ph}, {ph}, {ph}, {ph}) RETURNING id",
+                (day, user, completed, hours, hours)
+            )
+            submission_id = cursor.fetchone()[0]
+            cursor.execute(
+                "INSERT INTO task_entries (submission_id, submission_date, user_name, task_type, batch, completed, hours) "
+                f"VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph})",
+                (submission_id, day, user, task_type, batch, completed, hours)
+            )
+    adapter.run_write(_insert)
+
+def test_sqlite_reads_fall_back_to_the_raw_tables(dashboard):
+    _fill(dashboard.db_adapter)
+    assert not dashboard.aggregate_views_usable()
+    # No views on SQLite: the reader fails and the caller gets None
+    assert dashboard.get_view_totals(materialized_views.batch_totals) is None
+
+    entries = dashboard.get_batch_entries(date(2024, 5, 1), date(2024, 5, 3), use_views=True)
+    assert len(entries) == 4
+    assert sorted(entries["batch"]) == ["", "B1", "B1", "B2"]
+
+def test_views_are_skipped_right_after_a_write(dashboard, monkeypatch):
+    monkeypatch.setattr(dashboard.db_adapter, "is_postgres", True)
+    monkeypatch.setattr(dashboard.db_adapter, "pg_matviews", True)
+    st.session_state["last_write_at"] = 0.0
+    try:
+        assert dashboard.aggregate_views_usable()
+        dashboard.mark_session_write()
+        assert not dashboard.aggregate_views_usable()
+    finally:
+        del st.session_state["last_write_at"]
+
+@pytest.fixture
+def pg_adapter(monkeypatch):
+    psycopg2 = pytest.importorskip("psycopg2")
+    name = f"td_test_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(TEST_DATABASE_URL, sslmode=os.getenv("DATABASE_SSLMODE", "disable"))
+    admin.autocommit = True
+    admin.cursor().execute(f"CREATE DATABASE {name}")
+    base, _, _ = TEST_DATABASE_URL.rpartition("/")
+    monkeypatch.setenv("DATABASE_URL", f"{base}/{name}")
+    monkeypatch.setenv("DATABASE_SSLMODE", os.getenv("DATABASE_SSLMODE", "disable"))
+    monkeypatch.setenv("PG_MATVIEWS", "on")
+
+    from database_adapter import DatabaseAdapter
+    adapter = DatabaseAdapter()
+    assert adapter.is_postgres
+    adapter.create_tables()
+    yield adapter
+
+    if adapter.pg_pool is not None:
+        adapter.pg_pool.close_idle()
+    admin.cursor().execute(f"DROP DATABASE {name} WITH (FORCE)")
+    admin.close()
+
+@needs_postgres
+def test_view_totals_match_the_raw_tables(pg_adapter):
+    _fill(pg_adapter)
+    materialized_views.refresh_views(pg_adapter)
+
+    daily = materialized_views.daily_totals(pg_adapter, date(2024, 5, 1), date(2024, 5, 2))
+    assert list(daily["submissions"]) == [2, 1]
+    assert list(daily["spatial_completed"].fillna(0)) == [16, 0]
+
+    users = materialized_views.user_totals(pg_adapter).set_index("user_names")
+    raw = pg_adapter.read_sql(
+        "SELECT user_names, COUNT(*) AS submissions, SUM(total_hours) AS total_hours FROM task_submissions GROUP BY user_names"
+    ).set_index("user_names")
+    assert users["submissions"].to_dict() == raw["submissions"].to_dict()
+    assert users["total_hours"].to_dict() == raw["total_hours"].to_dict()
+
+    batches = materialized_views.batch_totals(pg_adapter).sort_values(["task_type", "batch"])
+    assert list(batches["batch"]) == ["", "B2", "B1"]
+    assert list(batches["completed"]) == [4, 3, 16]
+
+@needs_postgres
+def test_refresher_picks_up_writes(pg_adapter):
+    refresher = materialized_views.ViewRefresher(pg_adapter, delay=0.05, interval=60)
+    assert materialized_views.daily_totals(pg_adapter).empty
+
+    _fill(pg_adapter)
+    refresher.mark_dirty()
+    deadline = time.time() + 10
+    while refresher.refreshes == 0 and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert refresher.stats()["last_error"] is None
+    daily = materialized_views.daily_totals(pg_adapter)
+    assert pd.to_datetime(daily["submission_date"]).dt.date.tolist() == [date(2024, 5, 1), date(2024, 5, 2), date(2024, 5, 3)]
@@ -0,0 +1,125 @@
+"""
+Monthly partitioning against a real PostgreSQL server
+Set TEST_DATABASE_URL to a server where the user may create databases, e.g.
+    TEST_DATABASE_URL=postgresql://postgres@127.0.0.1:5432/postgres
+Each run works in a scratch database that is dropped afterwards
+"""
+
+import os
+import uuid
+from datetime import date
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+def _admin_connection():
+    conn = psycopg2.connect(TEST_DATABASE_URL, sslmode=os.getenv("DATABASE_SSLMODE", "disable"))
+    conn.autocommit = True
+    return conn
+
+@pytest.fixture
+def adapter(monkeypatch):
+    name = f"td_test_{uuid.uuid4().hex[:12]}"
+    admin = _admin_connection()
+    admin.cursor().execute(f"CREATE DATABASE {name}")
+    base, _, _ = TEST_DATABASE_URL.rpartition("/")
+    monkeypatch.setenv("DATABASE_URL", f"{base}/{name}")
+    monkeypatch.setenv("DATABASE_SSLMODE", os.getenv("DATABASE_SSLMODE", "disable"))
+    monkeypatch.setenv("PG_PARTITIONING", "on")
+    monkeypatch.setenv("PG_MATVIEWS", "off")
+
+    from database_adapter import DatabaseAdapter
+    adapter = DatabaseAdapter()
+    assert adapter.is_postgres
+    adapter.create_tables()
+    yield adapter
+
+    if adapter.pg_pool is not None:
+        adapter.pg_pool.close_idle()
+    admin.cursor().execute(f"DROP DATABASE {name} WITH (FORCE)")
+    admin.close()
+
+def _insert_submission(adapter, day, user="user1", idempotency_key=None):
+    rows = adapter.execute_sql(
+        "INSERT INTO task_submissions (submission_date, user_names, total_hours, idempotency_key) "
+        "VALUES (%s, %s, 1.0, %s) ON CONFLICT (idempotency_key, submission_date) DO NOTHING RETURNING id",
+        (day, user, idempotency_key),
+        fetch=True
+    )
+    if not rows:
+        return None
+    submission_id = rows[0]["id"]
+    adapter.execute_sql(
+        "INSERT INTO task_entries (submission_id, submission_date, user_name, task_type, batch, completed, hours) "
+        "VALUES (%s, %s, %s, 'Spatial', 'B1', 3, 1.0)",
+        (submission_id, day, user)
+    )
+    return submission_id
+
+def _rows_in(adapter, relation):
+    return adapter.execute_sql(f"SELECT COUNT(*) AS n FROM ONLY {relation}", fetch=True)[0]["n"]
+
+def test_create_tables_attaches_current_and_coming_months(adapter):
+    import partitioning
+
+    this_month = date.today().replace(day=1)
+    for table in partitioning.PARTITIONED_TABLES:
+        assert partitioning.is_partitioned(adapter, table)
+        months = [month for _, month in partitioning.list_partitions(adapter, table)]
+        assert months[0] == this_month
+        assert len(months) == partitioning.MONTHS_AHEAD + 1
+
+def test_rows_in_default_partition_move_to_new_month(adapter):
+    import partitioning
+
+    _insert_submission(adapter, date(2024, 5, 17))
+    assert _rows_in(adapter, "task_submissions_default") == 1
+
+    created = partitioning.ensure_partitions(adapter)
+
+    assert "task_submissions_p202405" in created and "task_entries_p202405" in created
+    for table in partitioning.PARTITIONED_TABLES:
+        assert _rows_in(adapter, f"{table}_default") == 0
+        assert _rows_in(adapter, f"{table}_p202405") == 1
+    # Months between the oldest row and today are covered too, so no later row lands in the default
+    assert "task_submissions_p202406" in created
+
+def test_idempotency_key_is_unique_per_day(adapter):
+    import partitioning
+
+    partitioning.ensure_partitions(adapter, today=date(2024, 5, 1))
+    first = _insert_submission(adapter, date(2024, 5, 17), idempotency_key="k1")
+    replay = _insert_submission(adapter, date(2024, 5, 17), idempotency_key="k1")
+    other_day = _insert_submission(adapter, date(2024, 6, 3), idempotency_key="k1")
+
+    assert first is not None
+    assert replay is None
+    # The index includes the partition key, so it only holds within a day
+    assert other_day is not None
+    assert adapter.execute_sql("SELECT COUNT(*) AS n FROM task_submissions", fetch=True)[0]["n"] == 2
+
+def test_moving_a_record_across_months_moves_its_partition_rows(adapter):
+    import partitioning
+
+    partitioning.ensure_partitions(adapter, today=date(2024, 5, 1))
+    submission_id = _insert_submission(adapter, date(2024, 5, 17))
+
+    # The statements update_record runs on PostgreSQL
+    adapter.execute_sql(
+        "UPDATE task_submissions SET submission_date = %s, note = %s WHERE id = %s",
+        (date(2024, 7, 2), "moved", submission_id)
+    )
+    adapter.execute_sql(
+        "UPDATE task_entries SET submission_date = %s WHERE submission_id = %s",
+        (date(2024, 7, 2), submission_id)
+    )
+
+    for table in partitioning.PARTITIONED_TABLES:
+        assert _rows_in(adapter, f"{table}_p202405") == 0
+        assert _rows_in(adapter, f"{table}_p202407") == 1
+    row = adapter.execute_sql("SELECT submission_date, note FROM task_submissions WHERE id = %s", (submission_id,), fetch=True)[0]
+    assert row["submission_date"] == date(2024, 7, 2) and row["note"] == "moved"
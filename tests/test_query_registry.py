@@ -0,0 +1,52 @@
+"""
+Registered statements: dialect translation and registry rules
+"""
+
+import pytest
+
+from query_registry import Statement, StatementRegistry, timed
+
+def test_statement_texts_per_dialect():
+    statement = Statement("range", "SELECT * FROM t WHERE d BETWEEN ? AND ?")
+    assert statement.params == 2
+    assert statement.sqlite_text == statement.sql
+    assert statement.postgres_text == "SELECT * FROM t WHERE d BETWEEN %s AND %s"
+    assert statement.prepare_text == "PREPARE td_range AS SELECT * FROM t WHERE d BETWEEN $1 AND $2"
+    assert statement.execute_text == "EXECUTE td_range (%s, %s)"
+
+def test_statement_without_parameters():
+    statement = Statement("all_rows", "SELECT * FROM t")
+    assert statement.execute_text == "EXECUTE td_all_rows"
+
+def test_postgres_override():
+    statement = Statement("today", "SELECT date('now')", postgres_sql="SELECT CURRENT_DATE WHERE ? IS NOT NULL")
+    assert statement.sqlite_text == "SELECT date('now')"
+    assert statement.params == 1
+    assert statement.prepare_text.endswith("WHERE $1 IS NOT NULL")
+
+@pytest.mark.parametrize("name", ["Upper", "1st", "with-dash", "drop table; --"])
+def test_invalid_names_are_rejected(name):
+    with pytest.raises(ValueError):
+        Statement(name, "SELECT 1")
+
+def test_registry_returns_the_same_statement_and_rejects_conflicts():
+    registry = StatementRegistry()
+    first = registry.register("q", "SELECT ?")
+    assert registry.register("q", "SELECT ?") is first
+    assert registry.get("q") is first
+    with pytest.raises(ValueError):
+        registry.register("q", "SELECT ? + 1")
+
+def test_timed_records_calls_and_errors():
+    registry = StatementRegistry()
+    statement = registry.register("q", "SELECT ?")
+    with timed(statement, calls=3):
+        pass
+    with pytest.raises(RuntimeError):
+        with timed(statement):
+            raise RuntimeError("boom")
+
+    stats = registry.stats()[0]
+    assert stats["statement"] == "q"
+    assert stats["calls"] == 4
+    assert stats["errors"] == 1
@@ -0,0 +1,110 @@
+"""
+Day-bucketed range cache: assembly from cached days and invalidation
+"""
+
+import uuid
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+import range_cache
+
+ROWS = pd.DataFrame({
+    "submission_date": [date(2024, 3, 1), date(2024, 3, 1), date(2024, 3, 3), date(2024, 3, 5)],
+    "user_names": ["a", "b", "a", "b"],
+    "total_hours": [1.0, 2.0, 3.0, 4.0],
+})
+
+class RecordingFetch:
+    """fetch() over ROWS that records every queried range"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, start, end, scope=None):
+        self.calls.append((start, end, scope))
+        df = ROWS[(ROWS["submission_date"] >= start) & (ROWS["submission_date"] <= end)]
+        if scope is not None:
+            df = df[df["user_names"] == scope]
+        return df.reset_index(drop=True)
+
+@pytest.fixture
+def cache():
+    fetch = RecordingFetch()
+    cache = range_cache.RangeCache(f"test_{uuid.uuid4().hex[:8]}", fetch)
+    yield cache, fetch
+    cache.clear()
+
+def test_range_is_assembled_from_cached_days(cache):
+    cache, fetch = cache
+    first = cache.get(date(2024, 3, 1), date(2024, 3, 3))
+    assert fetch.calls == [(date(2024, 3, 1), date(2024, 3, 3), None)]
+    assert list(first["total_hours"]) == [1.0, 2.0, 3.0]
+
+    # Only the days not cached yet are read, as one contiguous run
+    wider = cache.get(date(2024, 2, 28), date(2024, 3, 5))
+    assert fetch.calls[1:] == [
+        (date(2024, 2, 28), date(2024, 2, 29), None),
+        (date(2024, 3, 4), date(2024, 3, 5), None),
+    ]
+    assert list(wider["total_hours"]) == [1.0, 2.0, 3.0, 4.0]
+
+    again = cache.get(date(2024, 3, 2), date(2024, 3, 5))
+    assert len(fetch.calls) == 3
+    assert list(again["total_hours"]) == [3.0, 4.0]
+
+def test_empty_range_keeps_columns(cache):
+    cache, _ = cache
+    df = cache.get(date(2024, 3, 2), date(2024, 3, 2))
+    assert df.empty
+    assert list(df.columns) == list(ROWS.columns)
+
+def test_descending_orders_days_newest_first():
+    fetch = RecordingFetch()
+    cache = range_cache.RangeCache(f"test_{uuid.uuid4().hex[:8]}", fetch, descending=True)
+    try:
+        df = cache.get(date(2024, 3, 1), date(2024, 3, 5))
+        assert list(df["submission_date"]) == [date(2024, 3, 5), date(2024, 3, 3), date(2024, 3, 1), date(2024, 3, 1)]
+    finally:
+        cache.clear()
+
+def test_invalidate_refetches_only_those_days_for_every_scope(cache):
+    cache, fetch = cache
+    cache.get(date(2024, 3, 1), date(2024, 3, 5))
+    cache.get(date(2024, 3, 1), date(2024, 3, 5), scope="a")
+    assert len(fetch.calls) == 2
+
+    cache.invalidate(["2024-03-03"])
+    cache.get(date(2024, 3, 1), date(2024, 3, 5))
+    cache.get(date(2024, 3, 1), date(2024, 3, 5), scope="a")
+    assert fetch.calls[2:] == [
+        (date(2024, 3, 3), date(2024, 3, 3), None),
+        (date(2024, 3, 3), date(2024, 3, 3), "a"),
+    ]
+
+def test_clear_drops_every_day(cache):
+    cache, fetch = cache
+    cache.get(date(2024, 3, 1), date(2024, 3, 2))
+    cache.clear()
+    cache.get(date(2024, 3, 1), date(2024, 3, 2))
+    assert len(fetch.calls) == 2
+
+def test_fetch_errors_are_not_cached(cache):
+    cache, fetch = cache
+    def down(start, end):
+        raise RuntimeError("database unavailable")
+
+    # Same name, so the same buckets as ``cache``
+    failing = range_cache.RangeCache(cache.name, down)
+    with pytest.raises(RuntimeError):
+        failing.get(date(2024, 3, 1), date(2024, 3, 1))
+    cache.get(date(2024, 3, 1), date(2024, 3, 1))
+    assert fetch.calls == [(date(2024, 3, 1), date(2024, 3, 1), None)]
+
+def test_long_gaps_are_split_into_bounded_queries():
+    day = date(2023, 1, 1)
+    days = [day + timedelta(days=i) for i in range(range_cache.MAX_FETCH_DAYS + 10)]
+    runs = range_cache._runs(days)
+    assert len(runs) == 2
+    assert (runs[0][1] - runs[0][0]).days == range_cache.MAX_FETCH_DAYS - 1
@@ -0,0 +1,77 @@
+"""
+Edit Records search: filtered, newest-first, bounded lookups in SQL
+"""
+
+from datetime import date
+
+import pytest
+
+def _submit(dashboard, day, user, hours=8.0):
+    dashboard.db_adapter.execute_sql(
+        "INSERT INTO task_submissions (submission_date, user_names, total_hours) VALUES (?, ?, ?)", (day, user, hours)
+    )
+
+@pytest.fixture
+def records(dashboard):
+    for day in ("2024-05-01", "2024-05-02", "2024-05-03"):
+        for user in ("Alice", "Bob"):
+            _submit(dashboard, day, user)
+    dashboard.db_adapter.execute_sql("INSERT INTO user_profiles (user_name, team_function) VALUES ('Bob', 'QA')")
+    return dashboard
+
+def test_newest_records_first_up_to_the_limit(records):
+    matches = records.search_submissions(limit=4)
+    assert list(matches.columns) == ["id", "submission_date", "user_names", "total_hours"]
+    assert len(matches) == 4
+    assert list(matches["id"]) == sorted(matches["id"], reverse=True)
+    assert matches["id"].iloc[0] == records.search_submissions()["id"].max()
+
+def test_filters_combine(records):
+    assert set(records.search_submissions(user="Alice")["user_names"]) == {"Alice"}
+
+    on_day = records.search_submissions(on_date=date(2024, 5, 2))
+    assert sorted(on_day["user_names"]) == ["Alice", "Bob"]
+
+    alice_on_day = records.search_submissions(user="Alice", on_date=date(2024, 5, 2))
+    assert len(alice_on_day) == 1
+    record_id = int(alice_on_day["id"][0])
+    assert list(records.search_submissions(record_id=record_id)["id"]) == [record_id]
+    assert records.search_submissions(record_id=record_id, user="Bob").empty
+
+    assert set(records.search_submissions(team="QA")["user_names"]) == {"Bob"}
+    assert records.search_submissions(team="Nobody").empty
+
+def test_results_refresh_after_a_write(records):
+    assert len(records.search_submissions(user="Carol")) == 0
+    _submit(records, "2024-05-04", "Carol")
+    records.invalidate_submission_days(["2024-05-04"])
+    assert len(records.search_submissions(user="Carol")) == 1
+
+def test_failed_search_is_not_cached_as_no_matches(records, monkeypatch):
+    healthy = records.get_read_connection
+
+    def unreachable():
+        raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(records, "get_read_connection", unreachable)
+    with pytest.raises(ConnectionError):
+        records.search_submissions(user="Alice")
+
+    monkeypatch.setattr(records, "get_read_connection", healthy)
+    assert len(records.search_submissions(user="Alice")) == 3
+
+def test_edit_records_selector_lists_the_search_results(records):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file("../team_dashboard.py", default_timeout=60)
+    at.session_state["authenticated"] = True
+    at.session_state["current_user"] = "Admin"
+    at.session_state["is_admin"] = True
+    at.session_state["edit_filters"] = {"user": "All Users", "date": date(2024, 5, 2), "id": 0}
+    at.run()
+    at.radio(key="data_management_section").set_value("Edit Records").run()
+
+    assert not at.exception
+    selector = next(box for box in at.selectbox if box.label == "Select Record to Edit")
+    expected = records.search_submissions(on_date=date(2024, 5, 2))
+    assert selector.options == [f"ID {row.id} - {row.user_names} - 2024-05-02" for row in expected.itertuples()]
@@ -0,0 +1,89 @@
+"""
+Retention engine: archive, batched purge, cascade deletes and truncation on SQLite
+"""
+
+import sqlite3
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import retention
+
+DAYS = ["2024-01-10", "2024-01-20", "2024-02-05", "2024-02-15", "2024-03-01"]
+
+@pytest.fixture
+def adapter(tmp_path, monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.chdir(tmp_path)
+    from database_adapter import DatabaseAdapter
+    adapter = DatabaseAdapter(sqlite_path=str(tmp_path / "retention.db"))
+    adapter.create_tables()
+
+    def _fill(cursor):
+        for day in DAYS:
+            cursor.execute("INSERT INTO task_submissions (submission_date, user_names) VALUES (?, 'Alice')", (day,))
+            submission_id = cursor.lastrowid
+            for batch in ("B1", "B2"):
+                cursor.execute(
+                    "INSERT INTO task_entries (submission_id, submission_date, user_name, task_type, batch, completed, hours) "
+                    "VALUES (?, ?, 'Alice', 'QA', ?, 1, 1)",
+                    (submission_id, day, batch)
+                )
+    adapter.run_write(_fill)
+    return adapter
+
+def _count(adapter, table):
+    return int(adapter.read_sql(f"SELECT COUNT(*) AS n FROM {table}")["n"][0])
+
+def _read_archive(path):
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+
+def test_purge_archives_then_deletes_in_batches(adapter):
+    progress = []
+    result = retention.purge_before(adapter, date(2024, 2, 10), batch_size=2, pause=0,
+                                    progress=lambda done, total: progress.append((done, total)))
+
+    assert result["submissions"] == 3
+    assert result["entries"] == 6
+    assert result["batches"] == 2
+    assert progress == [(0, 3), (2, 3), (3, 3)]
+    assert _count(adapter, "task_submissions") == 2
+    assert _count(adapter, "task_entries") == 4
+
+    archived = [_read_archive(path) for path in result["archive_files"] if "task_submissions" in path]
+    assert sorted(pd.concat(archived)["submission_date"]) == DAYS[:3]
+    entries = [_read_archive(path) for path in result["archive_files"] if "task_entries" in path]
+    assert len(pd.concat(entries)) == 6
+
+def test_purge_without_archive_writes_no_files(adapter, tmp_path):
+    result = retention.purge_before(adapter, date(2024, 3, 1), archive=False, pause=0)
+    assert result["submissions"] == 4
+    assert result["archive_files"] == []
+    assert not (tmp_path / "archive").exists()
+
+def test_deleting_a_submission_cascades_to_its_entries(adapter):
+    adapter.execute_sql("DELETE FROM task_submissions WHERE submission_date = ?", ("2024-01-10",))
+    assert _count(adapter, "task_submissions") == 4
+    assert _count(adapter, "task_entries") == 8
+
+def test_orphans_left_by_older_deletes_are_purged(adapter):
+    # Without foreign keys (as before they were enabled) the entries outlive their submission
+    conn = sqlite3.connect(adapter.sqlite_path)
+    conn.execute("DELETE FROM task_submissions WHERE submission_date = '2024-03-01'")
+    conn.commit()
+    conn.close()
+    assert _count(adapter, "task_entries") == 10
+
+    result = retention.purge_before(adapter, date(2024, 1, 1), pause=0)
+    assert result["submissions"] == 0
+    assert result["orphans"] == 2
+    assert _count(adapter, "task_entries") == 8
+
+def test_truncate_all_restarts_ids(adapter):
+    retention.truncate_all(adapter)
+    assert _count(adapter, "task_submissions") == 0
+    assert _count(adapter, "task_entries") == 0
+
+    adapter.execute_sql("INSERT INTO task_submissions (submission_date, user_names) VALUES ('2024-04-01', 'Bob')")
+    assert int(adapter.read_sql("SELECT id FROM task_submissions")["id"][0]) == 1
@@ -0,0 +1,92 @@
+"""
+Per-rerun memoization of loaders
+"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import run_memo
+import tracing
+from concurrent_loader import load_concurrently
+
+@pytest.fixture
+def rerun():
+    trace = tracing.start_trace("rerun")
+    yield trace
+    if tracing.current_trace() is not None:
+        tracing.finish_trace()
+
+def _counting_loader(calls, delay=0.0):
+    @run_memo.memoized
+    def load_frame(team=None):
+        calls.append(team)
+        time.sleep(delay)
+        return pd.DataFrame({"team": [team]})
+    return load_frame
+
+def test_identical_calls_in_one_rerun_share_the_result(rerun):
+    calls = []
+    load_frame = _counting_loader(calls)
+    before = run_memo.stats().get("load_frame", 0)
+
+    first = load_frame()
+    second = load_frame()
+    load_frame(team="QA")
+
+    assert calls == [None, "QA"]
+    assert run_memo.stats()["load_frame"] == before + 1
+    assert rerun.attrs["deduped"] == 1
+    # Each caller gets its own copy to add columns to
+    first["extra"] = 1
+    assert "extra" not in second.columns
+
+def test_each_rerun_loads_again(rerun):
+    calls = []
+    load_frame = _counting_loader(calls)
+    load_frame()
+    tracing.finish_trace()
+
+    tracing.start_trace("next rerun")
+    load_frame()
+    assert len(calls) == 2
+
+def test_calls_outside_a_rerun_are_not_memoized():
+    calls = []
+    load_frame = _counting_loader(calls)
+    load_frame()
+    load_frame()
+    assert len(calls) == 2
+
+def test_worker_threads_of_the_rerun_wait_for_the_first_call(rerun):
+    calls = []
+    load_frame = _counting_loader(calls, delay=0.2)
+    results = load_concurrently({name: load_frame for name in ("a", "b", "c")})
+    assert len(calls) == 1
+    assert all(list(frame["team"]) == [None] for frame in results.values())
+
+def test_errors_are_not_memoized(rerun):
+    attempts = []
+
+    @run_memo.memoized
+    def flaky():
+        attempts.append(threading.current_thread().name)
+        if len(attempts) == 1:
+            raise ConnectionError("database unreachable")
+        return "rows"
+
+    with pytest.raises(ConnectionError):
+        flaky()
+    assert flaky() == "rows"
+    assert flaky() == "rows"
+    assert len(attempts) == 2
+
+def test_clear_forgets_the_reruns_results(rerun):
+    calls = []
+    load_frame = _counting_loader(calls)
+    load_frame()
+    run_memo.clear()
+    load_frame()
+    assert len(calls) == 2
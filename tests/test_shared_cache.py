@@ -0,0 +1,112 @@
+"""
+Shared cache backends and the cached() decorator
+"""
+
+import time
+
+import pytest
+
+import shared_cache
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return shared_cache.MemoryBackend(max_bytes=1000)
+    return shared_cache.SQLiteCacheBackend(path=str(tmp_path / "cache.db"), max_bytes=1000)
+
+def test_get_set_and_expiry(backend):
+    backend.set("a", b"1", ttl=60)
+    backend.set("b", b"2", ttl=0.05)
+    assert backend.get("a") == b"1"
+    time.sleep(0.1)
+    assert backend.get("b") is None
+    assert backend.get_many(["a", "b", "c"]) == {"a": b"1"}
+
+def test_clear_by_prefix(backend):
+    backend.set_many([("fn:x", b"1", 60), ("fn:y", b"2", 60), ("range:z", b"3", 60)])
+    backend.clear("fn:")
+    assert backend.get_many(["fn:x", "fn:y", "range:z"]) == {"range:z": b"3"}
+    backend.clear()
+    assert backend.get("range:z") is None
+
+def test_size_bound_evicts_least_recently_used(backend):
+    for i in range(5):
+        backend.set(f"k{i}", bytes(300), ttl=60)
+    live = backend.get_many([f"k{i}" for i in range(5)])
+    assert sum(len(v) for v in live.values()) <= 1000
+    assert "k4" in live
+
+def test_sqlite_entries_are_seen_by_other_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    shared_cache.SQLiteCacheBackend(path=path).set("k", b"v", ttl=60)
+    assert shared_cache.SQLiteCacheBackend(path=path).get("k") == b"v"
+
+def test_cached_reuses_results_until_dependency_changes(monkeypatch):
+    monkeypatch.setattr(shared_cache, "_backend", shared_cache.MemoryBackend())
+    calls = []
+    stamp = [1]
+
+    @shared_cache.cached(ttl=60, depends_on=lambda: stamp[0])
+    def load(x, scale=1):
+        calls.append((x, scale))
+        return x * scale
+
+    assert load(2) == 2
+    assert load(2) == 2
+    assert load(2, scale=3) == 6
+    assert calls == [(2, 1), (2, 3)]
+
+    stamp[0] = 2
+    load(2)
+    assert len(calls) == 3
+
+    load.clear()
+    load(2)
+    assert len(calls) == 4
+
+def test_cached_calls_through_when_backend_fails(monkeypatch):
+    class Broken(shared_cache.CacheBackend):
+        def get(self, key):
+            raise OSError("disk gone")
+
+        def set(self, key, value, ttl):
+            raise OSError("disk gone")
+
+        def clear(self, prefix=""):
+            raise OSError("disk gone")
+
+    monkeypatch.setattr(shared_cache, "_backend", Broken())
+
+    @shared_cache.cached(ttl=60)
+    def load():
+        return "fresh"
+
+    assert load() == "fresh"
+
+def test_incomplete_backend_fails_when_created():
+    class NoClear(shared_cache.CacheBackend):
+        def get(self, key):
+            return None
+
+        def set(self, key, value, ttl):
+            pass
+
+    with pytest.raises(TypeError):
+        NoClear()
+
+def test_cached_does_not_store_errors(monkeypatch):
+    monkeypatch.setattr(shared_cache, "_backend", shared_cache.MemoryBackend())
+    attempts = []
+
+    @shared_cache.cached(ttl=60)
+    def load():
+        attempts.append(True)
+        if len(attempts) == 1:
+            raise ConnectionError("database unreachable")
+        return "rows"
+
+    with pytest.raises(ConnectionError):
+        load()
+    assert load() == "rows"
+    assert load() == "rows"
+    assert len(attempts) == 2
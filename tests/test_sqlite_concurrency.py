@@ -0,0 +1,97 @@
+"""
+SQLite concurrency modes: legacy rollback journal and opt-in WAL with a serialized writer
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from database_adapter import DatabaseAdapter
+from sqlite_writer import SQLiteWriter
+
+def _adapter(tmp_path, monkeypatch, mode=None):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    if mode:
+        monkeypatch.setenv("SQLITE_CONCURRENCY", mode)
+    else:
+        monkeypatch.delenv("SQLITE_CONCURRENCY", raising=False)
+    adapter = DatabaseAdapter(sqlite_path=str(tmp_path / "dash.db"))
+    adapter.create_tables()
+    return adapter
+
+def _journal_mode(adapter):
+    conn = adapter.get_connection()
+    try:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_legacy_mode_is_the_default(tmp_path, monkeypatch):
+    adapter = _adapter(tmp_path, monkeypatch)
+    assert adapter.sqlite_mode == "legacy"
+    assert not adapter.uses_sqlite_writer
+    assert _journal_mode(adapter) == "delete"
+
+    adapter.execute_sql("INSERT INTO task_submissions (submission_date, user_names) VALUES ('2024-05-01', 'Alice')")
+    assert adapter.sqlite_writer_stats() is None
+    assert len(adapter.read_sql("SELECT id FROM task_submissions")) == 1
+
+def test_wal_mode_sends_writes_through_one_writer(tmp_path, monkeypatch):
+    adapter = _adapter(tmp_path, monkeypatch, mode="wal")
+    assert adapter.uses_sqlite_writer
+    assert _journal_mode(adapter) == "wal"
+
+    def write(i):
+        adapter.execute_sql(
+            "INSERT INTO task_submissions (submission_date, user_names) VALUES ('2024-05-01', ?)", (f"user{i}",)
+        )
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(adapter.read_sql("SELECT id FROM task_submissions")) == 40
+    stats = adapter.sqlite_writer_stats()
+    assert stats["jobs"] >= 40
+    assert stats["transactions"] <= stats["jobs"]
+
+@pytest.mark.parametrize("mode", ["legacy", "wal"])
+def test_foreign_keys_are_enforced_in_both_modes(tmp_path, monkeypatch, mode):
+    adapter = _adapter(tmp_path, monkeypatch, mode=mode)
+    conn = adapter.get_connection()
+    try:
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+def test_failed_job_does_not_undo_the_others_in_its_transaction(tmp_path):
+    path = str(tmp_path / "writer.db")
+    setup = sqlite3.connect(path)
+    setup.execute("CREATE TABLE t (v INTEGER UNIQUE)")
+    setup.close()
+
+    # A wide batch window puts all three jobs into one transaction
+    writer = SQLiteWriter(lambda: sqlite3.connect(path, isolation_level=None, check_same_thread=False), batch_window=0.2)
+    results, errors = {}, {}
+
+    def submit(name, value):
+        try:
+            results[name] = writer.submit(lambda cursor: cursor.execute("INSERT INTO t VALUES (?)", (value,)).rowcount)
+        except sqlite3.IntegrityError as e:
+            errors[name] = e
+
+    threads = [threading.Thread(target=submit, args=args) for args in (("a", 1), ("b", 1), ("c", 2))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 1
+    assert sorted(results.values()) == [1, 1]
+    check = sqlite3.connect(path)
+    assert sorted(v for (v,) in check.execute("SELECT v FROM t")) == [1, 2]
+    check.close()
+    assert writer.stats()["transactions"] == 1
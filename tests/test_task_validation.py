@@ -0,0 +1,96 @@
+"""
+Task entry validation shared by the entry form and bulk import
+"""
+
+import pandas as pd
+
+from task_validation import validate_entries, validate_task_frames
+
+def test_validate_entries_normalizes_and_flags_rows():
+    df = pd.DataFrame([
+        {"task_type": "spatial", "batch": " B1 ", "completed": "12", "hours": 2},
+        {"task_type": "Dance", "batch": "B2", "completed": 1, "hours": 1},
+        {"task_type": "QA", "batch": "B3", "completed": "many", "hours": 1},
+        {"task_type": "QC", "batch": "", "completed": 5, "hours": 1},
+        {"task_type": "Automation", "batch": "B4", "completed": 150, "hours": 1},
+        {"task_type": "Textual", "batch": None, "completed": None, "hours": None},
+    ])
+    out = validate_entries(df)
+
+    assert out.loc[0, "task_type"] == "Spatial"
+    assert out.loc[0, "batch"] == "B1"
+    assert out.loc[0, "completed"] == 12.0
+    assert list(out["error"]) == [
+        "",
+        "unknown task type",
+        "completed is not a number",
+        "batch is required",
+        "completed is above the maximum for this task type",
+        "",
+    ]
+    assert list(out["blank"]) == [False, False, False, False, False, True]
+
+def test_other_rows_may_omit_the_batch():
+    out = validate_entries(pd.DataFrame([
+        {"task_type": "Other", "batch": "", "completed": 3, "hours": 1},
+        {"task_type": "Spatial", "batch": "", "completed": 3, "hours": 1},
+    ]))
+    assert list(out["batch"]) == ["N/A", ""]
+    assert list(out["error"]) == ["", "batch is required"]
+
+def test_validate_task_frames_totals_and_entries():
+    result = validate_task_frames({
+        "Spatial": pd.DataFrame([
+            {"batch": "B1", "completed": 10, "hours": 2},
+            {"batch": "B2", "completed": 5, "hours": 1.5},
+            {"batch": None, "completed": None, "hours": None},
+        ]),
+        "QA": [{"batch": "B3", "completed": 7, "hours": 1}],
+    })
+
+    assert result.ok
+    assert result.completed("Spatial") == 15.0
+    assert result.hours("Spatial") == 3.5
+    assert result.total_hours == 4.5
+    assert result.batches("Spatial") == ["B1", "B2"]
+    assert result.entry_records() == [
+        {"task_type": "Spatial", "batch": "B1", "completed": 10.0, "hours": 2.0},
+        {"task_type": "Spatial", "batch": "B2", "completed": 5.0, "hours": 1.5},
+        {"task_type": "QA", "batch": "B3", "completed": 7.0, "hours": 1.0},
+    ]
+
+def test_incomplete_rows_are_skipped_like_the_entry_form_did():
+    result = validate_task_frames({
+        "Spatial": [
+            {"batch": "B1", "completed": 10, "hours": 2},
+            {"batch": "B2", "completed": 5, "hours": 0},
+            {"batch": "", "completed": 3, "hours": 1},
+            {"batch": "B3", "completed": "n/a", "hours": 1},
+        ],
+    })
+
+    assert result.ok
+    assert result.batches("Spatial") == ["B1"]
+    assert len(result.entry_records()) == 1
+
+def test_a_type_with_only_incomplete_rows_is_an_error():
+    result = validate_task_frames({"QC": [{"batch": "B1", "completed": 0, "hours": 2}]})
+    assert result.error_messages() == ["QC task requires at least one valid row"]
+
+def test_validate_task_frames_reports_row_and_report_errors():
+    result = validate_task_frames(
+        {"Spatial": [{"batch": "B1", "completed": 0, "hours": 2}], "QA": [{"batch": "B2", "completed": 1, "hours": 9}]},
+        selected=["Spatial", "QA", "Other"],
+        report_row_errors=True,
+    )
+
+    assert not result.ok
+    assert result.error_messages() == [
+        "Spatial row 1: completed must be greater than 0",
+        "Spatial task requires at least one valid row",
+        "Total hours must be 8 or less",
+    ]
+
+def test_max_total_hours_can_be_disabled():
+    result = validate_task_frames({"QA": [{"batch": "B2", "completed": 1, "hours": 12}]}, max_total_hours=None)
+    assert result.ok
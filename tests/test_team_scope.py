@@ -0,0 +1,86 @@
+"""
+Team scope: team-filtered history in SQL and the admin Team selector
+"""
+
+from datetime import date
+
+import pytest
+
+import history_data
+
+USERS = [("Alice", "QA", 1), ("Bob", "QA", 0), ("Carol", "Spatial", 1)]
+
+@pytest.fixture
+def teams(dashboard):
+    def _fill(cursor):
+        for name, team, active in USERS:
+            cursor.execute("INSERT INTO user_profiles (user_name, team_function, active) VALUES (?, ?, ?)", (name, team, active))
+        for day in ("2024-05-01", "2024-05-02"):
+            for name, _, _ in USERS:
+                cursor.execute(
+                    "INSERT INTO task_submissions (submission_date, user_names, total_hours) VALUES (?, ?, 8)", (day, name)
+                )
+                cursor.execute(
+                    "INSERT INTO task_entries (submission_id, submission_date, user_name, task_type, batch, completed, hours) "
+                    "VALUES (?, ?, ?, 'QA', 'B1', 1, 8)",
+                    (cursor.lastrowid, day, name)
+                )
+    dashboard.db_adapter.run_write(_fill)
+    return dashboard
+
+def test_history_is_filtered_to_the_team_members(teams):
+    start, end = date(2024, 5, 1), date(2024, 5, 2)
+    qa = history_data.submissions_in_range(start, end, team="QA")
+    # Bob is inactive, but his history still belongs to the team
+    assert sorted(set(qa["user_names"])) == ["Alice", "Bob"]
+    assert len(qa) == 4
+    assert set(history_data.task_entries_in_range(start, end, team="Spatial")["user_name"]) == {"Carol"}
+    assert len(history_data.submissions_in_range(start, end)) == 6
+    assert history_data.submissions_in_range(start, end, team="Nobody").empty
+
+def test_team_lists(teams):
+    assert teams.get_team_functions() == ["QA", "Spatial"]
+    assert sorted(teams.get_team_member_names("QA")) == ["Alice", "Bob"]
+    assert set(teams.get_all_submissions("Spatial")["user_names"]) == {"Carol"}
+    assert len(teams.get_all_submissions()) == 6
+
+def test_a_membership_change_reaches_cached_team_slices(teams):
+    start, end = date(2024, 5, 1), date(2024, 5, 2)
+    assert len(history_data.submissions_in_range(start, end, team="Spatial")) == 2
+
+    teams.db_adapter.execute_sql("UPDATE user_profiles SET team_function = 'Spatial' WHERE user_name = 'Alice'")
+    teams.invalidate_team_scopes()
+    assert len(history_data.submissions_in_range(start, end, team="Spatial")) == 4
+
+def test_failed_team_lookups_are_not_cached(teams, monkeypatch):
+    healthy = teams.get_read_connection
+
+    def unreachable():
+        raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(teams, "get_read_connection", unreachable)
+    with pytest.raises(ConnectionError):
+        teams.get_team_functions()
+    with pytest.raises(ConnectionError):
+        teams.get_team_member_names("QA")
+
+    monkeypatch.setattr(teams, "get_read_connection", healthy)
+    assert teams.get_team_functions() == ["QA", "Spatial"]
+    assert sorted(teams.get_team_member_names("QA")) == ["Alice", "Bob"]
+
+def test_scoped_admin_pages(teams):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file("../team_dashboard.py", default_timeout=60)
+    at.session_state["authenticated"] = True
+    at.session_state["current_user"] = "Admin"
+    at.session_state["is_admin"] = True
+    at.run()
+    team_box = at.sidebar.selectbox(key="team_scope")
+    assert team_box.options == [teams.ALL_TEAMS, "QA", "Spatial"]
+
+    team_box.set_value("Spatial").run()
+    at.radio(key="data_management_section").set_value("Data Cleanup").run()
+    assert not at.exception
+    cleanup = [button for button in at.button if button.label.startswith("Delete Old Records")]
+    assert cleanup and cleanup[0].disabled
@@ -0,0 +1,86 @@
+"""
+Write-behind journal: durable enqueue, batch replay and failure handling
+"""
+
+from datetime import date
+
+import pytest
+
+import write_behind
+
+class Target:
+    """apply_batch() double that records items and fails the keys in ``failing``"""
+
+    def __init__(self):
+        self.items = []
+        self.failing = set()
+        self.down = False
+
+    def __call__(self, items):
+        if self.down:
+            raise ConnectionError("database unreachable")
+        self.items.extend(item for item in items if item[0] not in self.failing)
+        return {key: ValueError("rejected") for key, _, _ in items if key in self.failing}
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    def make(target, **kwargs):
+        journal = write_behind.WriteBehindJournal(target, path=str(tmp_path / "journal.db"), **kwargs)
+        # Flush from the test instead of the background thread
+        monkeypatch.setattr(journal, "start", lambda: None)
+        return journal
+    return make
+
+def test_enqueued_submissions_survive_a_restart_and_flush(journal):
+    first = journal(Target())
+    key = first.enqueue({"submission_date": date(2024, 5, 2), "total_hours": 8.0}, [{"task_type": "QA"}])
+    assert first.stats()["backlog"] == 1
+
+    target, flushed = Target(), []
+    second = journal(target, on_flushed=flushed.extend)
+    assert second.flush_once() == 1
+
+    assert target.items == [(key, {"submission_date": "2024-05-02", "total_hours": 8.0}, [{"task_type": "QA"}])]
+    assert flushed == target.items
+    assert second.stats()["backlog"] == 0
+
+def test_failed_items_stay_queued_with_backoff(journal):
+    target = Target()
+    queue = journal(target)
+    good = queue.enqueue({"n": 1}, [])
+    bad = queue.enqueue({"n": 2}, [])
+    target.failing.add(bad)
+
+    assert queue.flush_once() == 1
+    assert [item[0] for item in target.items] == [good]
+    stats = queue.stats()
+    assert stats["backlog"] == 1
+    assert stats["failing"] == 1
+    assert stats["last_error"] == "rejected"
+    # Not due again until its backoff has passed
+    assert queue.flush_once() == 0
+
+def test_unreachable_target_keeps_the_whole_batch(journal):
+    target = Target()
+    queue = journal(target)
+    queue.enqueue({"n": 1}, [])
+    queue.enqueue({"n": 2}, [])
+
+    target.down = True
+    assert queue.flush_once() == 0
+    stats = queue.stats()
+    assert stats["backlog"] == 2
+    assert stats["failing"] == 0
+    assert stats["retry_in_s"] > 0
+
+    target.down = False
+    assert queue.flush_once() == 2
+
+def test_prepare_runs_once_before_the_first_batch(journal):
+    prepared = []
+    queue = journal(Target(), prepare=lambda: prepared.append(True))
+    queue.enqueue({"n": 1}, [])
+    queue.flush_once()
+    queue.enqueue({"n": 2}, [])
+    queue.flush_once()
+    assert prepared == [True]
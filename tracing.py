@@ -0,0 +1,219 @@
+"""
+Lightweight span tracing for Team Dashboard reruns
+Records page, cached-loader and database spans for each run of main()
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from query_metrics import query_metrics
+
+# Completed reruns kept for the admin trace panel (TRACE_HISTORY overrides)
+TRACE_HISTORY = int(os.getenv("TRACE_HISTORY", "50"))
+
+class Span:
+    __slots__ = ("name", "kind", "start", "duration", "depth", "thread", "cache_hit", "attrs")
+
+    def __init__(self, name: str, kind: str, start: float, depth: int, thread: str, attrs: Dict):
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.duration = 0.0
+        self.depth = depth
+        self.thread = thread
+        self.cache_hit: Optional[bool] = None
+        self.attrs = attrs
+
+    def as_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "start_ms": self.start * 1000,
+            "duration_ms": self.duration * 1000,
+            "depth": self.depth,
+            "thread": self.thread,
+            "cache_hit": self.cache_hit,
+            **self.attrs,
+        }
+
+class Trace:
+    """Spans recorded during one rerun, with offsets relative to its start."""
+
+    def __init__(self, label: str, **attrs):
+        self.label = label
+        self.attrs = attrs
+        self.started_at = datetime.now()
+        self.t0 = time.perf_counter()
+        self.total = 0.0
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._checkpoint: Optional[Span] = None
+
+    def open_span(self, name: str, kind: str, depth: int, **attrs) -> Span:
+        span = Span(name, kind, time.perf_counter() - self.t0, depth, threading.current_thread().name, attrs)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def close_span(self, span: Span):
+        span.duration = time.perf_counter() - self.t0 - span.start
+
+    def add_completed(self, name: str, kind: str, duration: float, depth: int, **attrs):
+        """Add a span that has already finished (e.g. a database call)."""
+        span = Span(name, kind, time.perf_counter() - self.t0 - duration, depth, threading.current_thread().name, attrs)
+        span.duration = duration
+        with self._lock:
+            self.spans.append(span)
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return {
+            "label": self.label,
+            "started_at": self.started_at.strftime("%H:%M:%S"),
+            "total_ms": self.total * 1000,
+            **self.attrs,
+            "spans": [s.as_dict() for s in spans],
+        }
+
+_state = threading.local()
+_history = deque(maxlen=TRACE_HISTORY)
+_history_lock = threading.Lock()
+
+def current_trace() -> Optional[Trace]:
+    return getattr(_state, "trace", None)
+
+def activate(trace: Optional[Trace], depth: int = 0):
+    """Make ``trace`` current on this thread (used by worker threads)."""
+    _state.trace = trace
+    _state.depth = depth
+
+def current_depth() -> int:
+    return getattr(_state, "depth", 0)
+
+def start_trace(label: str, **attrs) -> Trace:
+    trace = Trace(label, **attrs)
+    activate(trace)
+    return trace
+
+def checkpoint(name: str):
+    """Close the previous top-level section of the current trace and open ``name``."""
+    trace = current_trace()
+    if trace is None:
+        return
+    if trace._checkpoint is not None:
+        trace.close_span(trace._checkpoint)
+    trace._checkpoint = trace.open_span(name, "section", 0)
+    _state.depth = 1
+
+def set_trace_label(label: str, **attrs):
+    trace = current_trace()
+    if trace is not None:
+        trace.label = label
+        trace.attrs.update(attrs)
+
+def finish_trace() -> Optional[Trace]:
+    """Close the current trace and add it to the rerun history."""
+    trace = current_trace()
+    if trace is None:
+        return None
+    if trace._checkpoint is not None:
+        trace.close_span(trace._checkpoint)
+        trace._checkpoint = None
+    trace.total = time.perf_counter() - trace.t0
+    activate(None)
+    with _history_lock:
+        _history.append(trace)
+    return trace
+
+def recent_traces(limit: Optional[int] = None) -> List[Dict]:
+    """Return completed traces, newest first."""
+    with _history_lock:
+        traces = list(_history)[::-1]
+    return [t.as_dict() for t in traces[:limit]]
+
+@contextmanager
+def span(name: str, kind: str = "section", **attrs):
+    """Record a span for the enclosed block; a no-op when no trace is active."""
+    trace = current_trace()
+    if trace is None:
+        yield None
+        return
+    depth = current_depth()
+    current = trace.open_span(name, kind, depth, **attrs)
+    _state.depth = depth + 1
+    try:
+        yield current
+    finally:
+        _state.depth = depth
+        trace.close_span(current)
+
+def traced(name: Optional[str] = None, kind: str = "function"):
+    """Decorator form of :func:`span`."""
+    def decorator(func: Callable):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def traced_run(label: str = "rerun"):
+    """Decorator for the script entry point: one trace per call."""
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start_trace(label)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                finish_trace()
+        return wrapper
+    return decorator
+
+def traced_loader(cache_decorator: Callable):
+    """Apply ``cache_decorator`` (e.g. ``st.cache_data(ttl=600)``) and record
+    a "cache" span that notes whether the call was served from the cache."""
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        def body(*args, **kwargs):
+            # Only runs on a cache miss
+            misses = getattr(_state, "misses", None)
+            if misses:
+                misses[-1] = True
+            return func(*args, **kwargs)
+
+        cached = cache_decorator(body)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not hasattr(_state, "misses"):
+                _state.misses = []
+            _state.misses.append(False)
+            try:
+                with span(func.__name__, "cache") as current:
+                    result = cached(*args, **kwargs)
+                    if current is not None:
+                        current.cache_hit = not _state.misses[-1]
+                    return result
+            finally:
+                _state.misses.pop()
+
+        wrapper.clear = getattr(cached, "clear", None)
+        return wrapper
+    return decorator
+
+def _record_db_span(backend: str, sql: str, seconds: float, rows: int, error: bool):
+    trace = current_trace()
+    if trace is not None:
+        trace.add_completed(sql[:80], "db", seconds, current_depth(), backend=backend, rows=rows, error=error)
+
+query_metrics.add_listener(_record_db_span)
@@ -0,0 +1,214 @@
+"""
+Write-behind journal for Team Dashboard submissions
+Submissions are stored in a local SQLite journal and acknowledged at once; a
+background flusher replays them to the remote database in batches, keyed by
+an idempotency key so a replay never inserts the same submission twice
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("team_dashboard.write_behind")
+
+# Journal location and flush tuning (environment overrides)
+WRITE_BEHIND_PATH = os.getenv("WRITE_BEHIND_PATH", "write_behind_journal.db")
+FLUSH_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH", "50"))
+FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", "1.0"))
+MAX_BACKOFF = float(os.getenv("WRITE_BEHIND_MAX_BACKOFF", "300"))
+
+# (idempotency_key, submission data, task entries)
+JournalItem = Tuple[str, Dict, List[Dict]]
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        # numpy scalars
+        return value.item()
+    return str(value)
+
+def _backoff(attempts: int) -> float:
+    return min(MAX_BACKOFF, FLUSH_INTERVAL * (2 ** min(attempts, 16)))
+
+class WriteBehindJournal:
+    """Durable queue of pending submissions with a background flusher.
+
+    ``apply_batch(items)`` must write the items to the target database in
+    one transaction and return ``{key: error}`` for items that failed on
+    their own. If it raises, the whole batch is retried after a backoff
+    (e.g. while the database is unreachable). ``prepare`` runs once before
+    the first batch, e.g. to create the target tables; ``on_flushed`` gets
+    the items written by each batch.
+    """
+
+    def __init__(self, apply_batch: Callable[[List[JournalItem]], Dict[str, Exception]],
+                 path: str = WRITE_BEHIND_PATH, on_flushed: Optional[Callable[[List[JournalItem]], None]] = None,
+                 prepare: Optional[Callable[[], None]] = None):
+        self.apply_batch = apply_batch
+        self.path = path
+        self.on_flushed = on_flushed
+        self.prepare = prepare
+        self._prepared = prepare is None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._paused_until = 0.0
+        self._consecutive_failures = 0
+        self.flushed = 0
+        self.last_error: Optional[str] = None
+        self.last_flush_at: Optional[float] = None
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pending_submissions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt_at REAL DEFAULT 0,
+                    last_error TEXT
+                )
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        # The journal is the only copy until flushed, so fsync every commit
+        conn.execute("PRAGMA synchronous = FULL")
+        return conn
+
+    def enqueue(self, data: Dict, task_entries: List[Dict]) -> str:
+        """Persist a submission locally and return its idempotency key."""
+        key = uuid.uuid4().hex
+        payload = json.dumps({"data": data, "task_entries": task_entries}, default=_json_default)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO pending_submissions (idempotency_key, payload, created_at) VALUES (?, ?, ?)",
+                (key, payload, time.time())
+            )
+        finally:
+            conn.close()
+        self.start()
+        self._wake.set()
+        return key
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            if time.time() < self._paused_until:
+                continue
+            try:
+                while self.flush_once() == FLUSH_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                logger.error("Write-behind flush failed: %s", e)
+
+    def flush_once(self) -> int:
+        """Replay one batch of due submissions; return how many were written."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, idempotency_key, payload, attempts FROM pending_submissions "
+                "WHERE next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, FLUSH_BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                return 0
+
+            items = []
+            for _, key, payload, _ in rows:
+                decoded = json.loads(payload)
+                items.append((key, decoded["data"], decoded["task_entries"]))
+
+            try:
+                if not self._prepared:
+                    self.prepare()
+                    self._prepared = True
+                failures = self.apply_batch(items)
+            except Exception as e:
+                # Target unavailable: keep everything and back off the whole journal
+                self._consecutive_failures += 1
+                self._paused_until = time.time() + _backoff(self._consecutive_failures)
+                self.last_error = str(e)
+                logger.warning("Write-behind target unavailable, retrying in %.0f s: %s",
+                               self._paused_until - time.time(), e)
+                return 0
+
+            self._consecutive_failures = 0
+            self._paused_until = 0.0
+            done = [(row_id,) for row_id, key, _, _ in rows if key not in failures]
+            conn.execute("BEGIN")
+            conn.executemany("DELETE FROM pending_submissions WHERE id = ?", done)
+            for row_id, key, _, attempts in rows:
+                if key in failures:
+                    conn.execute(
+                        "UPDATE pending_submissions SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                        (attempts + 1, now + _backoff(attempts + 1), str(failures[key]), row_id)
+                    )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        if failures:
+            self.last_error = str(next(iter(failures.values())))
+        self.flushed += len(done)
+        self.last_flush_at = time.time()
+        if done and self.on_flushed:
+            self.on_flushed([item for item in items if item[0] not in failures])
+        return len(done)
+
+    def stats(self) -> Dict:
+        conn = self._connect()
+        try:
+            backlog, oldest, failing = conn.execute(
+                "SELECT COUNT(*), MIN(created_at), SUM(CASE WHEN attempts > 0 THEN 1 ELSE 0 END) "
+                "FROM pending_submissions"
+            ).fetchone()
+        finally:
+            conn.close()
+        now = time.time()
+        return {
+            "backlog": backlog,
+            "oldest_age_s": now - oldest if oldest else 0.0,
+            "failing": failing or 0,
+            "flushed": self.flushed,
+            "retry_in_s": max(0.0, self._paused_until - now),
+            "last_error": self.last_error,
+        }
+
+_journal: Optional[WriteBehindJournal] = None
+_journal_lock = threading.Lock()
+
+def get_journal(apply_batch: Callable[[List[JournalItem]], Dict[str, Exception]],
+                on_flushed: Optional[Callable[[List[JournalItem]], None]] = None,
+                prepare: Optional[Callable[[], None]] = None) -> WriteBehindJournal:
+    """Return the process-wide journal, creating it (and resuming any backlog) on first use."""
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                _journal = WriteBehindJournal(apply_batch, on_flushed=on_flushed, prepare=prepare)
+                _journal.start()
+    return _journal
+
+def active_journal() -> Optional[WriteBehindJournal]:
+    return _journal